@@ -22,30 +22,11 @@ from .interfaces import (  # noqa: F401
     LearningEvaluationAgent,
     PredictionAgent,
 )
-
-"""
-Agent package for the Hermes project.
-
-This package defines common interfaces and base types for the multi‑agent
-architecture (ingestion, orchestration, analytics, learning, prediction).
-
-Phase 2 will build concrete implementations on top of these interfaces.
-"""
-
-from .interfaces import (  # noqa: F401
-    Agent,
-    Event,
-    FeatureVector,
-    Outcome,
-    Prediction,
-    IngestionAgent,
-    OrchestrationAgent,
-    HistoricalPerformanceAgent,
-    TechnicalIndicatorAgent,
-    PsychoSocialAgent,
-    MacroEconomicAgent,
-    LearningEvaluationAgent,
-    PredictionAgent,
+from .frames import FeatureFrame, FeatureRow  # noqa: F401
+from .records import (  # noqa: F401
+    EventRecord,
+    FeatureRecord,
+    FeatureSchema,
+    OutcomeRecord,
+    PredictionRecord,
 )
-
-
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+#Asyncio event bus fanning one ingestion stream out to many agents.
+
+#Producers publish Events; each subscriber declares which topics it wants
+#(by Event.source and/or symbol) and gets its own bounded queue drained by its
+#own consumer task, so a slow agent only ever delays itself:
+#    - policy="block": publish() waits for queue space (backpressure).
+#    - policy="drop_newest" / "drop_oldest": publish() never waits; when the
+#      queue is full the incoming / oldest queued event is dropped and counted.
+#Consumers hand events to their handler in batches (up to batch_size, waiting
+#at most batch_timeout seconds to fill one). Synchronous handlers, such as an
+#agent's handle_event, run in a thread pool so they never block the loop.
+#Per-topic counters (published / delivered / dropped / errors, throughput and
+#queue lag) and per-subscription counters are available from metrics();
+#subscriptions are keyed by their bus-assigned id, since names need not be unique.
+
+import asyncio
+import inspect
+import itertools
+import logging
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterable,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .interfaces import Agent, Event
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("block", "drop_newest", "drop_oldest")
+
+Topic = Tuple[str, str]  # (source, symbol)
+BatchHandler = Callable[[List[Event]], Any]
+
+
+def topic_of(event: Event) -> Topic:
+    return event.source, event.symbol
+
+
+@dataclass
+class TopicStats:
+
+    #Counters for one (source, symbol) topic.
+
+    #delivered / dropped / errors count per subscriber, so one published event
+    #delivered to three agents counts three deliveries. Lag is the time from
+    #publish to the subscriber's handler finishing with the event.
+
+
+    published: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    errors: int = 0
+    lag_total: float = 0.0
+    lag_max: float = 0.0
+    first_published: Optional[float] = None
+    last_published: Optional[float] = None
+
+    def record_publish(self, now: float) -> None:
+        self.published += 1
+        if self.first_published is None:
+            self.first_published = now
+        self.last_published = now
+
+    def record_delivery(self, lag: float) -> None:
+        self.delivered += 1
+        self.lag_total += lag
+        if lag > self.lag_max:
+            self.lag_max = lag
+
+    def summary(self, now: float) -> Dict[str, float]:
+        elapsed = now - self.first_published if self.first_published is not None else 0.0
+        return {
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "publish_rate": self.published / elapsed if elapsed > 0 else 0.0,
+            "delivery_rate": self.delivered / elapsed if elapsed > 0 else 0.0,
+            "lag_mean": self.lag_total / self.delivered if self.delivered else 0.0,
+            "lag_max": self.lag_max,
+        }
+
+
+@dataclass(eq=False)
+class Subscription:
+
+    #One subscriber: topic filter, bounded queue and delivery settings.
+
+    #sources / symbols: None matches everything.
+    #handler: called with a list of Events; may be sync or a coroutine function.
+    #threaded: run a sync handler in the bus executor (default for sync handlers).
+    #id: assigned by the bus, unique per subscription (names may repeat).
+
+
+    name: str
+    handler: BatchHandler
+    sources: Optional[FrozenSet[str]] = None
+    symbols: Optional[FrozenSet[str]] = None
+    maxsize: int = 1000
+    policy: str = "block"
+    batch_size: int = 1
+    batch_timeout: float = 0.0
+    threaded: bool = True
+    id: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    errors: int = 0
+    queue: "asyncio.Queue[Tuple[float, Event]]" = field(init=False, repr=False)
+    _task: Optional["asyncio.Task[None]"] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.policy not in POLICIES:
+            raise ValueError(f"Unknown policy {self.policy!r}; expected one of {POLICIES}")
+        if self.batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+
+    def matches(self, source: str, symbol: str) -> bool:
+        return (self.sources is None or source in self.sources) and (self.symbols is None or symbol in self.symbols)
+
+
+def _as_set(values: Optional[Union[str, Iterable[str]]]) -> Optional[FrozenSet[str]]:
+    if values is None:
+        return None
+    return frozenset([values] if isinstance(values, str) else values)
+
+
+def _agent_handler(agent: Agent) -> BatchHandler:
+    def deliver(events: List[Event]) -> None:
+        for event in events:
+            agent.handle_event(event)
+
+    return deliver
+
+
+class EventBus:
+
+    #Topic-routed, per-subscriber-queued event fan-out on one asyncio loop.
+
+    #Typical use:
+    #    bus = EventBus()
+    #    bus.subscribe_agent(technical, sources="YF_PRICE")
+    #    bus.subscribe_agent(psycho, sources=("REDDIT", "NEWS"), policy="drop_oldest")
+    #    async with bus:
+    #        await bus.pump(ingestion_events)
+
+
+    def __init__(self, executor: Optional[Executor] = None) -> None:
+        self.executor = executor
+        self._subscriptions: List[Subscription] = []
+        self._routes: Dict[Topic, Tuple[Subscription, ...]] = {}
+        self._stats: Dict[Topic, TopicStats] = {}
+        self._ids = itertools.count(1)
+        self._running = False
+
+    # -- Subscriptions ----------------------------------------------------------
+
+    def subscribe(
+        self,
+        handler: BatchHandler,
+        *,
+        name: Optional[str] = None,
+        sources: Optional[Union[str, Iterable[str]]] = None,
+        symbols: Optional[Union[str, Iterable[str]]] = None,
+        maxsize: int = 1000,
+        policy: str = "block",
+        batch_size: int = 1,
+        batch_timeout: float = 0.0,
+        threaded: Optional[bool] = None,
+    ) -> Subscription:
+        #Register a batch handler; returns its Subscription (for unsubscribe / metrics).
+        if threaded is None:
+            threaded = not inspect.iscoroutinefunction(handler)
+        subscription = Subscription(
+            name=name or getattr(handler, "__qualname__", repr(handler)),
+            handler=handler,
+            sources=_as_set(sources),
+            symbols=_as_set(symbols),
+            maxsize=maxsize,
+            policy=policy,
+            batch_size=batch_size,
+            batch_timeout=batch_timeout,
+            threaded=threaded,
+            id=next(self._ids),
+        )
+        self._subscriptions.append(subscription)
+        self._routes.clear()
+        if self._running:
+            self._start_worker(subscription)
+        return subscription
+
+    def subscribe_agent(self, agent: Agent, **kwargs: Any) -> Subscription:
+        #Deliver matching events to agent.handle_event (in a worker thread).
+        kwargs.setdefault("name", type(agent).__name__)
+        return self.subscribe(_agent_handler(agent), threaded=True, **kwargs)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        #Stop routing to `subscription`; events already queued are discarded.
+        self._subscriptions.remove(subscription)
+        self._routes.clear()
+        if subscription._task is not None:
+            subscription._task.cancel()
+            subscription._task = None
+
+    def _route(self, topic: Topic) -> Tuple[Subscription, ...]:
+        route = self._routes.get(topic)
+        if route is None:
+            route = self._routes[topic] = tuple(s for s in self._subscriptions if s.matches(*topic))
+        return route
+
+    def _topic_stats(self, topic: Topic) -> TopicStats:
+        stats = self._stats.get(topic)
+        if stats is None:
+            stats = self._stats[topic] = TopicStats()
+        return stats
+
+    # -- Publishing -------------------------------------------------------------
+
+    async def publish(self, event: Event) -> int:
+        #Route `event` to its subscribers; waits only on full "block" queues.
+        #Returns the number of subscribers the event was queued for.
+        topic = topic_of(event)
+        loop = asyncio.get_running_loop()
+        stats = self._topic_stats(topic)
+        stats.record_publish(loop.time())
+        queued = 0
+        for subscription in self._route(topic):
+            if subscription.policy == "block" and subscription.queue.full():
+                await subscription.queue.put((loop.time(), event))
+                queued += 1
+            else:
+                queued += self._offer(subscription, stats, loop.time(), event)
+        return queued
+
+    def publish_nowait(self, event: Event) -> int:
+        #Like publish() but never waits: a full "block" queue drops the event too.
+        topic = topic_of(event)
+        now = asyncio.get_running_loop().time()
+        stats = self._topic_stats(topic)
+        stats.record_publish(now)
+        queued = 0
+        for subscription in self._route(topic):
+            queued += self._offer(subscription, stats, now, event)
+        return queued
+
+    def _offer(self, subscription: Subscription, stats: TopicStats, now: float, event: Event) -> int:
+        queue = subscription.queue
+        if queue.full():
+            if subscription.policy != "drop_oldest":
+                subscription.dropped += 1
+                stats.dropped += 1
+                return 0
+            _, evicted = queue.get_nowait()
+            queue.task_done()
+            subscription.dropped += 1
+            self._topic_stats(topic_of(evicted)).dropped += 1
+        queue.put_nowait((now, event))
+        return 1
+
+    async def pump(self, events: Union[Iterable[Event], AsyncIterable[Event]]) -> int:
+        #Publish every event from a (sync or async) ingestion stream; returns the count.
+        count = 0
+        if hasattr(events, "__aiter__"):
+            async for event in events:  # type: ignore[union-attr]
+                await self.publish(event)
+                count += 1
+        else:
+            for event in events:  # type: ignore[union-attr]
+                await self.publish(event)
+                count += 1
+        return count
+
+    # -- Consumers --------------------------------------------------------------
+
+    async def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        for subscription in self._subscriptions:
+            self._start_worker(subscription)
+
+    def _start_worker(self, subscription: Subscription) -> None:
+        subscription._task = asyncio.get_running_loop().create_task(
+            self._consume(subscription), name=f"bus:{subscription.name}"
+        )
+
+    async def join(self) -> None:
+        #Wait until every queued event has been handled.
+        await asyncio.gather(*(s.queue.join() for s in self._subscriptions))
+
+    async def stop(self, drain: bool = True) -> None:
+        #Stop the consumers, first delivering what is queued unless drain=False.
+        if not self._running:
+            return
+        if drain:
+            await self.join()
+        self._running = False
+        tasks = [s._task for s in self._subscriptions if s._task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for subscription in self._subscriptions:
+            subscription._task = None
+
+    async def __aenter__(self) -> "EventBus":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.stop(drain=exc[0] is None)
+
+    async def _consume(self, subscription: Subscription) -> None:
+        loop = asyncio.get_running_loop()
+        queue = subscription.queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + subscription.batch_timeout
+            while len(batch) < subscription.batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._deliver(subscription, [event for _, event in batch])
+                failed = False
+            except Exception:
+                logger.exception("Event handler %s failed on a batch of %d", subscription.name, len(batch))
+                failed = True
+            now = loop.time()
+            for enqueued, event in batch:
+                stats = self._topic_stats(topic_of(event))
+                if failed:
+                    stats.errors += 1
+                    subscription.errors += 1
+                else:
+                    stats.record_delivery(now - enqueued)
+                    subscription.delivered += 1
+                queue.task_done()
+
+    async def _deliver(self, subscription: Subscription, events: List[Event]) -> None:
+        if subscription.threaded:
+            await asyncio.get_running_loop().run_in_executor(self.executor, subscription.handler, events)
+            return
+        result = subscription.handler(events)
+        if inspect.isawaitable(result):
+            await result
+
+    # -- Metrics ----------------------------------------------------------------
+
+    def metrics(self) -> Dict[str, Any]:
+        #Per-topic ("SOURCE:SYMBOL") and per-subscription (keyed by id) counters.
+        try:
+            now = asyncio.get_running_loop().time()
+        except RuntimeError:
+            now = max((s.last_published or 0.0 for s in self._stats.values()), default=0.0)
+        return {
+            "topics": {f"{source}:{symbol}": stats.summary(now) for (source, symbol), stats in self._stats.items()},
+            "subscribers": {
+                s.id: {
+                    "name": s.name,
+                    "queued": s.queue.qsize(),
+                    "maxsize": s.maxsize,
+                    "policy": s.policy,
+                    "delivered": s.delivered,
+                    "dropped": s.dropped,
+                    "errors": s.errors,
+                }
+                for s in self._subscriptions
+            },
+        }
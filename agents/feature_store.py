@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+#On-disk point-in-time feature store.
+
+#Feature vectors are stored per (agent, symbol) partition as a sorted int64
+#timestamp column and a row-major float64 feature matrix, read back as
+#read-only memory maps (the same layout ideas as agents/price_store.py). Rows
+#are the features an agent produced as of that timestamp, so an as-of lookup
+#("latest features at or before t") is a binary search on the timestamp
+#column and never sees data from after t. Training sets are assembled by
+#as-of joining every agent's partitions onto a set of timestamps, without
+#recomputing features from raw prices.
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .frames import FeatureFrame, to_datetime64
+from .interfaces import FeatureVector
+
+_INDEX_FILE = "index.i8"
+_VALUES_FILE = "values.f8"
+_MANIFEST_FILE = "manifest.json"
+_ROOT = Path(__file__).resolve().parents[1]
+
+Timestamps = Union[datetime, Sequence[datetime], np.ndarray, pd.DatetimeIndex]
+
+
+def _default_store_dir() -> Path:
+    return Path(os.getenv("HERMES_FEATURE_STORE", _ROOT / "outputs" / "feature_store"))
+
+
+def _empty_frame(columns: Sequence[str] = ()) -> FeatureFrame:
+    return FeatureFrame(
+        tuple(columns),
+        np.empty((0, len(columns))),
+        np.empty(0, dtype=object),
+        np.empty(0, dtype="datetime64[ns]"),
+    )
+
+
+@dataclass
+class FeatureStore:
+
+    #Partitioned columnar store of FeatureVectors with as-of reads.
+
+    #Layout:
+    #    <root>/<agent>/<SYMBOL>/index.i8       int64 timestamps (ns, naive UTC), sorted, unique
+    #    <root>/<agent>/<SYMBOL>/values.f8      float64 (rows x columns), row-major
+    #    <root>/<agent>/<SYMBOL>/manifest.json  row count, column names, last timestamp
+
+    #Vectors for the same (agent, symbol, ts) within one write are merged into
+    #one row (e.g. the historical agent's per-horizon vectors); a later write
+    #for a stored ts replaces that whole row. As with PriceStore the manifest
+    #is written last, rewrites replace files instead of truncating them, and
+    #writers to one partition are serialized by a per-partition lock.
+
+
+    root: Path = field(default_factory=_default_store_dir)
+    _locks: Dict[Tuple[str, str], threading.Lock] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _locks_guard: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.root = Path(self.root)
+
+    # --- Writing ---------------------------------------------------------------
+
+    def write(self, vectors: Iterable[FeatureVector], agent: Optional[str] = None) -> int:
+
+        #Persist FeatureVectors; returns the number of vectors written.
+
+        #Each vector goes to the partition of `agent`, or of its meta["agent"]
+        #(as set by ConcurrentOrchestrationAgent) when `agent` is None.
+
+        by_agent: Dict[str, List[FeatureVector]] = {}
+        for vector in vectors:
+            name = agent or (vector.meta or {}).get("agent")
+            if not name:
+                raise ValueError("No agent given for a FeatureVector without meta['agent']")
+            by_agent.setdefault(name, []).append(vector)
+        for name, group in by_agent.items():
+            self.write_frame(name, FeatureFrame.from_feature_vectors(group))
+        return sum(len(group) for group in by_agent.values())
+
+    def write_frame(self, agent: str, frame: FeatureFrame) -> None:
+        #Persist every row of `frame` under `agent`, partitioned by symbol.
+        if not len(frame):
+            return
+        symbols = np.array([str(symbol).upper() for symbol in frame.symbols], dtype=object)
+        for key in dict.fromkeys(symbols):
+            rows = np.flatnonzero(symbols == key)
+            df = pd.DataFrame(frame.values[rows], index=pd.DatetimeIndex(frame.ts[rows]), columns=list(frame.columns))
+            with self._partition_lock(agent, key):
+                self._merge(agent, key, df)
+
+    def write_pandas(self, agent: str, symbol: str, df: pd.DataFrame) -> None:
+        #Persist a timestamp-indexed feature frame, e.g. an agent's backfill_features output.
+        self.write_frame(agent, FeatureFrame.from_pandas(df, symbol=symbol))
+
+    # --- Reading ---------------------------------------------------------------
+
+    def agents(self) -> List[str]:
+        return sorted(path.name for path in self.root.iterdir() if path.is_dir()) if self.root.exists() else []
+
+    def symbols(self, agent: str) -> List[str]:
+        agent_dir = self.root / agent
+        if not agent_dir.exists():
+            return []
+        return sorted(path.name for path in agent_dir.iterdir() if self._read_manifest(agent, path.name))
+
+    def columns(self, agent: str, symbol: str) -> Tuple[str, ...]:
+        manifest = self._read_manifest(agent, symbol.upper())
+        return tuple(manifest["columns"]) if manifest else ()
+
+    def load(self, agent: str, symbol: str) -> FeatureFrame:
+        #All stored rows of one partition, backed by read-only memory maps.
+        key = symbol.upper()
+        index, values, columns = self._partition(agent, key)
+        return FeatureFrame(columns, values, np.full(len(index), key, dtype=object), index.view("datetime64[ns]"))
+
+    def scan(
+        self,
+        agent: str,
+        symbol: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> FeatureFrame:
+        #Rows with start <= ts <= end (a view of the memory maps).
+        frame = self.load(agent, symbol)
+        index = frame.ts.view("int64")
+        lo = 0 if start is None else int(np.searchsorted(index, _ns(start), side="left"))
+        hi = len(index) if end is None else int(np.searchsorted(index, _ns(end), side="right"))
+        return frame[lo:hi]
+
+    def as_of(
+        self,
+        symbols: Union[str, Sequence[str]],
+        ts: Timestamps,
+        agents: Optional[Sequence[str]] = None,
+        tolerance: Optional[pd.Timedelta] = None,
+    ) -> FeatureFrame:
+
+        #Latest features at or before each query time, joined across agents.
+
+        #`symbols` and `ts` are paired element-wise; a single symbol or a single
+        #timestamp is broadcast against the other. Row i of the result holds,
+        #for every agent, the newest row of symbols[i] with ts <= ts[i] (and,
+        #with `tolerance`, no older than ts[i] - tolerance); anything missing is
+        #NaN. Rows are labelled with the query times. Columns are the agents'
+        #feature names in agent order; a name stored by two agents is an error.
+
+        query_symbols, query_ts = _broadcast(symbols, ts)
+        agents = list(agents) if agents is not None else self.agents()
+        tolerance_ns = None if tolerance is None else int(pd.Timedelta(tolerance).value)
+
+        blocks: List[Tuple[Tuple[str, ...], np.ndarray]] = []
+        owners: Dict[str, str] = {}
+        for agent in agents:
+            columns, values = self._as_of_block(agent, query_symbols, query_ts, tolerance_ns)
+            for name in columns:
+                if name in owners:
+                    raise ValueError(f"Feature {name!r} is stored by both {owners[name]!r} and {agent!r}")
+                owners[name] = agent
+            blocks.append((columns, values))
+
+        columns = tuple(name for block_columns, _ in blocks for name in block_columns)
+        values = np.hstack([block for _, block in blocks]) if blocks else np.empty((len(query_ts), 0))
+        return FeatureFrame(columns, values, query_symbols, query_ts.view("datetime64[ns]"))
+
+    def training_set(
+        self,
+        symbols: Sequence[str],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        agents: Optional[Sequence[str]] = None,
+        on: Optional[str] = None,
+        tolerance: Optional[pd.Timedelta] = None,
+    ) -> FeatureFrame:
+
+        #Point-in-time feature matrix for model training.
+
+        #One row per stored timestamp of agent `on` (default: the first agent)
+        #in [start, end] for each symbol, with every agent's features as of
+        #that timestamp. Pair it with outcomes at the same (symbol, ts) keys.
+
+        agents = list(agents) if agents is not None else self.agents()
+        if not agents:
+            return _empty_frame()
+        on = on or agents[0]
+        keys = [(symbol, self.scan(on, symbol, start, end).ts) for symbol in symbols]
+        query_symbols = np.concatenate([np.full(len(ts), symbol.upper(), dtype=object) for symbol, ts in keys])
+        query_ts = np.concatenate([ts for _, ts in keys]) if keys else np.empty(0, dtype="datetime64[ns]")
+        return self.as_of(query_symbols, query_ts, agents=agents, tolerance=tolerance)
+
+    # --- Internal helpers ------------------------------------------------------
+
+    def _as_of_block(
+        self, agent: str, symbols: np.ndarray, ts: np.ndarray, tolerance_ns: Optional[int]
+    ) -> Tuple[Tuple[str, ...], np.ndarray]:
+        # Columns are the union over the queried partitions (schemas may differ
+        # by symbol); each partition answers all of its queries with one searchsorted.
+        partitions = {key: self._partition(agent, key) for key in dict.fromkeys(symbols)}
+        columns = tuple(dict.fromkeys(name for _, _, names in partitions.values() for name in names))
+        positions = {name: i for i, name in enumerate(columns)}
+        out = np.full((len(ts), len(columns)), np.nan)
+        for key, (index, values, names) in partitions.items():
+            if not len(index):
+                continue
+            queries = np.flatnonzero(symbols == key)
+            rows = np.searchsorted(index, ts[queries], side="right") - 1
+            found = rows >= 0
+            if tolerance_ns is not None:
+                found &= ts[queries] - index[np.maximum(rows, 0)] <= tolerance_ns
+            targets = np.array([positions[name] for name in names], dtype=np.int64)
+            out[np.ix_(queries[found], targets)] = values[rows[found]]
+        return columns, out
+
+    def _partition_lock(self, agent: str, key: str) -> threading.Lock:
+        # Serializes the read-merge-write of one partition across threads.
+        with self._locks_guard:
+            return self._locks.setdefault((agent, key), threading.Lock())
+
+    def _partition_dir(self, agent: str, key: str) -> Path:
+        return self.root / agent / key
+
+    def _partition(self, agent: str, key: str) -> Tuple[np.ndarray, np.ndarray, Tuple[str, ...]]:
+        manifest = self._read_manifest(agent, key)
+        if not manifest or manifest["rows"] == 0:
+            columns = tuple(manifest["columns"]) if manifest else ()
+            return np.empty(0, dtype="int64"), np.empty((0, len(columns))), columns
+        rows, columns = manifest["rows"], tuple(manifest["columns"])
+        partition_dir = self._partition_dir(agent, key)
+        index = np.memmap(partition_dir / _INDEX_FILE, dtype="int64", mode="r", shape=(rows,))
+        if not columns:
+            return index, np.empty((rows, 0)), columns
+        values = np.memmap(partition_dir / _VALUES_FILE, dtype="float64", mode="r", shape=(rows, len(columns)))
+        return index, values, columns
+
+    def _read_manifest(self, agent: str, key: str) -> Optional[dict]:
+        partition_dir = self._partition_dir(agent, key)
+        path = partition_dir / _MANIFEST_FILE
+        if not path.exists():
+            return None
+        manifest = json.loads(path.read_text())
+        # Guard against a crash between writing the data files and the manifest.
+        rows = manifest["rows"]
+        for name, size in ((_INDEX_FILE, rows * 8), (_VALUES_FILE, rows * len(manifest["columns"]) * 8)):
+            file_path = partition_dir / name
+            if size and (not file_path.exists() or file_path.stat().st_size < size):
+                return None
+        return manifest
+
+    def _write_manifest(self, agent: str, key: str, rows: int, columns: Sequence[str], last_ts: int) -> None:
+        manifest = {
+            "rows": rows,
+            "columns": list(columns),
+            "last_ts": pd.Timestamp(last_ts).isoformat(),
+        }
+        path = self._partition_dir(agent, key) / _MANIFEST_FILE
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, path)
+
+    def _merge(self, agent: str, key: str, delta: pd.DataFrame) -> None:
+        #Merge `delta` (ts-indexed, one column per feature) into a partition.
+        delta.index = pd.DatetimeIndex(to_datetime64(delta.index))
+        # Rows for the same timestamp (e.g. one per horizon) collapse into one.
+        delta = delta.groupby(level=0, sort=True).last()
+        manifest = self._read_manifest(agent, key)
+        partition_dir = self._partition_dir(agent, key)
+        partition_dir.mkdir(parents=True, exist_ok=True)
+
+        if manifest and manifest["rows"]:
+            stored_columns = tuple(manifest["columns"])
+            index, values, _ = self._partition(agent, key)
+            appendable = delta.index[0].value > index[-1] and set(delta.columns) <= set(stored_columns)
+            if appendable:
+                rows = manifest["rows"]
+                block = delta.reindex(columns=list(stored_columns)).to_numpy(dtype="float64")
+                for name, data, width in (
+                    (_INDEX_FILE, delta.index.asi8, 1),
+                    (_VALUES_FILE, block, len(stored_columns)),
+                ):
+                    with open(partition_dir / name, "r+b") as fh:
+                        fh.truncate(rows * width * 8)
+                        fh.seek(0, os.SEEK_END)
+                        fh.write(np.ascontiguousarray(data).tobytes())
+                self._write_manifest(agent, key, rows + len(delta), stored_columns, int(delta.index[-1].value))
+                return
+            stored = pd.DataFrame(np.array(values), index=pd.DatetimeIndex(index.view("datetime64[ns]")), columns=list(stored_columns))
+            # Rewritten timestamps replace the whole stored row, so a NaN in the
+            # new row clears a stale value instead of falling back to it.
+            delta = pd.concat([stored[~stored.index.isin(delta.index)], delta]).sort_index()
+            delta = delta[list(dict.fromkeys([*stored_columns, *delta.columns]))]
+
+        # Full rewrite; files are replaced so earlier memory maps stay intact.
+        for name, data in ((_INDEX_FILE, delta.index.asi8), (_VALUES_FILE, delta.to_numpy(dtype="float64"))):
+            tmp = partition_dir / f"{name}.tmp"
+            tmp.write_bytes(np.ascontiguousarray(data).tobytes())
+            os.replace(tmp, partition_dir / name)
+        self._write_manifest(agent, key, len(delta), [str(c) for c in delta.columns], int(delta.index[-1].value))
+
+
+def _ns(ts: datetime) -> int:
+    return int(to_datetime64([ts])[0].astype("int64"))
+
+
+def _broadcast(symbols: Union[str, Sequence[str]], ts: Timestamps) -> Tuple[np.ndarray, np.ndarray]:
+    # Paired (SYMBOL, int64 ns) query arrays.
+    if isinstance(ts, np.ndarray) and ts.dtype.kind == "M":
+        times = ts.astype("datetime64[ns]").astype("int64")
+    else:
+        scalar_ts = isinstance(ts, (datetime, np.datetime64, str))
+        times = to_datetime64([ts] if scalar_ts else ts).astype("int64")
+    names = np.array([symbols] if isinstance(symbols, str) else [str(s) for s in symbols], dtype=object)
+    names = np.array([name.upper() for name in names], dtype=object)
+    if len(names) == 1 and len(times) != 1:
+        names = np.repeat(names, len(times))
+    elif len(times) == 1 and len(names) != 1:
+        times = np.repeat(times, len(names))
+    if len(names) != len(times):
+        raise ValueError("symbols and ts must have the same length (or one of them a single value)")
+    return names, times
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+#Columnar feature batches.
+
+#A FeatureFrame holds many feature vectors as one (rows x features) float64
+#matrix plus symbol and timestamp columns, with a single interned
+#FeatureSchema (agents/records.py) naming the columns. Models read `values`
+#directly instead of rebuilding a matrix from per-vector dicts.
+
+#Conversions are zero-copy where possible: to_feature_vectors() returns
+#FeatureVectors whose `features` are FeatureRow views onto the frame's rows,
+#and from_feature_vectors() on such vectors returns the frame (or a slice of
+#it) they came from without touching the values.
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, MutableMapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .interfaces import FeatureVector
+from .records import FeatureRecord, FeatureSchema
+
+
+class FeatureRow(MutableMapping):
+
+    #Dict-like view of one frame row, keyed by feature name.
+
+    #Reads and writes go straight to the frame's matrix. The key set is the
+    #frame's schema: assigning an unknown feature raises KeyError.
+
+
+    __slots__ = ("_frame", "_row")
+
+    def __init__(self, frame: "FeatureFrame", row: int) -> None:
+        self._frame = frame
+        self._row = row
+
+    def __getitem__(self, name: str) -> float:
+        return float(self._frame.values[self._row, self._frame.index_of(name)])
+
+    def __setitem__(self, name: str, value: float) -> None:
+        self._frame.values[self._row, self._frame.index_of(name)] = value
+
+    def __delitem__(self, name: str) -> None:
+        raise TypeError("Features cannot be removed from a FeatureFrame row")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._frame.columns)
+
+    def __len__(self) -> int:
+        return len(self._frame.columns)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._frame.schema
+
+    def __repr__(self) -> str:
+        return f"FeatureRow({dict(self)!r})"
+
+    def to_array(self) -> np.ndarray:
+        #The row as a view into the frame's matrix.
+        return self._frame.values[self._row]
+
+
+@dataclass
+class FeatureFrame:
+
+    #Columnar batch of feature vectors sharing one feature-name schema.
+
+    #columns: feature names (or a FeatureSchema), one per column of `values`;
+    #    frames with the same names share one interned `schema`
+    #values: float64 (rows x len(columns)); missing features are NaN
+    #symbols / ts: per-row symbol (object) and timestamp (datetime64[ns])
+    #meta: optional per-row meta dicts carried over from FeatureVectors
+
+
+    columns: Tuple[str, ...]
+    values: np.ndarray
+    symbols: np.ndarray
+    ts: np.ndarray
+    meta: Optional[List[Optional[Dict[str, Any]]]] = None
+    schema: FeatureSchema = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.schema = FeatureSchema.of(self.columns)
+        self.columns = self.schema.names
+        self.values = np.asarray(self.values, dtype="float64")
+        if self.values.ndim != 2 or self.values.shape[1] != len(self.columns):
+            raise ValueError(f"values must be (rows, {len(self.columns)}), got {self.values.shape}")
+        self.symbols = np.asarray(self.symbols, dtype=object)
+        self.ts = np.asarray(self.ts, dtype="datetime64[ns]")
+        if not len(self.symbols) == len(self.ts) == len(self.values):
+            raise ValueError("symbols, ts and values must have the same number of rows")
+        if self.meta is not None and len(self.meta) != len(self.values):
+            raise ValueError("meta must have one entry per row")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.values.shape
+
+    def index_of(self, name: str) -> int:
+        return self.schema.index_of(name)
+
+    def column(self, name: str) -> np.ndarray:
+        #One feature across all rows (a view).
+        return self.values[:, self.index_of(name)]
+
+    def row(self, i: int) -> FeatureRow:
+        return FeatureRow(self, i)
+
+    def __getitem__(self, rows: Any) -> "FeatureFrame":
+        #Row subset: slices give views, index arrays / masks give copies.
+        if isinstance(rows, (int, np.integer)):
+            rows = slice(rows, rows + 1 or None)
+        meta = None
+        if self.meta is not None:
+            meta = self.meta[rows] if isinstance(rows, slice) else [self.meta[i] for i in np.arange(len(self))[rows]]
+        return FeatureFrame(self.columns, self.values[rows], self.symbols[rows], self.ts[rows], meta)
+
+    def select(self, columns: Sequence[str]) -> "FeatureFrame":
+        #Frame restricted to (and reordered as) `columns`; unknown names are NaN.
+        positions = np.array([self.schema._positions.get(name, -1) for name in columns], dtype=np.int64)
+        known = positions >= 0
+        values = np.full((len(self), len(columns)), np.nan)
+        values[:, known] = self.values[:, positions[known]]
+        return FeatureFrame(tuple(columns), values, self.symbols, self.ts, self.meta)
+
+    # -- Conversions ------------------------------------------------------------
+
+    def to_feature_vectors(self) -> List[FeatureVector]:
+        #FeatureVectors whose `features` are FeatureRow views of this frame.
+        meta = self.meta or [None] * len(self)
+        return [
+            FeatureVector(
+                symbol=self.symbols[i],
+                ts=pd.Timestamp(self.ts[i]).to_pydatetime(),
+                features=FeatureRow(self, i),
+                meta=meta[i],
+            )
+            for i in range(len(self))
+        ]
+
+    @classmethod
+    def from_feature_vectors(
+        cls, vectors: Sequence[FeatureVector], columns: Optional[Sequence[str]] = None
+    ) -> "FeatureFrame":
+
+        #Build a frame from FeatureVectors.
+
+        #Vectors that are consecutive rows of one frame (as returned by
+        #to_feature_vectors) come back as a slice of that frame without copying.
+        #Otherwise `columns` defaults to the union of feature names in
+        #first-seen order and absent features are NaN.
+
+        shared = _shared_frame(vectors)
+        if shared is not None and (columns is None or tuple(columns) == shared[0].columns):
+            frame, lo = shared
+            return frame[lo : lo + len(vectors)]
+
+        if columns is None:
+            seen: Dict[str, None] = {}
+            for vector in vectors:
+                seen.update(dict.fromkeys(vector.features))
+            columns = tuple(seen)
+        columns = tuple(columns)
+        positions = {name: i for i, name in enumerate(columns)}
+        values = np.full((len(vectors), len(columns)), np.nan)
+        for i, vector in enumerate(vectors):
+            for name, value in vector.features.items():
+                j = positions.get(name)
+                if j is not None:
+                    values[i, j] = value
+        return cls(
+            columns,
+            values,
+            np.array([vector.symbol for vector in vectors], dtype=object),
+            to_datetime64([vector.ts for vector in vectors]),
+            [vector.meta for vector in vectors] if any(vector.meta for vector in vectors) else None,
+        )
+
+    @classmethod
+    def from_records(cls, records: Sequence[FeatureRecord]) -> "FeatureFrame":
+        #Build a frame from FeatureRecords; records sharing one schema are stacked directly.
+        schemas = {id(record.schema): record.schema for record in records}
+        if len(schemas) != 1:
+            return cls.from_feature_vectors([record.to_vector() for record in records])
+        (schema,) = schemas.values()
+        return cls(
+            schema,
+            np.stack([record.values for record in records]),
+            np.array([record.symbol for record in records], dtype=object),
+            to_datetime64([record.ts for record in records]),
+            [record.meta for record in records] if any(record.meta for record in records) else None,
+        )
+
+    def to_records(self) -> List[FeatureRecord]:
+        #One FeatureRecord per row, all sharing this frame's schema.
+        values = self.values.copy()
+        values.flags.writeable = False
+        meta = self.meta or [None] * len(self)
+        return [
+            FeatureRecord(self.symbols[i], pd.Timestamp(self.ts[i]).to_pydatetime(), self.schema, values[i], meta[i])
+            for i in range(len(self))
+        ]
+
+    @classmethod
+    def concat(cls, frames: Sequence["FeatureFrame"]) -> "FeatureFrame":
+        #Stack frames row-wise; columns are the union in first-seen order.
+        columns = tuple(dict.fromkeys(name for frame in frames for name in frame.columns))
+        aligned = [frame if frame.columns == columns else frame.select(columns) for frame in frames]
+        meta = None
+        if any(frame.meta is not None for frame in aligned):
+            meta = [m for frame in aligned for m in (frame.meta or [None] * len(frame))]
+        return cls(
+            columns,
+            np.concatenate([frame.values for frame in aligned]) if aligned else np.empty((0, 0)),
+            np.concatenate([frame.symbols for frame in aligned]) if aligned else np.empty(0, dtype=object),
+            np.concatenate([frame.ts for frame in aligned]) if aligned else np.empty(0, dtype="datetime64[ns]"),
+            meta,
+        )
+
+    def to_pandas(self) -> pd.DataFrame:
+        #Features as a DataFrame indexed by (symbol, ts); values are not copied.
+        index = pd.MultiIndex.from_arrays([self.symbols, pd.DatetimeIndex(self.ts)], names=["symbol", "ts"])
+        return pd.DataFrame(self.values, index=index, columns=list(self.columns), copy=False)
+
+    @classmethod
+    def from_pandas(cls, df: pd.DataFrame, symbol: Optional[str] = None) -> "FeatureFrame":
+
+        #Frame from a DataFrame indexed by (symbol, ts), or by ts with `symbol`.
+
+        #Feature columns must be numeric; e.g. the agents' backfill_features
+        #output with symbol="AAPL".
+
+        if isinstance(df.index, pd.MultiIndex):
+            symbols = df.index.get_level_values(0).to_numpy(dtype=object)
+            ts = df.index.get_level_values(1)
+        else:
+            if symbol is None:
+                raise ValueError("symbol is required for a frame indexed by timestamp only")
+            symbols = np.full(len(df), symbol, dtype=object)
+            ts = df.index
+        return cls(tuple(map(str, df.columns)), df.to_numpy(dtype="float64"), symbols, to_datetime64(ts))
+
+
+def _shared_frame(vectors: Sequence[FeatureVector]) -> Optional[Tuple[FeatureFrame, int]]:
+    # (frame, first row) if the vectors are consecutive rows of a single frame.
+    if not vectors:
+        return None
+    first = vectors[0].features
+    if not isinstance(first, FeatureRow):
+        return None
+    frame, lo = first._frame, first._row
+    for offset, vector in enumerate(vectors):
+        row = vector.features
+        if not isinstance(row, FeatureRow) or row._frame is not frame or row._row != lo + offset:
+            return None
+    return frame, lo
+
+
+def to_datetime64(values: Iterable[Any]) -> np.ndarray:
+    # Naive UTC datetime64[ns], the convention used by the price layer.
+    index = pd.DatetimeIndex(pd.to_datetime(list(values) if not isinstance(values, pd.Index) else values, utc=True))
+    return index.tz_localize(None).to_numpy(dtype="datetime64[ns]")
@@ -7,13 +7,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Sequence
+from typing import Dict, List, Optional, Sequence
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
 
 from .interfaces import Event, FeatureVector, HistoricalPerformanceAgent
+from .kernels import PanelPrefixSumKernel, PrefixSumKernel
+from .price_service import PriceService, default_price_service
 
 
 def _ensure_datetime(value: datetime | str) -> datetime:
@@ -22,11 +23,25 @@ def _ensure_datetime(value: datetime | str) -> datetime:
     return datetime.fromisoformat(value)
 
 
-def _compute_drawdown(returns: pd.Series) -> float:
-    cumulative = (1 + returns).cumprod()
-    peak = cumulative.cummax()
-    drawdown = (cumulative - peak) / peak
-    return float(drawdown.min())
+def _horizon_offset(horizon: str) -> timedelta | None:
+    #Length of a horizon window ending at as_of (None for "all" and unknown horizons).
+    if horizon.endswith("m"):
+        return timedelta(days=30 * int(horizon[:-1]))
+    if horizon.endswith("w"):
+        return timedelta(weeks=int(horizon[:-1]))
+    if horizon.endswith("d"):
+        return timedelta(days=int(horizon[:-1]))
+    return None
+
+
+# Feature-name suffix for each kernel statistic, e.g. "12m_sharpe".
+_FEATURE_SUFFIXES = {
+    "cumulative_return": "cumulative_return",
+    "annualized_volatility": "annualized_vol",
+    "max_drawdown": "max_drawdown",
+    "sharpe_ratio": "sharpe",
+    "trend_slope": "trend_slope",
+}
 
 
 @dataclass
@@ -44,10 +59,11 @@ class YFinanceHistoricalPerformanceAgent(HistoricalPerformanceAgent):
 
     min_history_days: int = 365 * 5
     cache_days: int = 5
+    price_service: Optional[PriceService] = None
 
     def __post_init__(self) -> None:
-        self._price_cache: Dict[str, pd.DataFrame] = {}
-        self._cache_ts: Dict[str, datetime] = {}
+        if self.price_service is None:
+            self.price_service = default_price_service()
 
     # -- HistoricalPerformanceAgent interface ----------------------------------
 
@@ -68,301 +84,154 @@ class YFinanceHistoricalPerformanceAgent(HistoricalPerformanceAgent):
         if price_df.empty:
             return []
 
-        outputs: List[FeatureVector] = []
+        # One set of prefix sums serves every horizon: each window is [cutoff, last row].
+        kernel = PrefixSumKernel(price_df["Close"].to_numpy())
+        index = price_df.index.to_numpy()
+        selected = []
         for horizon in horizons:
-            window = self._select_window(price_df, as_of, horizon)
-            if window is None or len(window) < 3:
+            offset = _horizon_offset(horizon)
+            if horizon == "all":
+                start = 0
+            elif offset is not None:
+                start = int(np.searchsorted(index, np.datetime64(as_of - offset), side="left"))
+            else:
                 continue
+            if len(kernel) - start >= 3:
+                selected.append((horizon, start))
+        if not selected:
+            return []
 
-            stats = self._compute_window_features(window)
-            features = {
-                f"{horizon}_cumulative_return": stats["cumulative_return"],
-                f"{horizon}_annualized_vol": stats["annualized_volatility"],
-                f"{horizon}_max_drawdown": stats["max_drawdown"],
-                f"{horizon}_sharpe": stats["sharpe_ratio"],
-                f"{horizon}_trend_slope": stats["trend_slope"],
-            }
+        stats = kernel.window_stats(np.array([start for _, start in selected]))
+        outputs: List[FeatureVector] = []
+        for i, (horizon, start) in enumerate(selected):
+            features = {f"{horizon}_{suffix}": float(stats[name][i]) for name, suffix in _FEATURE_SUFFIXES.items()}
             outputs.append(
-                FeatureVector(symbol=symbol, ts=as_of, features=features, meta={"horizon": horizon, "rows": len(window)})
+                FeatureVector(
+                    symbol=symbol, ts=as_of, features=features, meta={"horizon": horizon, "rows": len(kernel) - start}
+                )
             )
 
         return outputs
 
-    # -- Helpers ----------------------------------------------------------------
-
-    def _get_price_history(self, symbol: str, as_of: datetime) -> pd.DataFrame:
-        key = symbol.upper()
-        cached_df = self._price_cache.get(key)
-        cache_ts = self._cache_ts.get(key)
-        if cached_df is not None and cache_ts is not None and (as_of - cache_ts).days < self.cache_days:
-            return cached_df[cached_df.index <= as_of]
-
-        start = as_of - timedelta(days=self.min_history_days)
-        data = yf.download(
-            symbol,
-            start=start.strftime("%Y-%m-%d"),
-            end=(as_of + timedelta(days=1)).strftime("%Y-%m-%d"),
-            progress=False,
-            auto_adjust=True,
-        )
-        if data.empty:
-            return pd.DataFrame()
-
-        df = data[["Close"]].copy()
-        df.index = pd.to_datetime(df.index)
-        df = df.sort_index()
-
-        self._price_cache[key] = df
-        self._cache_ts[key] = as_of
-        return df[df.index <= as_of]
-
-    def _select_window(self, price_df: pd.DataFrame, as_of: datetime, horizon: str) -> pd.Series | None:
-        if horizon == "all":
-            window = price_df["Close"]
-        elif horizon.endswith("m"):
-            months = int(horizon[:-1])
-            cutoff = as_of - timedelta(days=30 * months)
-            window = price_df.loc[price_df.index >= cutoff, "Close"]
-        elif horizon.endswith("w"):
-            weeks = int(horizon[:-1])
-            cutoff = as_of - timedelta(weeks=weeks)
-            window = price_df.loc[price_df.index >= cutoff, "Close"]
-        elif horizon.endswith("d"):
-            days = int(horizon[:-1])
-            cutoff = as_of - timedelta(days=days)
-            window = price_df.loc[price_df.index >= cutoff, "Close"]
-        else:
-            return None
-
-        return window if len(window) else None
-
-    def _compute_window_features(self, prices: pd.Series) -> Dict[str, float]:
-        returns = prices.pct_change().dropna()
-        if returns.empty:
-            return dict.fromkeys(
-                ["cumulative_return", "annualized_volatility", "max_drawdown", "sharpe_ratio", "trend_slope"], 0.0
-            )
-
-        cumulative = float((prices.iloc[-1] / prices.iloc[0]) - 1)
-        vol = float(returns.std() * np.sqrt(252))
-        max_dd = _compute_drawdown(returns)
-        sharpe = float((returns.mean() * 252) / (returns.std() * np.sqrt(252))) if returns.std() > 0 else 0.0
-
-        log_prices = np.log(prices)
-        x = np.arange(len(log_prices))
-        slope = np.polyfit(x, log_prices, 1)[0]
-
-        return {
-            "cumulative_return": cumulative,
-            "annualized_volatility": vol,
-            "max_drawdown": max_dd,
-            "sharpe_ratio": sharpe,
-            "trend_slope": float(slope),
-        }
-
-
-#Historical performance agent implementation for Hermes.
-
-#This provides a concrete HistoricalPerformanceAgent that uses yfinance
-#to pull price history and compute rolling performance features
-#(returns, volatility, drawdown, etc.) over multiple horizons.
-
-
-from __future__ import annotations
-
-from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Dict, List, Sequence
-
-import numpy as np
-import pandas as pd
-import yfinance as yf
-
-from .interfaces import Event, FeatureVector, HistoricalPerformanceAgent
-
-
-# ---------------------------------------------------------------------------
-# Helper utilities
-# ---------------------------------------------------------------------------
-
-
-def _ensure_datetime(value: datetime | str) -> datetime:
-    if isinstance(value, datetime):
-        return value
-    return datetime.fromisoformat(value)
-
-
-def _compute_drawdown(series: pd.Series) -> float:
-    
-    #Compute max drawdown for a price/return series.
-    
-    cumulative = (1 + series).cumprod()
-    peak = cumulative.cummax()
-    drawdown = (cumulative - peak) / peak
-    return drawdown.min()
-
-
-# ---------------------------------------------------------------------------
-# Concrete HistoricalPerformanceAgent
-# ---------------------------------------------------------------------------
-
-
-@dataclass
-class YFinanceHistoricalPerformanceAgent(HistoricalPerformanceAgent):
-    
-    #Historical performance agent based on yfinance price data.
-
-    #Features computed per horizon (all/12m/4w/7d/24h):
-    #    - cumulative_return
-    #    - annualized_volatility
-    #    - max_drawdown
-    #    - sharpe_ratio (using simple std dev)
-    #    - trend_slope (linear regression on log prices)
-    
-
-    min_history_days: int = 365 * 5  # required history for "all-time"
-    cache_days: int = 5              # refresh cache every N days
+    def compute_panel_features(
+        self,
+        symbols: Sequence[str],
+        as_of: datetime,
+        horizons: Sequence[str] = ("all", "12m", "4w", "7d", "24h"),
+    ) -> Dict[str, List[FeatureVector]]:
 
-    def __post_init__(self) -> None:
-        self._price_cache: Dict[str, pd.DataFrame] = {}
-        self._cache_ts: Dict[str, datetime] = {}
+        #compute_features for a whole watchlist in one vectorized pass.
 
-    # --- HistoricalPerformanceAgent overrides ---------------------------------
+        #Closes are aligned into a dates x symbols matrix (NaN where a symbol has
+        #no bar, e.g. equities on weekends next to BTC-USD) and every horizon is
+        #evaluated column-wise. Returns {symbol: [FeatureVector, ...]} with the
+        #same contents compute_features would produce per symbol.
 
-    def handle_event(self, event: Event) -> None:
-        # This agent does not consume real-time events;
-        # data fetching happens on-demand in compute_features().
-        return
-
-    def tick(self, as_of: datetime) -> None:
-        # Nothing periodic; cache invalidation handled in compute_features().
-        return
+        as_of = _ensure_datetime(as_of)
+        outputs: Dict[str, List[FeatureVector]] = {symbol: [] for symbol in symbols}
+        self.prefetch(symbols, as_of)
+        closes = {}
+        for symbol in symbols:
+            price_df = self._get_price_history(symbol, as_of)
+            if not price_df.empty:
+                closes[symbol] = price_df["Close"]
+        if not closes:
+            return outputs
+
+        panel = pd.concat(closes, axis=1).sort_index()
+        kernel = PanelPrefixSumKernel(panel.to_numpy(dtype="float64"))
+        index = panel.index.to_numpy()
+        selected = []
+        for horizon in horizons:
+            offset = _horizon_offset(horizon)
+            if horizon == "all":
+                selected.append((horizon, 0))
+            elif offset is not None:
+                selected.append((horizon, int(np.searchsorted(index, np.datetime64(as_of - offset), side="left"))))
+        if not selected:
+            return outputs
+
+        stats = kernel.window_stats(np.array([start for _, start in selected]))
+        for i, (horizon, _) in enumerate(selected):
+            for j, symbol in enumerate(panel.columns):
+                rows = int(stats["rows"][i, j])
+                if rows < 3:
+                    continue
+                features = {
+                    f"{horizon}_{suffix}": float(stats[name][i, j]) for name, suffix in _FEATURE_SUFFIXES.items()
+                }
+                outputs[symbol].append(
+                    FeatureVector(symbol=symbol, ts=as_of, features=features, meta={"horizon": horizon, "rows": rows})
+                )
+        return outputs
 
-    def compute_features(
+    def backfill_features(
         self,
         symbol: str,
-        as_of: datetime,
+        start: datetime,
+        end: datetime,
         horizons: Sequence[str] = ("all", "12m", "4w", "7d", "24h"),
-    ) -> List[FeatureVector]:
-        as_of = _ensure_datetime(as_of)
-        price_df = self._get_price_history(symbol, as_of)
+    ) -> pd.DataFrame:
+
+        #Point-in-time feature matrix: one row per trading date in [start, end].
+
+        #Row t equals compute_features(symbol, t) flattened into columns: every
+        #window ends at t and only uses bars at or before t (no look-ahead).
+        #Horizons with fewer than 3 bars at t are NaN. All dates and horizons
+        #are evaluated with vectorized prefix-sum lookups rather than a loop of
+        #compute_features calls.
+
+        start, end = _ensure_datetime(start), _ensure_datetime(end)
+        lookback = timedelta(days=self.min_history_days)
+        price_df = self.get_price_range(symbol, start - lookback, end)
+        offsets = {h: lookback if h == "all" else _horizon_offset(h) for h in horizons}
+        offsets = {h: offset for h, offset in offsets.items() if offset is not None}
+        columns = [f"{h}_{suffix}" for h in offsets for suffix in _FEATURE_SUFFIXES.values()]
         if price_df.empty:
-            return []
+            return pd.DataFrame(columns=columns, dtype="float64")
 
-        outputs: List[FeatureVector] = []
-        for horizon in horizons:
-            window = self._select_window(price_df, as_of, horizon)
-            if window is None or len(window) < 3:
-                continue
+        index = price_df.index.to_numpy()
+        kernel = PrefixSumKernel(price_df["Close"].to_numpy())
+        ends = np.flatnonzero((index >= np.datetime64(start)) & (index <= np.datetime64(end)))
+        dates = price_df.index[ends]
 
-            feature_dict = self._compute_window_features(window)
-            outputs.append(
-                FeatureVector(
-                    symbol=symbol,
-                    ts=as_of,
-                    features={
-                        f"{horizon}_cumulative_return": feature_dict["cumulative_return"],
-                        f"{horizon}_annualized_vol": feature_dict["annualized_volatility"],
-                        f"{horizon}_max_drawdown": feature_dict["max_drawdown"],
-                        f"{horizon}_sharpe": feature_dict["sharpe_ratio"],
-                        f"{horizon}_trend_slope": feature_dict["trend_slope"],
-                    },
-                    meta={"horizon": horizon, "rows": len(window)},
-                )
-            )
+        matrix = {}
+        for horizon, offset in offsets.items():
+            starts = np.searchsorted(index, (dates - offset).to_numpy(), side="left")
+            stats = kernel.window_stats(starts, ends)
+            too_short = (ends - starts + 1) < 3
+            for name, suffix in _FEATURE_SUFFIXES.items():
+                matrix[f"{horizon}_{suffix}"] = np.where(too_short, np.nan, stats[name])
 
-        return outputs
+        return pd.DataFrame(matrix, index=dates, columns=columns)
 
-    # --- Internal helpers ------------------------------------------------------
+    def prefetch(self, symbols: Sequence[str], as_of: datetime) -> None:
+        #Warm the shared price service for `symbols` with one batched download.
+        as_of = _ensure_datetime(as_of)
+        self.price_service.prefetch(
+            symbols,
+            self._history_start(as_of),
+            as_of,
+            tolerance=timedelta(days=self.cache_days),
+            backfill=timedelta(days=self.min_history_days),
+        )
 
-    def _get_price_history(self, symbol: str, as_of: datetime) -> pd.DataFrame:
-        
-        #Fetch price history up to `as_of`, with caching.
-        
-        cache_key = symbol.upper()
-        if (
-            cache_key in self._price_cache
-            and cache_key in self._cache_ts
-            and (as_of - self._cache_ts[cache_key]).days < self.cache_days
-        ):
-            df = self._price_cache[cache_key]
-            return df[df.index <= as_of]
-
-        period_start = as_of - timedelta(days=self.min_history_days)
-        data = yf.download(
+    def get_price_range(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        #Daily bars in [start, end] from the shared price service, with this agent's cache settings.
+        return self.price_service.get_history(
             symbol,
-            start=period_start.strftime("%Y-%m-%d"),
-            end=(as_of + timedelta(days=1)).strftime("%Y-%m-%d"),
-            progress=False,
-            auto_adjust=True,
+            start,
+            end,
+            tolerance=timedelta(days=self.cache_days),
+            backfill=timedelta(days=self.min_history_days),
         )
-        if data.empty:
-            return pd.DataFrame()
-
-        df = data[["Close"]].copy()
-        df.index = pd.to_datetime(df.index)
-        df = df.sort_index()
-
-        # Cache results
-        self._price_cache[cache_key] = df
-        self._cache_ts[cache_key] = as_of
-        return df[df.index <= as_of]
-
-    def _select_window(
-        self, price_df: pd.DataFrame, as_of: datetime, horizon: str
-    ) -> pd.Series | None:
-        
-        #Slice price history for the requested horizon.
-        
-        if horizon == "all":
-            window = price_df["Close"]
-        elif horizon.endswith("m"):
-            months = int(horizon[:-1])
-            cutoff = as_of - timedelta(days=30 * months)
-            window = price_df.loc[price_df.index >= cutoff, "Close"]
-        elif horizon.endswith("w"):
-            weeks = int(horizon[:-1])
-            cutoff = as_of - timedelta(weeks=weeks)
-            window = price_df.loc[price_df.index >= cutoff, "Close"]
-        elif horizon.endswith("d"):
-            days = int(horizon[:-1])
-            cutoff = as_of - timedelta(days=days)
-            window = price_df.loc[price_df.index >= cutoff, "Close"]
-        else:
-            return None
-
-        return window if len(window) > 0 else None
-
-    def _compute_window_features(self, prices: pd.Series) -> Dict[str, float]:
-        
-        #Compute rolling performance stats for a price window.
-        
-        returns = prices.pct_change().dropna()
-        if returns.empty:
-            return {
-                "cumulative_return": 0.0,
-                "annualized_volatility": 0.0,
-                "max_drawdown": 0.0,
-                "sharpe_ratio": 0.0,
-                "trend_slope": 0.0,
-            }
-
-        cumulative_return = float((prices.iloc[-1] / prices.iloc[0]) - 1)
-        vol = float(returns.std() * np.sqrt(252))
-        max_drawdown = float(_compute_drawdown(returns))
-        sharpe = float((returns.mean() * 252) / (returns.std() * np.sqrt(252))) if returns.std() > 0 else 0.0
-
-        # Trend slope via linear regression on log prices
-        log_prices = np.log(prices)
-        x = np.arange(len(log_prices))
-        slope = np.polyfit(x, log_prices, 1)[0]
-
-        return {
-            "cumulative_return": cumulative_return,
-            "annualized_volatility": vol,
-            "max_drawdown": max_drawdown,
-            "sharpe_ratio": sharpe,
-            "trend_slope": float(slope),
-        }
 
+    # -- Helpers ----------------------------------------------------------------
 
+    def _get_price_history(self, symbol: str, as_of: datetime) -> pd.DataFrame:
+        return self.get_price_range(symbol, self._history_start(as_of), as_of)
+
+    def _history_start(self, as_of: datetime) -> datetime:
+        # Midnight, so an intraday as_of still includes the first day's daily bar.
+        start = as_of - timedelta(days=self.min_history_days)
+        return start.replace(hour=0, minute=0, second=0, microsecond=0)
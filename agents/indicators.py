@@ -0,0 +1,590 @@
+from __future__ import annotations
+
+#Technical indicators for the technical agent.
+
+#Batch indicators are registered nodes in a small dependency graph. Each node
+#declares the nodes it reads; a request resolves the indicators it wants into
+#a topologically ordered plan, so shared intermediates (20-bar means, close
+#changes, true range, typical price) are computed once per request no matter
+#how many indicators consume them. window_indicators evaluates a plan for many
+#[start, end] row windows of one bar series at once, and is what the agent's
+#point-in-time and backfill paths both run on.
+
+#IncrementalIndicators is the streaming counterpart: O(1) state per symbol
+#updated one bar at a time, so the agent can answer compute_features for a
+#symbol that is being fed price events without recomputing rolling windows:
+#    - Bollinger Bands / VWAP: running sums over the last 20 bars
+#    - RSI / ATR: running sums over the last 14 changes / true ranges (same
+#      simple moving average definition as the batch path)
+#    - MACD: recursive 12/26 EMAs and a 9-bar signal EMA
+#    - Stochastic / support / resistance: monotonic deques
+#    - OBV: running flow total over the lookback window
+#    - Trend strength: running regression sums of the 20-bar MA inside the
+#      lookback window
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .kernels import ols_from_sums
+
+
+BB_WINDOW = 20
+BB_WIDTH = 2.0
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+STOCH_WINDOW, STOCH_SMOOTH = 14, 3
+VWAP_WINDOW = 20
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+SUPPORT_DAYS = 30
+
+# Regression x values are re-based once they drift this far from the origin.
+_REBASE_AFTER = 1_000_000
+
+
+def _ema_alpha(span: int) -> float:
+    return 2.0 / (span + 1.0)
+
+
+# -- Indicator registry ---------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+
+    #One node of the indicator graph.
+
+    #compute(ctx, *inputs) receives the values of `inputs` in order. Nodes with
+    #`outputs` are indicators and return {feature name: array}; nodes without
+    #are intermediates and may return anything.
+
+
+    name: str
+    inputs: Tuple[str, ...]
+    compute: Callable[..., Any]
+    outputs: Tuple[str, ...] = ()
+
+
+INDICATORS: Dict[str, IndicatorSpec] = {}
+
+
+def register_indicator(name: str, inputs: Sequence[str] = (), outputs: Sequence[str] = ()):
+    #Decorator adding a node to INDICATORS.
+    def decorator(compute: Callable[..., Any]) -> Callable[..., Any]:
+        INDICATORS[name] = IndicatorSpec(name, tuple(inputs), compute, tuple(outputs))
+        _plan.cache_clear()
+        return compute
+
+    return decorator
+
+
+@lru_cache(maxsize=None)
+def _plan(names: Tuple[str, ...]) -> Tuple[str, ...]:
+    # Depth-first topological order of every node `names` depends on.
+    order: List[str] = []
+    visiting: set = set()
+
+    def visit(name: str) -> None:
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"Indicator dependency cycle through {name!r}")
+        if name not in INDICATORS:
+            raise KeyError(f"Unknown indicator {name!r}")
+        visiting.add(name)
+        for dependency in INDICATORS[name].inputs:
+            visit(dependency)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return tuple(order)
+
+
+def feature_names(indicators: Sequence[str]) -> Tuple[str, ...]:
+    #Feature columns produced by `indicators`, in request order.
+    return tuple(output for name in indicators for output in INDICATORS[name].outputs)
+
+
+class _WindowContext:
+    #Bar arrays and the row windows a plan is evaluated for.
+
+    def __init__(self, bars: Mapping[str, np.ndarray], dates: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> None:
+        self.close = np.asarray(bars["Close"], dtype="float64")
+        self.n = len(self.close)
+        self.high = np.asarray(bars["High"] if "High" in bars else self.close, dtype="float64")
+        self.low = np.asarray(bars["Low"] if "Low" in bars else self.close, dtype="float64")
+        self.volume = np.asarray(bars["Volume"] if "Volume" in bars else np.zeros(self.n), dtype="float64")
+        self.dates = np.asarray(dates)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.lengths = self.ends - self.starts + 1
+
+    def nan(self) -> np.ndarray:
+        return np.full(len(self.ends), np.nan)
+
+
+# Intermediates. Per-bar series are computed over the whole bar array, so a
+# value at bar p never depends on which window reads it.
+
+
+@register_indicator("ma20")
+def _ma20(ctx: _WindowContext) -> Optional[np.ndarray]:
+    # ma20[j] is the mean of closes[j : j + 20].
+    if ctx.n < BB_WINDOW:
+        return None
+    return sliding_window_view(ctx.close, BB_WINDOW).mean(axis=1)
+
+
+@register_indicator("changes")
+def _changes(ctx: _WindowContext) -> np.ndarray:
+    # changes[p - 1] is close[p] - close[p - 1].
+    return np.diff(ctx.close)
+
+
+@register_indicator("true_range")
+def _true_range(ctx: _WindowContext) -> np.ndarray:
+    # true_range[p - 1] is the true range of bar p.
+    prev = ctx.close[:-1]
+    high, low = ctx.high[1:], ctx.low[1:]
+    return np.maximum(high - low, np.maximum(np.abs(high - prev), np.abs(low - prev)))
+
+
+@register_indicator("typical_price")
+def _typical_price(ctx: _WindowContext) -> np.ndarray:
+    return (ctx.high + ctx.low + ctx.close) / 3
+
+
+# Indicators.
+
+
+@register_indicator("bollinger", inputs=("ma20",), outputs=("bb_upper", "bb_lower", "bb_pct"))
+def _bollinger(ctx: _WindowContext, ma: Optional[np.ndarray]) -> Dict[str, np.ndarray]:
+    if ma is None:
+        return {"bb_upper": ctx.nan(), "bb_lower": ctx.nan(), "bb_pct": ctx.nan()}
+    has_bb = ctx.lengths >= BB_WINDOW
+    rows = np.where(has_bb, ctx.ends - (BB_WINDOW - 1), 0)
+    mean = ma[rows]
+    std = sliding_window_view(ctx.close, BB_WINDOW)[rows].std(axis=1, ddof=1)
+    upper, lower = mean + BB_WIDTH * std, mean - BB_WIDTH * std
+    pct = np.where(upper != lower, (ctx.close[ctx.ends] - lower) / (upper - lower), np.nan)
+    return {
+        "bb_upper": np.where(has_bb, upper, np.nan),
+        "bb_lower": np.where(has_bb, lower, np.nan),
+        "bb_pct": np.where(has_bb, pct, np.nan),
+    }
+
+
+@register_indicator("rsi", inputs=("changes",), outputs=("rsi_14",))
+def _rsi(ctx: _WindowContext, changes: np.ndarray) -> Dict[str, np.ndarray]:
+    if ctx.n <= RSI_WINDOW:
+        return {"rsi_14": np.zeros(len(ctx.ends))}
+    has_rsi = ctx.lengths > RSI_WINDOW
+    block = sliding_window_view(changes, RSI_WINDOW)[np.where(has_rsi, ctx.ends - RSI_WINDOW, 0)]
+    rs = np.clip(block, 0, None).mean(axis=1) / np.clip(-block, 0, None).mean(axis=1)
+    return {"rsi_14": np.where(has_rsi & (rs > 0), 100 - (100 / (1 + rs)), 0.0)}
+
+
+@register_indicator("macd", outputs=("macd", "macd_signal", "macd_hist"))
+def _macd(ctx: _WindowContext) -> Dict[str, np.ndarray]:
+    # EMAs restart at each window start and are stepped one offset at a time
+    # for all windows together.
+    a_fast, a_slow, a_signal = _ema_alpha(MACD_FAST), _ema_alpha(MACD_SLOW), _ema_alpha(MACD_SIGNAL)
+    ema_fast = ctx.close[ctx.starts].copy()
+    ema_slow = ema_fast.copy()
+    signal = ema_fast - ema_slow
+    for offset in range(1, int(ctx.lengths.max())):
+        live = offset < ctx.lengths
+        x = ctx.close[np.where(live, ctx.starts + offset, ctx.starts)]
+        ema_fast = np.where(live, a_fast * x + (1 - a_fast) * ema_fast, ema_fast)
+        ema_slow = np.where(live, a_slow * x + (1 - a_slow) * ema_slow, ema_slow)
+        signal = np.where(live, a_signal * (ema_fast - ema_slow) + (1 - a_signal) * signal, signal)
+    macd = ema_fast - ema_slow
+    return {"macd": macd, "macd_signal": signal, "macd_hist": macd - signal}
+
+
+@register_indicator("support_resistance", outputs=("recent_support", "recent_resistance"))
+def _support_resistance(ctx: _WindowContext) -> Dict[str, np.ndarray]:
+    # Closes after (last bar - N days), N = min(30, rows in the window).
+    days = np.minimum(SUPPORT_DAYS, ctx.lengths).astype("timedelta64[D]")
+    first = np.maximum(ctx.starts, np.searchsorted(ctx.dates, ctx.dates[ctx.ends] - days, side="right"))
+    support, resistance = ctx.close[ctx.ends].copy(), ctx.close[ctx.ends].copy()
+    for offset in range(int((ctx.ends - first).max())):
+        rows = np.minimum(first + offset, ctx.ends)
+        support = np.minimum(support, ctx.close[rows])
+        resistance = np.maximum(resistance, ctx.close[rows])
+    return {"recent_support": support, "recent_resistance": resistance}
+
+
+@register_indicator("trend", inputs=("ma20",), outputs=("trend_strength",))
+def _trend(ctx: _WindowContext, ma: Optional[np.ndarray]) -> Dict[str, np.ndarray]:
+    # OLS slope of the window's 20-bar means against 0..m-1.
+    if ma is None:
+        return {"trend_strength": np.zeros(len(ctx.ends))}
+    count = np.maximum(ctx.lengths - (BB_WINDOW - 1), 0)
+    sum_y = np.zeros(len(ctx.ends))
+    sum_xy = np.zeros(len(ctx.ends))
+    for offset in range(int(count.max())):
+        live = offset < count
+        y = ma[np.where(live, ctx.starts + offset, 0)]
+        sum_y = np.where(live, sum_y + y, sum_y)
+        sum_xy = np.where(live, sum_xy + offset * y, sum_xy)
+    # The sums are accumulated per window (not from prefix sums) so a window's
+    # value does not depend on where the bar array starts.
+    m = count.astype("float64")
+    slope = ols_from_sums(m, m * (m - 1) / 2, sum_y, (m - 1) * m * (2 * m - 1) / 6, sum_xy)["slope"]
+    return {"trend_strength": np.where(count >= 2, slope, 0.0)}
+
+
+@register_indicator("atr", inputs=("true_range",), outputs=("atr_14",))
+def _atr(ctx: _WindowContext, true_range: np.ndarray) -> Dict[str, np.ndarray]:
+    # Mean true range of the last 14 bars that have a previous close in the window.
+    if ctx.n <= ATR_WINDOW:
+        return {"atr_14": ctx.nan()}
+    has_atr = ctx.lengths > ATR_WINDOW
+    block = sliding_window_view(true_range, ATR_WINDOW)[np.where(has_atr, ctx.ends - ATR_WINDOW, 0)]
+    return {"atr_14": np.where(has_atr, block.mean(axis=1), np.nan)}
+
+
+@register_indicator("stochastic", outputs=("stoch_k", "stoch_d"))
+def _stochastic(ctx: _WindowContext) -> Dict[str, np.ndarray]:
+    # %K(14) against the 14-bar low/high range, %D its 3-bar mean.
+    if ctx.n < STOCH_WINDOW + STOCH_SMOOTH - 1:
+        return {"stoch_k": ctx.nan(), "stoch_d": ctx.nan()}
+    lowest = sliding_window_view(ctx.low, STOCH_WINDOW).min(axis=1)
+    highest = sliding_window_view(ctx.high, STOCH_WINDOW).max(axis=1)
+    k = 100 * (ctx.close[STOCH_WINDOW - 1 :] - lowest) / (highest - lowest)
+    has_k = ctx.lengths >= STOCH_WINDOW
+    has_d = ctx.lengths >= STOCH_WINDOW + STOCH_SMOOTH - 1
+    rows = np.where(has_d, ctx.ends - (STOCH_WINDOW - 1), STOCH_SMOOTH - 1)
+    d = sum(k[rows - lag] for lag in range(STOCH_SMOOTH)) / STOCH_SMOOTH
+    return {
+        "stoch_k": np.where(has_k, k[np.where(has_k, ctx.ends - (STOCH_WINDOW - 1), 0)], np.nan),
+        "stoch_d": np.where(has_d, d, np.nan),
+    }
+
+
+@register_indicator("obv", inputs=("changes",), outputs=("obv",))
+def _obv(ctx: _WindowContext, changes: np.ndarray) -> Dict[str, np.ndarray]:
+    # On-balance volume accumulated from each window's first bar.
+    flow = np.sign(changes) * ctx.volume[1:]
+    obv = np.zeros(len(ctx.ends))
+    for offset in range(1, int(ctx.lengths.max())):
+        live = offset < ctx.lengths
+        obv = np.where(live, obv + flow[np.where(live, ctx.starts + offset - 1, 0)], obv)
+    return {"obv": obv}
+
+
+@register_indicator("vwap", inputs=("typical_price",), outputs=("vwap_20",))
+def _vwap(ctx: _WindowContext, typical_price: np.ndarray) -> Dict[str, np.ndarray]:
+    # Volume-weighted typical price over the last 20 bars.
+    if ctx.n < VWAP_WINDOW:
+        return {"vwap_20": ctx.nan()}
+    has_vwap = ctx.lengths >= VWAP_WINDOW
+    rows = np.where(has_vwap, ctx.ends - (VWAP_WINDOW - 1), 0)
+    value = sliding_window_view(typical_price * ctx.volume, VWAP_WINDOW)[rows].sum(axis=1)
+    volume = sliding_window_view(ctx.volume, VWAP_WINDOW)[rows].sum(axis=1)
+    return {"vwap_20": np.where(has_vwap & (volume > 0), value / volume, np.nan)}
+
+
+# The agent's original feature set; the others are opt-in via `indicators`.
+DEFAULT_INDICATORS: Tuple[str, ...] = (
+    "bollinger",
+    "rsi",
+    "macd",
+    "support_resistance",
+    "trend",
+)
+EXTRA_INDICATORS: Tuple[str, ...] = ("atr", "stochastic", "obv", "vwap")
+ALL_INDICATORS: Tuple[str, ...] = DEFAULT_INDICATORS + EXTRA_INDICATORS
+
+FEATURE_NAMES = feature_names(DEFAULT_INDICATORS)
+
+
+def window_indicators(
+    bars: Mapping[str, np.ndarray],
+    dates: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    indicators: Sequence[str] = DEFAULT_INDICATORS,
+) -> Dict[str, np.ndarray]:
+
+    #Indicator values for the inclusive row windows [starts[i], ends[i]].
+
+    #`bars` maps "Close" (and optionally "High", "Low", "Volume") to arrays
+    #aligned with `dates`. Each window is treated as the full history the agent
+    #would see at dates[ends[i]]: EMAs and OBV restart at the window start and
+    #the trend regression only uses 20-bar means lying inside it. Every window
+    #goes through the same floating-point operations whether it is computed
+    #alone or alongside others, so a backfill is bit-identical to point-in-time
+    #calls.
+
+    ctx = _WindowContext(bars, dates, starts, ends)
+    if len(ctx.ends) == 0:
+        return {name: np.full(0, np.nan) for name in feature_names(indicators)}
+
+    values: Dict[str, Any] = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for node in _plan(tuple(indicators)):
+            spec = INDICATORS[node]
+            values[node] = spec.compute(ctx, *(values[dependency] for dependency in spec.inputs))
+
+    return {name: values[indicator][name] for indicator in indicators for name in INDICATORS[indicator].outputs}
+
+
+# -- Streaming state ------------------------------------------------------------
+
+
+class _RollingSum:
+    #Running sum and sum of squares over the last `size` values.
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.values: Deque[float] = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def push(self, value: float) -> None:
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def mean(self) -> float:
+        return self.total / len(self.values)
+
+    def std(self) -> float:
+        n = len(self.values)
+        if n < 2:
+            return float("nan")
+        return float(np.sqrt(max(self.total_sq - self.total * self.total / n, 0.0) / (n - 1)))
+
+
+class _MonotonicWindow:
+    #Min and max over a sliding key range (timestamps or bar numbers) in
+    #amortized O(1) per update.
+
+    def __init__(self) -> None:
+        self._min: Deque[Tuple[Any, float]] = deque()
+        self._max: Deque[Tuple[Any, float]] = deque()
+
+    def push(self, key: Any, value: float) -> None:
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._min.append((key, value))
+        self._max.append((key, value))
+
+    def expire(self, horizon: Any) -> None:
+        # Drop entries with key <= horizon.
+        while self._min and self._min[0][0] <= horizon:
+            self._min.popleft()
+        while self._max and self._max[0][0] <= horizon:
+            self._max.popleft()
+
+    def min(self) -> float:
+        return self._min[0][1] if self._min else float("nan")
+
+    def max(self) -> float:
+        return self._max[0][1] if self._max else float("nan")
+
+
+class _RollingRegression:
+    #Least-squares slope of y on x with add/remove in O(1).
+
+    def __init__(self) -> None:
+        self.origin = 0
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.sxy = 0.0
+
+    def _update(self, x: int, y: float, sign: int) -> None:
+        dx = float(x - self.origin)
+        self.n += sign
+        self.sx += sign * dx
+        self.sy += sign * y
+        self.sxx += sign * dx * dx
+        self.sxy += sign * dx * y
+
+    def add(self, x: int, y: float) -> None:
+        self._update(x, y, 1)
+
+    def remove(self, x: int, y: float) -> None:
+        self._update(x, y, -1)
+
+    def rebase(self, points) -> None:
+        points = list(points)
+        self.origin = points[0][0] if points else 0
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.sxy = 0.0
+        for x, y in points:
+            self.add(x, y)
+
+    def slope(self) -> float:
+        if self.n < 2:
+            return 0.0
+        denom = self.n * self.sxx - self.sx * self.sx
+        return float((self.n * self.sxy - self.sx * self.sy) / denom) if denom else 0.0
+
+
+@dataclass
+class IncrementalIndicators:
+
+    #O(1)-per-bar state for every registered indicator of one symbol.
+
+    #`lookback_days` mirrors YFinanceTechnicalIndicatorAgent.lookback_days: the
+    #trend regression only uses 20-bar MA values of bars inside that window,
+    #skipping the first 19 bars of the window as the batch path does, and OBV
+    #sums the volume flow of the bars inside it, like the batch path. EMAs run
+    #from the first bar seen, so MACD carries a longer history than the batch
+    #path, which restarts it at the start of its lookback window.
+
+
+    lookback_days: int = 90
+    last_ts: Optional[datetime] = None
+    interval: Optional[timedelta] = None
+    bars: int = 0
+    _close: float = field(default=float("nan"), init=False, repr=False)
+    _bb: _RollingSum = field(default_factory=lambda: _RollingSum(BB_WINDOW), init=False, repr=False)
+    _gains: _RollingSum = field(default_factory=lambda: _RollingSum(RSI_WINDOW), init=False, repr=False)
+    _losses: _RollingSum = field(default_factory=lambda: _RollingSum(RSI_WINDOW), init=False, repr=False)
+    _true_range: _RollingSum = field(default_factory=lambda: _RollingSum(ATR_WINDOW), init=False, repr=False)
+    _value: _RollingSum = field(default_factory=lambda: _RollingSum(VWAP_WINDOW), init=False, repr=False)
+    _volume: _RollingSum = field(default_factory=lambda: _RollingSum(VWAP_WINDOW), init=False, repr=False)
+    _ema_fast: Optional[float] = field(default=None, init=False, repr=False)
+    _ema_slow: Optional[float] = field(default=None, init=False, repr=False)
+    _signal: Optional[float] = field(default=None, init=False, repr=False)
+    _flows: Deque[Tuple[datetime, float]] = field(default_factory=deque, init=False, repr=False)
+    _flow_total: float = field(default=0.0, init=False, repr=False)
+    _range: _MonotonicWindow = field(default_factory=_MonotonicWindow, init=False, repr=False)
+    _lows: _MonotonicWindow = field(default_factory=_MonotonicWindow, init=False, repr=False)
+    _highs: _MonotonicWindow = field(default_factory=_MonotonicWindow, init=False, repr=False)
+    _stoch: Deque[float] = field(default_factory=lambda: deque(maxlen=STOCH_SMOOTH), init=False, repr=False)
+    _window: Deque[Tuple[datetime, int, float]] = field(default_factory=deque, init=False, repr=False)
+    _trend: _RollingRegression = field(default_factory=_RollingRegression, init=False, repr=False)
+
+    def update(
+        self,
+        ts: datetime,
+        close: float,
+        high: Optional[float] = None,
+        low: Optional[float] = None,
+        volume: float = 0.0,
+    ) -> bool:
+        #Apply one bar. Bars at or before the last applied bar are ignored.
+        if self.last_ts is not None and ts <= self.last_ts:
+            return False
+        high = close if high is None else high
+        low = close if low is None else low
+
+        flow = 0.0
+        if self.bars:
+            prev = self._close
+            delta = close - prev
+            self._gains.push(max(delta, 0.0))
+            self._losses.push(max(-delta, 0.0))
+            self._true_range.push(max(high - low, abs(high - prev), abs(low - prev)))
+            flow = float(np.sign(delta)) * volume
+        self._flows.append((ts, flow))
+        self._flow_total += flow
+        self._close = close
+        self._bb.push(close)
+        self._value.push((high + low + close) / 3 * volume)
+        self._volume.push(volume)
+
+        a_fast, a_slow, a_signal = _ema_alpha(MACD_FAST), _ema_alpha(MACD_SLOW), _ema_alpha(MACD_SIGNAL)
+        self._ema_fast = close if self._ema_fast is None else a_fast * close + (1 - a_fast) * self._ema_fast
+        self._ema_slow = close if self._ema_slow is None else a_slow * close + (1 - a_slow) * self._ema_slow
+        macd = self._ema_fast - self._ema_slow
+        self._signal = macd if self._signal is None else a_signal * macd + (1 - a_signal) * self._signal
+
+        self._range.push(ts, close)
+        self._range.expire(ts - timedelta(days=SUPPORT_DAYS))
+        self._lows.push(self.bars, low)
+        self._highs.push(self.bars, high)
+        self._lows.expire(self.bars - STOCH_WINDOW)
+        self._highs.expire(self.bars - STOCH_WINDOW)
+        if self.bars >= STOCH_WINDOW - 1:
+            span = self._highs.max() - self._lows.min()
+            self._stoch.append(100 * (close - self._lows.min()) / span if span else np.nan)
+
+        self._update_trend(ts)
+        if self.last_ts is not None:
+            self.interval = ts - self.last_ts
+        self.last_ts = ts
+        self.bars += 1
+        return True
+
+    def _update_trend(self, ts: datetime) -> None:
+        # Window entries are (ts, bar number, 20-bar MA); the regression covers
+        # entries [BB_WINDOW - 1:], i.e. bars whose MA lies fully inside the window.
+        ma = self._bb.mean() if self._bb.full() else float("nan")
+        self._window.append((ts, self.bars, ma))
+        if len(self._window) >= BB_WINDOW:
+            self._trend.add(self.bars, ma)
+
+        horizon = ts - timedelta(days=self.lookback_days)
+        while self._flows and self._flows[0][0] < horizon:
+            self._flow_total -= self._flows.popleft()[1]
+        while self._window and self._window[0][0] < horizon:
+            if len(self._window) >= BB_WINDOW:
+                _, x, y = self._window[BB_WINDOW - 1]
+                self._trend.remove(x, y)
+            self._window.popleft()
+
+        if self.bars - self._trend.origin > _REBASE_AFTER:
+            self._trend.rebase((x, y) for _, x, y in list(self._window)[BB_WINDOW - 1 :])
+
+    def snapshot(self) -> Dict[str, float]:
+        #Current indicator values, keyed like the technical agent's features.
+        features: Dict[str, float] = {}
+        if self._bb.full():
+            mean, std = self._bb.mean(), self._bb.std()
+            upper, lower = mean + BB_WIDTH * std, mean - BB_WIDTH * std
+            features["bb_upper"] = float(upper)
+            features["bb_lower"] = float(lower)
+            features["bb_pct"] = float((self._close - lower) / (upper - lower)) if upper != lower else np.nan
+        else:
+            features["bb_upper"] = features["bb_lower"] = features["bb_pct"] = np.nan
+
+        rsi = 0.0
+        if self._gains.full():
+            up, down = self._gains.mean(), self._losses.mean()
+            rs = up / down if down else (np.inf if up else np.nan)
+            rsi = float(100 - (100 / (1 + rs))) if rs > 0 else 0.0
+        features["rsi_14"] = rsi
+
+        macd = (self._ema_fast - self._ema_slow) if self._ema_fast is not None else np.nan
+        signal = self._signal if self._signal is not None else np.nan
+        features["macd"] = float(macd)
+        features["macd_signal"] = float(signal)
+        features["macd_hist"] = float(macd - signal)
+
+        features["recent_support"] = float(self._range.min())
+        features["recent_resistance"] = float(self._range.max())
+        features["trend_strength"] = self._trend.slope()
+
+        features["atr_14"] = self._true_range.mean() if self._true_range.full() else np.nan
+        features["stoch_k"] = float(self._stoch[-1]) if self._stoch else np.nan
+        features["stoch_d"] = float(sum(self._stoch) / STOCH_SMOOTH) if len(self._stoch) == STOCH_SMOOTH else np.nan
+        # The window's first bar has no previous close inside the window.
+        features["obv"] = self._flow_total - self._flows[0][1] if self._flows else 0.0
+        features["vwap_20"] = (
+            self._value.total / self._volume.total if self._volume.full() and self._volume.total > 0 else np.nan
+        )
+        return features
@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+#Append-only binary event journal and replay driver.
+
+#Every Event is appended to a journal file as one length-prefixed record:
+#    uint32 length | int64 ts (ns, UTC) | uint8 flags | uint16 len(source) |
+#    uint16 len(symbol) | source | symbol | payload (UTF-8 JSON)
+#A sidecar index (<journal>.idx) holds (ts, offset) int64 pairs, one per
+#record, so readers locate a time range with a binary search instead of
+#scanning. JournalReader memory-maps both files and decodes records lazily;
+#replay() feeds them back through agents' handle_event / tick in journal
+#order, driving tick from the events' own timestamps, so a replay is
+#deterministic and runs as fast as the agents can consume events.
+
+#Payload values must be JSON-serialisable; numpy scalars are stored as plain
+#numbers. Datetimes are stored as {"$dt": ISO string} and decoded back to
+#datetimes (a payload dict of exactly that shape is therefore reserved).
+
+import json
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .interfaces import Agent, Event
+
+_MAGIC = b"HRMJ\x01\x00\x00\x00"
+_LENGTH = struct.Struct("<I")
+_HEADER = struct.Struct("<qBHH")
+_INDEX_ENTRY = np.dtype([("ts", "<i8"), ("offset", "<i8")])
+_TZ_AWARE = 1
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_DATETIME_KEY = "$dt"
+_DATETIME_TAG = b'"$dt"'
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, datetime):
+        return {_DATETIME_KEY: value.isoformat()}
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _json_object(obj: dict) -> Any:
+    if len(obj) == 1 and _DATETIME_KEY in obj:
+        return datetime.fromisoformat(obj[_DATETIME_KEY])
+    return obj
+
+
+def _ts_ns(ts: datetime) -> Tuple[int, int]:
+    # (ns since epoch in UTC, flags); naive datetimes are taken as UTC. Plain
+    # datetimes avoid a pandas round trip, which dominates per-event cost.
+    if isinstance(ts, pd.Timestamp):
+        if ts.tzinfo is None:
+            return int(ts.value), 0
+        return int(ts.tz_convert("UTC").value), _TZ_AWARE
+    if ts.tzinfo is None:
+        return (ts - _EPOCH) // _MICROSECOND * 1000, 0
+    return (ts - _EPOCH_UTC) // _MICROSECOND * 1000, _TZ_AWARE
+
+
+def encode_event(event: Event) -> bytes:
+    #One journal record (length prefix included).
+    ts, flags = _ts_ns(event.ts)
+    source = event.source.encode()
+    symbol = event.symbol.encode()
+    payload = json.dumps(event.payload, default=_json_default, separators=(",", ":")).encode()
+    body = _HEADER.pack(ts, flags, len(source), len(symbol)) + source + symbol + payload
+    return _LENGTH.pack(len(body)) + body
+
+
+def decode_event(buffer: Union[bytes, memoryview, mmap.mmap], offset: int) -> Tuple[Event, int]:
+    #Decode the record at `offset`; returns the event and the next record's offset.
+    (length,) = _LENGTH.unpack_from(buffer, offset)
+    start = offset + _LENGTH.size
+    ts, flags, source_len, symbol_len = _HEADER.unpack_from(buffer, start)
+    cursor = start + _HEADER.size
+    source = bytes(buffer[cursor : cursor + source_len]).decode()
+    cursor += source_len
+    symbol = bytes(buffer[cursor : cursor + symbol_len]).decode()
+    cursor += symbol_len
+    end = start + length
+    raw = bytes(buffer[cursor:end])
+    # Only payloads holding a datetime pay for the object hook.
+    payload = json.loads(raw, object_hook=_json_object) if _DATETIME_TAG in raw else json.loads(raw)
+    when = (_EPOCH_UTC if flags & _TZ_AWARE else _EPOCH) + timedelta(microseconds=ts // 1000)
+    return Event(symbol=symbol, ts=when, source=source, payload=payload), end
+
+
+class EventJournal:
+
+    #Appends events to a journal file and its timestamp index.
+
+    #Writes are buffered; call flush() (or close / leave the `with` block) to
+    #make them visible to readers. extend() matches the EventBus batch
+    #handler signature, so a journal can subscribe to a bus directly:
+    #    bus.subscribe(journal.extend, name="journal", threaded=False)
+
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            self.path.write_bytes(_MAGIC)
+            _index_path(self.path).write_bytes(b"")
+        else:
+            _check_magic(self.path)
+            _repair(self.path)
+        self._data = open(self.path, "ab")
+        self._index = open(_index_path(self.path), "ab")
+        self._offset = self._data.tell()
+
+    def append(self, event: Event) -> None:
+        record = encode_event(event)
+        self._data.write(record)
+        self._index.write(struct.pack("<qq", _ts_ns(event.ts)[0], self._offset))
+        self._offset += len(record)
+
+    def extend(self, events: Iterable[Event]) -> None:
+        for event in events:
+            self.append(event)
+
+    def flush(self) -> None:
+        # Data first: an index entry never points past the end of the data.
+        self._data.flush()
+        os.fsync(self._data.fileno())
+        self._index.flush()
+
+    def close(self) -> None:
+        if not self._data.closed:
+            self.flush()
+            self._data.close()
+            self._index.close()
+
+    def __enter__(self) -> "EventJournal":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class JournalReader:
+
+    #Memory-mapped, random-access view of a journal.
+
+    #Records are decoded on access; `timestamps` / `offsets` come from the
+    #index file, extended by scanning the data file past the last indexed
+    #record, so records flushed to the data file before their index entries
+    #are still read. A record that was still being written when the reader
+    #opened is ignored.
+
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        _check_magic(self.path)
+        size = self.path.stat().st_size
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        index = _complete_index(self._map, size, _load_index(self.path, size))
+        self.timestamps: np.ndarray = index["ts"]
+        self.offsets: np.ndarray = index["offset"]
+        self._sorted = bool(np.all(self.timestamps[1:] >= self.timestamps[:-1]))
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, i: int) -> Event:
+        return decode_event(self._map, int(self.offsets[i]))[0]
+
+    def __iter__(self) -> Iterator[Event]:
+        return self.events()
+
+    def positions(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> np.ndarray:
+        #Journal positions of the records with start <= ts <= end, in journal order.
+        lo_ns = None if start is None else _ts_ns(start)[0]
+        hi_ns = None if end is None else _ts_ns(end)[0]
+        if self._sorted:
+            lo = 0 if lo_ns is None else int(np.searchsorted(self.timestamps, lo_ns, side="left"))
+            hi = len(self) if hi_ns is None else int(np.searchsorted(self.timestamps, hi_ns, side="right"))
+            return np.arange(lo, hi)
+        mask = np.ones(len(self), dtype=bool)
+        if lo_ns is not None:
+            mask &= self.timestamps >= lo_ns
+        if hi_ns is not None:
+            mask &= self.timestamps <= hi_ns
+        return np.flatnonzero(mask)
+
+    def events(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[Event]:
+        for i in self.positions(start, end):
+            yield decode_event(self._map, int(self.offsets[i]))[0]
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "JournalReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+@dataclass
+class ReplayStats:
+    events: int
+    ticks: int
+    seconds: float
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events / self.seconds if self.seconds > 0 else float("inf")
+
+
+def replay(
+    events: Union[JournalReader, Iterable[Event]],
+    agents: Sequence[Agent],
+    tick_every: Optional[timedelta] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> ReplayStats:
+
+    #Feed journaled events through every agent's handle_event, in journal order.
+
+    #With `tick_every`, each agent's tick(as_of) is called on the event clock:
+    #once for every boundary (a multiple of tick_every since the epoch) that
+    #the event timestamps cross, before the first event past it.
+
+    if isinstance(events, JournalReader):
+        stream: Iterable[Event] = events.events(start, end)
+    else:
+        stream = events
+    step = None if tick_every is None else int(tick_every.total_seconds() * 1e9)
+    handlers = [agent.handle_event for agent in agents]
+    next_tick: Optional[int] = None
+    count = ticks = 0
+    started = time.perf_counter()
+    for event in stream:
+        if step is not None:
+            ts = _ts_ns(event.ts)[0]
+            if next_tick is None:
+                next_tick = (ts // step + 1) * step
+            while ts >= next_tick:
+                as_of = pd.Timestamp(next_tick).to_pydatetime()
+                for agent in agents:
+                    agent.tick(as_of)
+                ticks += 1
+                next_tick += step
+        for handle in handlers:
+            handle(event)
+        count += 1
+    return ReplayStats(events=count, ticks=ticks, seconds=time.perf_counter() - started)
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def _check_magic(path: Path) -> None:
+    with open(path, "rb") as fh:
+        if fh.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not an event journal")
+
+
+def _load_index(path: Path, size: int) -> Optional[np.ndarray]:
+    # Index entries whose record is not completely on disk are dropped; a
+    # missing or unreadable index is rebuilt by scanning the data file.
+    index_path = _index_path(path)
+    if not index_path.exists():
+        return None
+    entries = index_path.stat().st_size // _INDEX_ENTRY.itemsize
+    index = np.fromfile(index_path, dtype=_INDEX_ENTRY, count=entries)
+    if len(index) and index["offset"][-1] + _LENGTH.size > size:
+        index = index[index["offset"] + _LENGTH.size <= size]
+    if len(index):
+        with open(path, "rb") as fh:
+            fh.seek(int(index["offset"][-1]))
+            (length,) = _LENGTH.unpack(fh.read(_LENGTH.size))
+        if index["offset"][-1] + _LENGTH.size + length > size:
+            index = index[:-1]
+    return index
+
+
+def _scan_index(buffer: mmap.mmap, size: int, offset: int = len(_MAGIC)) -> np.ndarray:
+    # (ts, offset) of every complete record from `offset` on.
+    entries: List[Tuple[int, int]] = []
+    while offset + _LENGTH.size + _HEADER.size <= size:
+        (length,) = _LENGTH.unpack_from(buffer, offset)
+        if offset + _LENGTH.size + length > size:
+            break
+        (ts, _, _, _) = _HEADER.unpack_from(buffer, offset + _LENGTH.size)
+        entries.append((ts, offset))
+        offset += _LENGTH.size + length
+    return np.array(entries, dtype=_INDEX_ENTRY)
+
+
+def _complete_index(buffer: mmap.mmap, size: int, index: Optional[np.ndarray]) -> np.ndarray:
+    # `index` plus the complete records after its last entry; only that tail
+    # of the data file is scanned.
+    if index is None:
+        index = np.empty(0, dtype=_INDEX_ENTRY)
+    resume = int(index["offset"][-1]) if len(index) else len(_MAGIC)
+    tail = _scan_index(buffer, size, resume)
+    if len(index):
+        tail = tail[1:]
+    return np.concatenate([index, tail])
+
+
+def _repair(path: Path) -> None:
+    # Before appending, make the index cover exactly the complete records and
+    # drop a torn trailing record, so new records follow the last complete one.
+    size = path.stat().st_size
+    with open(path, "rb") as fh:
+        buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            index = _complete_index(buffer, size, _load_index(path, size))
+            end = len(_MAGIC)
+            if len(index):
+                (length,) = _LENGTH.unpack_from(buffer, int(index["offset"][-1]))
+                end = int(index["offset"][-1]) + _LENGTH.size + length
+        finally:
+            buffer.close()
+    if end != size:
+        with open(path, "r+b") as fh:
+            fh.truncate(end)
+    index_path = _index_path(path)
+    if not index_path.exists() or index_path.stat().st_size != len(index) * _INDEX_ENTRY.itemsize:
+        index.tofile(index_path)
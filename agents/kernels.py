@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+#Vectorized numeric kernels shared by the Hermes agents.
+
+#PrefixSumKernel builds cumulative sums over a price series once, after which
+#return, volatility, Sharpe and log-price trend statistics for any window
+#[start, end] are O(1) array lookups instead of a fresh pass over the data.
+
+#window_ols / rolling_ols / expanding_ols fit y = intercept + slope * x with
+#x = 0..k-1 inside each window from running sums: O(n) total for any number
+#of windows, vectorized across columns of a 2-D y. ols_from_sums is the shared
+#closed form used by every trend statistic in the agents.
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+
+
+TRADING_DAYS = 252
+
+WINDOW_STAT_NAMES = (
+    "cumulative_return",
+    "annualized_volatility",
+    "max_drawdown",
+    "sharpe_ratio",
+    "trend_slope",
+)
+
+
+def _exclusive_cumsum(values: np.ndarray) -> np.ndarray:
+    out = np.zeros(len(values) + 1, dtype="float64")
+    np.cumsum(values, out=out[1:])
+    return out
+
+
+def _exclusive_cumsum_2d(values: np.ndarray) -> np.ndarray:
+    out = np.zeros((values.shape[0] + 1, values.shape[1]), dtype="float64")
+    np.cumsum(values, axis=0, out=out[1:])
+    return out
+
+
+OLS_STAT_NAMES = ("slope", "intercept", "r2")
+
+
+def ols_from_sums(n, sum_x, sum_y, sum_xx, sum_xy, sum_yy=None) -> Dict[str, np.ndarray]:
+
+    #Closed-form simple regression of y on x from its sufficient statistics.
+
+    #Inputs broadcast against each other. Windows with fewer than two points
+    #(or a constant x) get NaN; r2 is NaN without `sum_yy` or when y is constant.
+
+    n = np.asarray(n, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sxx = n * sum_xx - sum_x * sum_x
+        sxy = n * sum_xy - sum_x * sum_y
+        slope = np.where((n >= 2) & (sxx != 0), sxy / sxx, np.nan)
+        intercept = (sum_y - slope * sum_x) / n
+        if sum_yy is None:
+            r2 = np.full(np.shape(slope), np.nan)
+        else:
+            syy = n * sum_yy - sum_y * sum_y
+            r2 = np.where(syy > 0, np.minimum(sxy * sxy / (sxx * syy), 1.0), np.nan)
+    return {"slope": slope, "intercept": intercept, "r2": r2}
+
+
+def window_ols(y: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Dict[str, np.ndarray]:
+
+    #OLS of y[start:end + 1] on x = 0..k-1 for each inclusive window.
+
+    #`y` is 1-D (n,) or 2-D (n, columns); results have shape (windows,) or
+    #(windows, columns). NaNs in y propagate to the windows containing them.
+
+    y = np.asarray(y, dtype="float64")
+    flat = y.ndim == 1
+    y2 = y[:, None] if flat else y
+    starts = np.asarray(starts, dtype="int64")
+    ends = np.asarray(ends, dtype="int64")
+
+    # y is centred on its last row (slope- and r2-invariant) to keep the
+    # running sums well conditioned; the intercept is shifted back below.
+    shift = y2[-1] if len(y2) else np.zeros(y2.shape[1])
+    centred = y2 - shift
+    positions = np.arange(len(y2), dtype="float64")[:, None]
+    sum_y = _exclusive_cumsum_2d(centred)
+    sum_yy = _exclusive_cumsum_2d(centred * centred)
+    sum_py = _exclusive_cumsum_2d(positions * centred)
+
+    lo, hi = starts[:, None], ends[:, None] + 1
+    k = (ends - starts + 1).astype("float64")[:, None]
+    window_y = sum_y[hi[:, 0]] - sum_y[lo[:, 0]]
+    # x is relative to the window start: sum(x * y) = sum(p * y) - start * sum(y).
+    window_xy = sum_py[hi[:, 0]] - sum_py[lo[:, 0]] - lo * window_y
+    stats = ols_from_sums(
+        k,
+        k * (k - 1) / 2,
+        window_y,
+        (k - 1) * k * (2 * k - 1) / 6,
+        window_xy,
+        sum_yy[hi[:, 0]] - sum_yy[lo[:, 0]],
+    )
+    stats["intercept"] = stats["intercept"] + shift
+    return {name: value[:, 0] for name, value in stats.items()} if flat else stats
+
+
+def rolling_ols(y: np.ndarray, window: int) -> Dict[str, np.ndarray]:
+    #Trailing `window`-row OLS at every row (NaN until a full window exists).
+    y = np.asarray(y, dtype="float64")
+    ends = np.arange(len(y))
+    stats = window_ols(y, np.maximum(ends - window + 1, 0), ends)
+    short = ends < window - 1
+    mask = short if y.ndim == 1 else short[:, None]
+    return {name: np.where(mask, np.nan, value) for name, value in stats.items()}
+
+
+def expanding_ols(y: np.ndarray) -> Dict[str, np.ndarray]:
+    #OLS over y[0:i + 1] at every row i.
+    ends = np.arange(len(y))
+    return window_ols(y, np.zeros_like(ends), ends)
+
+
+def suffix_max_drawdown(prices: np.ndarray) -> np.ndarray:
+
+    #Max drawdown of prices[i:] for every i, in one backward pass.
+
+    #The worst drawdown of a suffix either peaks at its first price (and bottoms
+    #at the suffix minimum) or lies entirely within the next suffix.
+
+    suffix_min = np.minimum.accumulate(prices[::-1])[::-1]
+    drop_from_first = suffix_min / prices - 1
+    return np.minimum.accumulate(drop_from_first[::-1])[::-1]
+
+
+def window_max_drawdown(
+    prices: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    max_cells: int = 4_000_000,
+) -> np.ndarray:
+
+    #Max drawdown of prices[start:end + 1] for arbitrary windows.
+
+    #Windows are laid out as rows of a sliding-window view (NaN-masked before
+    #each start) and reduced column-wise, in row chunks of at most `max_cells`.
+
+    starts = np.asarray(starts, dtype="int64")
+    ends = np.asarray(ends, dtype="int64")
+    out = np.zeros(len(starts), dtype="float64")
+    if len(starts) == 0:
+        return out
+
+    width = int(max(np.max(ends - starts) + 1, 1))
+    padded = np.concatenate([np.full(width - 1, np.nan), np.asarray(prices, dtype="float64")])
+    view = np.lib.stride_tricks.sliding_window_view(padded, width)
+    offsets = np.arange(width)
+    chunk = max(max_cells // width, 1)
+    for lo in range(0, len(starts), chunk):
+        hi = lo + chunk
+        rows = view[ends[lo:hi]]
+        # Row r holds prices[end - width + 1 .. end]; mask everything before start.
+        first_col = starts[lo:hi] - (ends[lo:hi] - width + 1)
+        rows = np.where(offsets[None, :] >= first_col[:, None], rows, np.nan)
+        peaks = np.fmax.accumulate(rows, axis=1)
+        with np.errstate(invalid="ignore"):
+            drawdowns = rows / peaks - 1
+        valid = ~np.isnan(drawdowns).all(axis=1)
+        out[lo:hi][valid] = np.nanmin(drawdowns[valid], axis=1)
+    return out
+
+
+@dataclass
+class PrefixSumKernel:
+
+    #Cumulative sums over one price series for O(1) window statistics.
+
+    #Windows are given as inclusive row positions [start, end]; the statistics
+    #match computing pct_change()/std()/cumprod() and a linear fit on prices[start:end + 1].
+
+
+    closes: np.ndarray
+    _sum_r: np.ndarray = field(init=False, repr=False)
+    _sum_r2: np.ndarray = field(init=False, repr=False)
+    _sum_y: np.ndarray = field(init=False, repr=False)
+    _sum_xy: np.ndarray = field(init=False, repr=False)
+    _suffix_dd: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        closes = np.asarray(self.closes, dtype="float64")
+        self.closes = closes
+        returns = np.zeros_like(closes)
+        if len(closes) > 1:
+            returns[1:] = closes[1:] / closes[:-1] - 1
+        # Log prices are shifted by a constant (slope-invariant) to keep the
+        # x·y sums small and well conditioned.
+        log_prices = np.log(closes) - (np.log(closes[-1]) if len(closes) else 0.0)
+        positions = np.arange(len(closes), dtype="float64")
+
+        self._sum_r = _exclusive_cumsum(returns)
+        self._sum_r2 = _exclusive_cumsum(returns * returns)
+        self._sum_y = _exclusive_cumsum(log_prices)
+        self._sum_xy = _exclusive_cumsum(positions * log_prices)
+
+    def __len__(self) -> int:
+        return len(self.closes)
+
+    def window_stats(self, starts: np.ndarray, ends: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        #Return each statistic in WINDOW_STAT_NAMES as an array aligned with `starts`.
+        starts = np.asarray(starts, dtype="int64")
+        ends = np.full_like(starts, len(self) - 1) if ends is None else np.asarray(ends, dtype="int64")
+
+        # Returns inside the window are r[start + 1 .. end].
+        m = (ends - starts).astype("float64")
+        sum_r = self._sum_r[ends + 1] - self._sum_r[starts + 1]
+        sum_r2 = self._sum_r2[ends + 1] - self._sum_r2[starts + 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = sum_r / m
+            var = np.maximum(sum_r2 - m * mean * mean, 0.0) / (m - 1)
+            std = np.where(m > 1, np.sqrt(var), np.nan)
+            sharpe = np.where(std > 0, (mean * TRADING_DAYS) / (std * np.sqrt(TRADING_DAYS)), 0.0)
+
+            # Closed-form OLS slope of log price on x = 0..k-1.
+            k = m + 1
+            sum_y = self._sum_y[ends + 1] - self._sum_y[starts]
+            sum_xy = self._sum_xy[ends + 1] - self._sum_xy[starts] - starts * sum_y
+            slope = ols_from_sums(k, k * (k - 1) / 2, sum_y, (k - 1) * k * (2 * k - 1) / 6, sum_xy)["slope"]
+
+        stats = {
+            "cumulative_return": self.closes[ends] / self.closes[starts] - 1,
+            "annualized_volatility": std * np.sqrt(TRADING_DAYS),
+            "max_drawdown": self._max_drawdown(starts, ends),
+            "sharpe_ratio": sharpe,
+            "trend_slope": slope,
+        }
+        empty = m < 1
+        if empty.any():
+            for name in WINDOW_STAT_NAMES:
+                stats[name] = np.where(empty, 0.0, stats[name])
+        return stats
+
+    def _max_drawdown(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        # The drawdown path starts at the first return, i.e. at prices[start + 1].
+        first = np.minimum(starts + 1, len(self) - 1)
+        if np.all(ends == len(self) - 1):
+            if self._suffix_dd is None:
+                self._suffix_dd = suffix_max_drawdown(self.closes)
+            return self._suffix_dd[first]
+        return window_max_drawdown(self.closes, first, ends)
+
+
+@dataclass
+class PanelPrefixSumKernel:
+
+    #Column-wise prefix sums over a dates x symbols close matrix.
+
+    #Missing bars are NaN (e.g. equities on weekends next to BTC-USD); each
+    #column only uses its own valid bars, so a window over rows [start, T)
+    #yields the same statistics as PrefixSumKernel on that symbol's own series.
+    #Every window ends at the last row.
+
+
+    closes: np.ndarray
+    _valid_before: np.ndarray = field(init=False, repr=False)
+    _next_valid: np.ndarray = field(init=False, repr=False)
+    _last_price: np.ndarray = field(init=False, repr=False)
+    _sum_r: np.ndarray = field(init=False, repr=False)
+    _sum_r2: np.ndarray = field(init=False, repr=False)
+    _sum_y: np.ndarray = field(init=False, repr=False)
+    _sum_xy: np.ndarray = field(init=False, repr=False)
+    _suffix_dd: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        closes = np.asarray(self.closes, dtype="float64")
+        if closes.ndim != 2:
+            raise ValueError("PanelPrefixSumKernel expects a 2-D (dates x symbols) array")
+        self.closes = closes
+        rows, cols = closes.shape
+        valid = ~np.isnan(closes)
+        row_ids = np.arange(rows)[:, None]
+
+        # Forward-filled closes give each bar its previous valid price.
+        last_valid_row = np.maximum.accumulate(np.where(valid, row_ids, -1), axis=0)
+        filled = np.where(last_valid_row >= 0, closes[np.maximum(last_valid_row, 0), np.arange(cols)], np.nan)
+        prev = np.vstack([np.full((1, cols), np.nan), filled[:-1]])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.where(valid & ~np.isnan(prev), closes / prev - 1, 0.0)
+            log_prices = np.where(valid, np.log(closes) - np.log(filled[-1]), 0.0)
+
+        # Rank of each bar among its column's valid bars (the regression x).
+        self._valid_before = _exclusive_cumsum_2d(valid.astype("float64"))
+        ranks = np.where(valid, self._valid_before[:-1], 0.0)
+
+        next_valid = np.where(valid, row_ids, rows)
+        self._next_valid = np.vstack(
+            [np.minimum.accumulate(next_valid[::-1], axis=0)[::-1], np.full((1, cols), rows)]
+        )
+        self._last_price = filled[-1] if rows else np.full(cols, np.nan)
+        self._sum_r = _exclusive_cumsum_2d(returns)
+        self._sum_r2 = _exclusive_cumsum_2d(returns * returns)
+        self._sum_y = _exclusive_cumsum_2d(log_prices)
+        self._sum_xy = _exclusive_cumsum_2d(ranks * log_prices)
+
+        # NaN-aware suffix drawdown: D[i] covers the valid bars in rows >= i.
+        suffix_min = np.fmin.accumulate(closes[::-1], axis=0)[::-1]
+        with np.errstate(invalid="ignore"):
+            drops = suffix_min / closes - 1
+        suffix_dd = np.fmin.accumulate(drops[::-1], axis=0)[::-1]
+        self._suffix_dd = np.vstack([np.nan_to_num(suffix_dd, nan=0.0), np.zeros((1, cols))])
+
+    @property
+    def shape(self) -> tuple:
+        return self.closes.shape
+
+    def window_stats(self, starts: np.ndarray) -> Dict[str, np.ndarray]:
+
+        #Statistics for windows [start, last row], one row per start.
+
+        #Returns a dict of (len(starts) x symbols) arrays for each name in
+        #WINDOW_STAT_NAMES plus "rows", the number of valid bars per window.
+
+        starts = np.asarray(starts, dtype="int64")
+        cols = np.arange(self.shape[1])[None, :]
+        end = self.shape[0]
+
+        first = self._next_valid[starts]  # first valid row at or after each start
+        rows = self._valid_before[end] - self._valid_before[starts]
+        has_data = first < end
+        first_idx = np.minimum(first, end - 1) if end else first
+        m = rows - 1
+        # Returns inside the window belong to the valid rows after `first`.
+        sum_r = self._sum_r[end] - self._sum_r[first_idx + 1, cols]
+        sum_r2 = self._sum_r2[end] - self._sum_r2[first_idx + 1, cols]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = sum_r / m
+            var = np.maximum(sum_r2 - m * mean * mean, 0.0) / (m - 1)
+            std = np.where(m > 1, np.sqrt(var), np.nan)
+            sharpe = np.where(std > 0, (mean * TRADING_DAYS) / (std * np.sqrt(TRADING_DAYS)), 0.0)
+
+            k = rows
+            offset = self._valid_before[starts]
+            sum_y = self._sum_y[end] - self._sum_y[starts[:, None], cols]
+            sum_xy = self._sum_xy[end] - self._sum_xy[starts[:, None], cols] - offset * sum_y
+            slope = ols_from_sums(k, k * (k - 1) / 2, sum_y, (k - 1) * k * (2 * k - 1) / 6, sum_xy)["slope"]
+
+            cumulative = self._last_price[None, :] / self.closes[first_idx, cols] - 1
+
+        # As in the single-series kernel, the drawdown path starts at the second bar.
+        second = self._next_valid[np.minimum(first_idx + 1, end), cols]
+        stats = {
+            "cumulative_return": cumulative,
+            "annualized_volatility": std * np.sqrt(TRADING_DAYS),
+            "max_drawdown": self._suffix_dd[second, cols],
+            "sharpe_ratio": sharpe,
+            "trend_slope": slope,
+        }
+        for name in WINDOW_STAT_NAMES:
+            stats[name] = np.where(has_data & (m >= 1), stats[name], np.where(has_data, 0.0, np.nan))
+        stats["rows"] = rows.astype("int64")
+        return stats
@@ -0,0 +1,532 @@
+from __future__ import annotations
+
+#Walk-forward backtesting for the Learning/Evaluation agent (y).
+
+#A backtest dataset is the point-in-time feature matrix of the historical and
+#technical agents (their backfill_features, one row per trading date) plus
+#forward returns from the same price series. walk_forward_folds() cuts its
+#rows into consecutive train/test folds separated by a gap of `horizon` rows,
+#so no training label overlaps a test date. Every fold fits a model from
+#agents/models.py on its training rows and trades sign(prediction) over the
+#test rows for one bar.
+
+#Folds are independent, so they run in a process pool. The feature matrix,
+#targets and returns of every symbol are packed into shared memory once and
+#workers attach to them by name; a task carries only row bounds and the
+#model config, never array data.
+
+#search_model_configs() samples configs at random and prunes them by
+#successive halving: cheap scores on a few recent folds decide which configs
+#earn a full walk-forward backtest.
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .historical import YFinanceHistoricalPerformanceAgent
+from .interfaces import Event, LearningEvaluationAgent, Outcome
+from .models import make_model
+from .records import OutcomeRecord
+from .technical import YFinanceTechnicalIndicatorAgent
+
+PERIODS_PER_YEAR = 252
+DEFAULT_CONFIG_ID = "ridge-default"
+_DATA_CACHE_SIZE = 4
+
+
+@dataclass(frozen=True)
+class Fold:
+
+    #Row bounds of one walk-forward fold (half-open: [start, end)).
+
+
+    index: int
+    train_start: int
+    train_end: int
+    test_start: int
+    test_end: int
+
+
+def walk_forward_folds(
+    n_rows: int,
+    train_size: int,
+    test_size: int,
+    step: Optional[int] = None,
+    gap: int = 0,
+    expanding: bool = False,
+) -> List[Fold]:
+    #Consecutive folds over n_rows; training ends `gap` rows before each test block.
+    step = step or test_size
+    folds: List[Fold] = []
+    test_start = train_size + gap
+    while test_start < n_rows:
+        train_end = test_start - gap
+        train_start = 0 if expanding else max(0, train_end - train_size)
+        folds.append(Fold(len(folds), train_start, train_end, test_start, min(test_start + test_size, n_rows)))
+        test_start += step
+    return folds
+
+
+def backtest_metrics(
+    predictions: np.ndarray,
+    targets: np.ndarray,
+    returns: np.ndarray,
+    periods_per_year: int = PERIODS_PER_YEAR,
+) -> Dict[str, float]:
+
+    #Metrics of trading sign(prediction) on `returns` (one-bar simple returns).
+
+    #sharpe: annualized mean / std of strategy returns
+    #max_drawdown: worst peak-to-trough loss of the compounded equity curve
+    #hit_rate: share of rows whose predicted direction matches the target's
+
+    valid = np.isfinite(predictions) & np.isfinite(returns)
+    strategy = np.sign(predictions[valid]) * returns[valid]
+    n = len(strategy)
+    if n == 0:
+        return {"n": 0, "total_return": np.nan, "sharpe": np.nan, "max_drawdown": np.nan, "hit_rate": np.nan}
+    equity = np.cumprod(1.0 + strategy)
+    peaks = np.maximum.accumulate(np.concatenate([[1.0], equity]))[1:]
+    std = strategy.std(ddof=1) if n > 1 else 0.0
+    scored = np.isfinite(predictions) & np.isfinite(targets) & (targets != 0) & (predictions != 0)
+    hits = np.sign(predictions[scored]) == np.sign(targets[scored])
+    return {
+        "n": n,
+        "total_return": float(equity[-1] - 1.0),
+        "sharpe": float(strategy.mean() / std * np.sqrt(periods_per_year)) if std > 0 else np.nan,
+        "max_drawdown": float((equity / peaks - 1.0).min()),
+        "hit_rate": float(hits.mean()) if len(hits) else np.nan,
+    }
+
+
+@dataclass
+class BacktestDataset:
+
+    #Point-in-time features and forward returns for one symbol.
+
+    #target[t]: return from close[t] to close[t + horizon]
+    #returns[t]: return from close[t] to close[t + 1] (the traded bar)
+    #Both are NaN where the future bar is not available yet.
+
+
+    symbol: str
+    dates: np.ndarray
+    columns: Tuple[str, ...]
+    features: np.ndarray
+    target: np.ndarray
+    returns: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+
+# -- Shared-memory fold execution ----------------------------------------------
+
+_ARRAYS = ("features", "target", "returns")
+
+
+def _share(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, Tuple[str, Tuple[int, ...], str]]:
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    view[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _fit_predict(
+    arrays: Mapping[str, np.ndarray], offset: int, fold: Fold, config: Mapping[str, Any]
+) -> np.ndarray:
+    X, y = arrays["features"], arrays["target"]
+    train = slice(offset + fold.train_start, offset + fold.train_end)
+    test = slice(offset + fold.test_start, offset + fold.test_end)
+    model = make_model(config).fit(X[train], y[train])
+    return model.predict(X[test])
+
+
+def _run_fold(task: Tuple[Dict[str, Any], int, Fold, Mapping[str, Any]]) -> np.ndarray:
+    # Blocks are attached for this task only and closed before returning, so a
+    # long-lived worker holds no mappings between tasks (or after close()).
+    specs, offset, fold, config = task
+    handles = {name: shared_memory.SharedMemory(name=spec[0]) for name, spec in specs.items()}
+    arrays = {
+        name: np.ndarray(shape, dtype=dtype, buffer=handles[name].buf) for name, (_, shape, dtype) in specs.items()
+    }
+    try:
+        return _fit_predict(arrays, offset, fold, config)
+    finally:
+        # The views must go before close() can release the mappings.
+        arrays.clear()
+        for shm in handles.values():
+            shm.close()
+
+
+class FoldRunner:
+
+    #Runs (dataset, fold, config) tasks against datasets stacked once.
+
+    #With more than one worker the stacked arrays are placed in shared memory
+    #and a process pool is started on the first parallel map(); both live until
+    #close(), so repeated map() calls (e.g. the rungs of a config search) reuse
+    #them. max_workers=1 runs in-process.
+
+
+    def __init__(self, datasets: Sequence[BacktestDataset], max_workers: Optional[int] = None) -> None:
+        self.offsets = np.concatenate([[0], np.cumsum([len(dataset) for dataset in datasets])]).astype(np.int64)
+        self.stacked = {
+            name: np.concatenate([getattr(dataset, name) for dataset in datasets])
+            if datasets
+            else np.empty(0)
+            for name in _ARRAYS
+        }
+        self.workers = max_workers or os.cpu_count() or 1
+        self._blocks: Dict[str, Tuple[shared_memory.SharedMemory, Tuple[str, Tuple[int, ...], str]]] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def map(self, tasks: Sequence[Tuple[int, Fold, Mapping[str, Any]]]) -> List[np.ndarray]:
+        #Test-row predictions for each (dataset index, fold, config) task, in order.
+        if self.workers <= 1 or (len(tasks) <= 1 and self._pool is None):
+            return [_fit_predict(self.stacked, int(self.offsets[i]), fold, config) for i, fold, config in tasks]
+        if self._pool is None:
+            self._blocks = {name: _share(np.ascontiguousarray(array)) for name, array in self.stacked.items()}
+            self._pool = ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)))
+        specs = {name: spec for name, (_, spec) in self._blocks.items()}
+        return list(self._pool.map(_run_fold, [(specs, int(self.offsets[i]), fold, config) for i, fold, config in tasks]))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        for shm, _ in self._blocks.values():
+            shm.close()
+            shm.unlink()
+        self._blocks = {}
+
+    def __enter__(self) -> "FoldRunner":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def run_folds(
+    datasets: Sequence[BacktestDataset],
+    folds: Sequence[Sequence[Fold]],
+    config: Mapping[str, Any],
+    max_workers: Optional[int] = None,
+) -> List[List[np.ndarray]]:
+    #Test-row predictions of every fold of every dataset (see FoldRunner).
+    tasks = [(i, fold, config) for i, symbol_folds in enumerate(folds) for fold in symbol_folds]
+    with FoldRunner(datasets, max_workers) as runner:
+        flat = runner.map(tasks)
+    results: List[List[np.ndarray]] = []
+    position = 0
+    for symbol_folds in folds:
+        results.append(flat[position : position + len(symbol_folds)])
+        position += len(symbol_folds)
+    return results
+
+
+# -- Configuration search --------------------------------------------------------
+
+#Parameter distributions per model type: ("log", low, high) samples
+#log-uniformly, ("int", low, high) uniformly over [low, high], ("choice", values)
+#one of the values.
+SEARCH_SPACE: Dict[str, Dict[str, Tuple[Any, ...]]] = {
+    "ridge": {"alpha": ("log", 1e-3, 1e3)},
+    "logistic": {"alpha": ("log", 1e-3, 1e3)},
+    "gbm": {
+        "loss": ("choice", ("squared", "logistic")),
+        "n_estimators": ("int", 20, 200),
+        "learning_rate": ("log", 0.01, 0.3),
+        "max_depth": ("int", 2, 5),
+        "min_samples_leaf": ("int", 10, 100),
+        "l2": ("log", 0.1, 10.0),
+    },
+}
+
+
+def sample_configs(
+    n: int,
+    space: Optional[Mapping[str, Mapping[str, Tuple[Any, ...]]]] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, Dict[str, Any]]:
+    #n random configs from `space` (default SEARCH_SPACE), keyed by a content-derived config_id.
+    space = space or SEARCH_SPACE
+    rng = np.random.default_rng(seed)
+    kinds = sorted(space)
+    configs: Dict[str, Dict[str, Any]] = {}
+    for _ in range(n):
+        kind = kinds[rng.integers(len(kinds))]
+        config: Dict[str, Any] = {"model": kind}
+        for name, (dist, *args) in sorted(space[kind].items()):
+            if dist == "log":
+                config[name] = float(np.exp(rng.uniform(np.log(args[0]), np.log(args[1]))))
+            elif dist == "int":
+                config[name] = int(rng.integers(args[0], args[1] + 1))
+            elif dist == "choice":
+                config[name] = args[0][rng.integers(len(args[0]))]
+            else:
+                raise ValueError(f"Unknown distribution {dist!r} for {kind}.{name}")
+        digest = hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:8]
+        configs[f"{kind}-{digest}"] = config
+    return configs
+
+
+def _overall_metrics(
+    dataset: BacktestDataset, folds: Sequence[Fold], predictions: Sequence[np.ndarray]
+) -> Dict[str, float]:
+    # Metrics of the concatenated test predictions of `folds`.
+    if not folds:
+        return backtest_metrics(np.empty(0), np.empty(0), np.empty(0))
+    tests = np.concatenate([np.arange(fold.test_start, fold.test_end) for fold in folds])
+    return backtest_metrics(np.concatenate(predictions), dataset.target[tests], dataset.returns[tests])
+
+
+def _mean_sharpe(metrics: Iterable[Mapping[str, float]]) -> float:
+    sharpes = [m["sharpe"] for m in metrics if np.isfinite(m["sharpe"])]
+    return float(np.mean(sharpes)) if sharpes else float("-inf")
+
+
+# -- Agent ----------------------------------------------------------------------
+
+
+@dataclass
+class WalkForwardLearningAgent(LearningEvaluationAgent):
+
+    #Learning/Evaluation agent backed by walk-forward backtests.
+
+    #configs: config_id -> model config for agents.models.make_model
+    #train_days / test_days: fold sizes in trading rows; folds step by test_days
+    #horizon_days: target horizon in rows (also the train/test gap)
+    #max_workers: process pool size for folds (None = all cores, 1 = in-process)
+
+    #Backtest summaries are kept per config and symbol; select_production_model
+    #and suggest_model_configs rank configs by their mean overall Sharpe.
+
+
+    historical: Optional[YFinanceHistoricalPerformanceAgent] = None
+    technical: Optional[YFinanceTechnicalIndicatorAgent] = None
+    configs: Dict[str, Dict[str, Any]] = field(
+        default_factory=lambda: {DEFAULT_CONFIG_ID: {"model": "ridge", "alpha": 1.0}}
+    )
+    train_days: int = 504
+    test_days: int = 63
+    horizon_days: int = 1
+    max_workers: Optional[int] = None
+    outcomes: List[OutcomeRecord] = field(default_factory=list, init=False, repr=False)
+    _results: Dict[str, Dict[str, Dict[str, float]]] = field(default_factory=dict, init=False, repr=False)
+    _data: Dict[Tuple[Any, ...], Tuple[List[BacktestDataset], List[List[Fold]]]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        if self.historical is None:
+            self.historical = YFinanceHistoricalPerformanceAgent()
+        if self.technical is None:
+            self.technical = YFinanceTechnicalIndicatorAgent(price_service=self.historical.price_service)
+
+    # -- LearningEvaluationAgent interface --------------------------------------
+
+    def handle_event(self, event: Event) -> None:  # pragma: no cover - no RT events yet
+        return
+
+    def tick(self, as_of: datetime) -> None:  # pragma: no cover
+        return
+
+    def record_prediction_and_outcome(self, outcome: Outcome) -> None:
+        self.outcomes.append(OutcomeRecord.from_outcome(outcome))
+
+    def record_outcomes(self, outcomes: Iterable[Outcome]) -> None:
+        #Bulk form of record_prediction_and_outcome (e.g. OutcomeLabeler.resolve()).
+        self.outcomes.extend(OutcomeRecord.from_outcome(outcome) for outcome in outcomes)
+
+    def run_backtest(
+        self,
+        symbol: str,
+        start: datetime,
+        end: datetime,
+        config_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        return self.run_backtests([symbol], start, end, config_id)[symbol]
+
+    def suggest_model_configs(self, top_k: int = 3) -> List[Dict[str, Any]]:
+        #Backtested configs ranked by mean Sharpe (untested configs last).
+        ranked = sorted(self.configs, key=lambda config_id: -self._score(config_id))
+        return [
+            {"config_id": config_id, **self.configs[config_id], "score": self._score(config_id)}
+            for config_id in ranked[:top_k]
+        ]
+
+    def select_production_model(self) -> str:
+        return max(self.configs, key=self._score, default=DEFAULT_CONFIG_ID)
+
+    # -- Backtesting ------------------------------------------------------------
+
+    def run_backtests(
+        self,
+        symbols: Sequence[str],
+        start: datetime,
+        end: datetime,
+        config_id: Optional[str] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+
+        #Walk-forward backtest of one config over many symbols in one process pool.
+
+        #Returns per symbol {"config_id", "folds": [fold metrics], "overall": metrics},
+        #where `overall` scores the concatenated test predictions of all folds.
+
+        config_id = config_id or DEFAULT_CONFIG_ID
+        config = self.configs[config_id]
+        datasets, folds = self.backtest_data(symbols, start, end)
+        predictions = run_folds(datasets, folds, config, self.max_workers)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for dataset, symbol_folds, symbol_predictions in zip(datasets, folds, predictions):
+            fold_results = []
+            for fold, fold_predictions in zip(symbol_folds, symbol_predictions):
+                test = slice(fold.test_start, fold.test_end)
+                metrics = backtest_metrics(fold_predictions, dataset.target[test], dataset.returns[test])
+                fold_results.append(
+                    {
+                        "fold": fold.index,
+                        "train_start": pd.Timestamp(dataset.dates[fold.train_start]).isoformat(),
+                        "test_start": pd.Timestamp(dataset.dates[fold.test_start]).isoformat(),
+                        "test_end": pd.Timestamp(dataset.dates[fold.test_end - 1]).isoformat(),
+                        **metrics,
+                    }
+                )
+            overall = _overall_metrics(dataset, symbol_folds, symbol_predictions)
+            self._results.setdefault(config_id, {})[dataset.symbol] = overall
+            results[dataset.symbol] = {"config_id": config_id, "folds": fold_results, "overall": overall}
+        return results
+
+    def search_model_configs(
+        self,
+        symbols: Sequence[str],
+        start: datetime,
+        end: datetime,
+        n_configs: int = 64,
+        space: Optional[Mapping[str, Mapping[str, Tuple[Any, ...]]]] = None,
+        eta: int = 3,
+        min_folds: int = 1,
+        top_k: int = 3,
+        seed: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+
+        #Random search with successive halving over walk-forward folds.
+
+        #Every sampled config is first scored (mean Sharpe across symbols) on
+        #the `min_folds` most recent folds of each symbol; the best 1/eta (at
+        #least top_k) survive and are scored on eta times as many folds, until
+        #the survivors have seen every fold. Fold predictions are kept between
+        #rungs, so a survivor only fits its new folds. All rungs share one
+        #process pool and one shared-memory copy of the data.
+
+        #Survivors are added to `configs` with their full backtest results, so
+        #the returned ranking is suggest_model_configs(top_k).
+
+        datasets, folds = self.backtest_data(symbols, start, end)
+        n_folds = max((len(symbol_folds) for symbol_folds in folds), default=0)
+        if n_folds == 0:
+            raise ValueError("Not enough history for a single walk-forward fold")
+        candidates = sample_configs(n_configs, space, seed)
+        predictions: Dict[Tuple[str, int, int], np.ndarray] = {}
+        survivors = list(candidates)
+        budget = max(1, min_folds)
+        with FoldRunner(datasets, self.max_workers) as runner:
+            while True:
+                budget = min(budget, n_folds)
+                keys = [
+                    (config_id, i, fold.index)
+                    for config_id in survivors
+                    for i, symbol_folds in enumerate(folds)
+                    for fold in symbol_folds[-budget:]
+                    if (config_id, i, fold.index) not in predictions
+                ]
+                tasks = [(i, folds[i][index], candidates[config_id]) for config_id, i, index in keys]
+                predictions.update(zip(keys, runner.map(tasks)))
+                overall = {
+                    config_id: [
+                        _overall_metrics(
+                            dataset,
+                            symbol_folds[-budget:],
+                            [predictions[(config_id, i, fold.index)] for fold in symbol_folds[-budget:]],
+                        )
+                        for i, (dataset, symbol_folds) in enumerate(zip(datasets, folds))
+                    ]
+                    for config_id in survivors
+                }
+                if budget >= n_folds:
+                    break
+                survivors.sort(key=lambda config_id: -_mean_sharpe(overall[config_id]))
+                survivors = survivors[: max(top_k, len(survivors) // eta)]
+                budget *= eta
+
+        for config_id in survivors:
+            self.configs[config_id] = candidates[config_id]
+            self._results[config_id] = {
+                dataset.symbol: metrics for dataset, metrics in zip(datasets, overall[config_id])
+            }
+        return self.suggest_model_configs(top_k)
+
+    def backtest_data(
+        self, symbols: Sequence[str], start: datetime, end: datetime
+    ) -> Tuple[List[BacktestDataset], List[List[Fold]]]:
+        # Datasets and fold splits are built once per (symbols, range, fold sizes,
+        # stored price version), so appended or revised bars rebuild them.
+        self._prefetch(symbols, start, end)
+        store = self.historical.price_service.store
+        versions = tuple(store.version(symbol) for symbol in symbols)
+        key = (tuple(symbols), start, end, self.train_days, self.test_days, self.horizon_days, versions)
+        cached = self._data.get(key)
+        if cached is None:
+            datasets = self.build_datasets(symbols, start, end)
+            cached = self._data[key] = (datasets, [self.folds_for(dataset) for dataset in datasets])
+            while len(self._data) > _DATA_CACHE_SIZE:
+                del self._data[next(iter(self._data))]
+        return cached
+
+    def folds_for(self, dataset: BacktestDataset) -> List[Fold]:
+        return walk_forward_folds(len(dataset), self.train_days, self.test_days, gap=self.horizon_days)
+
+    def build_datasets(self, symbols: Sequence[str], start: datetime, end: datetime) -> List[BacktestDataset]:
+        self._prefetch(symbols, start, end)
+        return [self.build_dataset(symbol, start, end) for symbol in symbols]
+
+    def build_dataset(self, symbol: str, start: datetime, end: datetime) -> BacktestDataset:
+        #Features for trading dates in [start, end] with forward returns from the same closes.
+        technical = self.technical.backfill_features(symbol, start, end)
+        historical = self.historical.backfill_features(symbol, start, end)
+        frame = technical.join(historical, how="inner")
+        closes = self.historical.get_price_range(symbol, start, end)["Close"]
+        closes = closes.reindex(frame.index).to_numpy(dtype="float64")
+        return BacktestDataset(
+            symbol=symbol,
+            dates=frame.index.to_numpy(dtype="datetime64[ns]"),
+            columns=tuple(map(str, frame.columns)),
+            features=frame.to_numpy(dtype="float64"),
+            target=_forward_return(closes, self.horizon_days),
+            returns=_forward_return(closes, 1),
+        )
+
+    def _prefetch(self, symbols: Sequence[str], start: datetime, end: datetime) -> None:
+        # One batched download covers every symbol's feature lookback.
+        lookback = timedelta(days=max(self.historical.min_history_days, self.technical.lookback_days))
+        self.historical.price_service.prefetch(symbols, start - lookback, end)
+
+    def _score(self, config_id: str) -> float:
+        return _mean_sharpe(self._results.get(config_id, {}).values())
+
+
+def _forward_return(closes: np.ndarray, horizon: int) -> np.ndarray:
+    out = np.full(len(closes), np.nan)
+    if len(closes) > horizon:
+        out[:-horizon] = closes[horizon:] / closes[:-horizon] - 1.0
+    return out
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+#Versioned on-disk model registry.
+
+#Every trained model (agents/prediction.TrainedModel) is saved as its own
+#directory of .npy weight files plus a meta.json with the model type,
+#hyperparameters, feature schema and scoring metadata. Weights are loaded
+#with np.load(mmap_mode="r"): processes loading the same model share the
+#page cache instead of each holding a private copy, and loading costs no
+#parsing. Directories are written under a temporary name and renamed into
+#place, so a reader never sees a partial model.
+
+#The registry keeps the `warm` most recently used models loaded (with their
+#pages touched) and records which model is active in a small ACTIVE file,
+#which other processes can poll to follow a promotion.
+
+import dataclasses
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .models import MODELS
+from .prediction import TrainedModel
+from .records import FeatureSchema
+
+_META_FILE = "meta.json"
+_ACTIVE_FILE = "ACTIVE"
+_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _default_registry_dir() -> Path:
+    return Path(os.getenv("HERMES_MODEL_REGISTRY", _ROOT / "outputs" / "models"))
+
+
+def _model_type(model: Any) -> str:
+    for name, cls in MODELS.items():
+        if type(model) is cls:
+            return name
+    raise TypeError(f"{type(model).__name__} is not a registered model type")
+
+
+def _save_model(model: Any, directory: Path) -> Dict[str, Any]:
+    # Array fields -> <field>.npy; lists of arrays -> concatenated values plus
+    # offsets; everything else is a JSON parameter.
+    params: Dict[str, Any] = {}
+    arrays: Dict[str, str] = {}
+    for f in dataclasses.fields(model):
+        value = getattr(model, f.name)
+        if isinstance(value, np.ndarray):
+            np.save(directory / f"{f.name}.npy", value)
+            arrays[f.name] = "array"
+        elif isinstance(value, list) and all(isinstance(item, np.ndarray) for item in value):
+            lengths = [len(item) for item in value]
+            np.save(directory / f"{f.name}.values.npy", np.concatenate(value) if value else np.empty(0))
+            np.save(directory / f"{f.name}.offsets.npy", np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64))
+            arrays[f.name] = "list"
+        else:
+            params[f.name] = value
+    return {"type": _model_type(model), "params": params, "arrays": arrays}
+
+
+def _load_model(spec: Dict[str, Any], directory: Path) -> Any:
+    kwargs = dict(spec["params"])
+    for name, kind in spec["arrays"].items():
+        if kind == "array":
+            kwargs[name] = np.load(directory / f"{name}.npy", mmap_mode="r")
+        else:
+            values = np.load(directory / f"{name}.values.npy", mmap_mode="r")
+            offsets = np.load(directory / f"{name}.offsets.npy")
+            kwargs[name] = [values[lo:hi] for lo, hi in zip(offsets[:-1], offsets[1:])]
+    return MODELS[spec["type"]](**kwargs)
+
+
+def _touch(model: Any) -> None:
+    # Fault every weight page in now rather than on the first scoring request.
+    for f in dataclasses.fields(model):
+        value = getattr(model, f.name)
+        for array in value if isinstance(value, list) else [value]:
+            if isinstance(array, np.ndarray) and array.size:
+                np.add.reduce(array, axis=None)
+
+
+class ModelRegistry:
+
+    #Directory of saved models with an LRU of warm, memory-mapped models.
+
+    #Layout:
+    #    <root>/<model_id>/meta.json   type, params, schema, scoring metadata, saved_at
+    #    <root>/<model_id>/*.npy       weights
+    #    <root>/ACTIVE                 model_id of the active model
+
+
+    def __init__(self, root: Optional[Path] = None, warm: int = 3) -> None:
+        self.root = Path(root) if root is not None else _default_registry_dir()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.warm = warm
+        self._loaded: "OrderedDict[str, TrainedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, trained: TrainedModel) -> str:
+        #Persist `trained` (a no-op if its model_id is already stored).
+        target = self.root / trained.model_id
+        if target.exists():
+            return trained.model_id
+        staging = self.root / f".{trained.model_id}.{uuid.uuid4().hex}.tmp"
+        staging.mkdir()
+        try:
+            meta = {
+                "model_id": trained.model_id,
+                "model": _save_model(trained.model, staging),
+                "schema": list(trained.schema.names),
+                "config": trained.config,
+                "horizon": trained.horizon,
+                "return_scale": trained.return_scale,
+                "trained_at": trained.trained_at.isoformat(),
+                "symbol": trained.symbol,
+                "saved_at": datetime.utcnow().isoformat(),
+            }
+            (staging / _META_FILE).write_text(json.dumps(meta, indent=2))
+            os.rename(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return trained.model_id
+
+    def list(self) -> List[Dict[str, Any]]:
+        #Metadata of every stored model, oldest first.
+        metas = []
+        for path in self.root.iterdir():
+            meta_path = path / _META_FILE
+            if path.is_dir() and not path.name.startswith(".") and meta_path.exists():
+                metas.append(json.loads(meta_path.read_text()))
+        return sorted(metas, key=lambda meta: (meta["saved_at"], meta["model_id"]))
+
+    def load(self, model_id: str) -> TrainedModel:
+        #The model with memory-mapped, pre-faulted weights; kept in the warm LRU.
+        with self._lock:
+            trained = self._loaded.get(model_id)
+            if trained is not None:
+                self._loaded.move_to_end(model_id)
+                return trained
+        directory = self.root / model_id
+        meta_path = directory / _META_FILE
+        if not meta_path.exists():
+            raise KeyError(f"Unknown model_id {model_id!r}")
+        meta = json.loads(meta_path.read_text())
+        trained = TrainedModel(
+            model_id=meta["model_id"],
+            model=_load_model(meta["model"], directory),
+            schema=FeatureSchema.of(meta["schema"]),
+            config=meta["config"],
+            horizon=meta["horizon"],
+            return_scale=meta["return_scale"],
+            trained_at=datetime.fromisoformat(meta["trained_at"]),
+            symbol=meta["symbol"],
+        )
+        _touch(trained.model)
+        with self._lock:
+            trained = self._loaded.setdefault(model_id, trained)
+            self._loaded.move_to_end(model_id)
+            while len(self._loaded) > max(self.warm, 1):
+                self._loaded.popitem(last=False)
+        return trained
+
+    def warm_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._loaded)
+
+    def preload_latest(self) -> List[str]:
+        #Load the `warm` most recently saved models.
+        latest = [meta["model_id"] for meta in self.list()[-self.warm :]] if self.warm else []
+        for model_id in latest:
+            self.load(model_id)
+        return latest
+
+    def promote(self, model_id: str) -> None:
+        #Record `model_id` as active for every process sharing this registry.
+        if not (self.root / model_id / _META_FILE).exists():
+            raise KeyError(f"Unknown model_id {model_id!r}")
+        tmp = self.root / f".{_ACTIVE_FILE}.{uuid.uuid4().hex}.tmp"
+        tmp.write_text(model_id)
+        os.replace(tmp, self.root / _ACTIVE_FILE)
+
+    def active_model_id(self) -> Optional[str]:
+        path = self.root / _ACTIVE_FILE
+        return path.read_text().strip() if path.exists() else None
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+#Array-in, array-out models shared by backtesting and prediction.
+
+#Models take a float64 feature matrix (rows x features, NaN allowed) and a
+#target vector of forward returns, and score a whole matrix with one
+#vectorized call. They are built from plain config dicts so configs can be
+#passed to worker processes and stored next to backtest results:
+#    make_model({"model": "ridge", "alpha": 10.0})
+
+#predict() always returns a signed score (positive = up). Regression models
+#(`classifier = False`) predict the return itself; classifiers are trained on
+#the direction of the return, predict 2 * P(up) - 1 and also expose
+#predict_proba().
+
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Type
+
+import numpy as np
+
+
+def _standardize(X: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Column means / scales over finite values; constant or empty columns get scale 1.
+    with np.errstate(invalid="ignore"):
+        counts = np.isfinite(X).sum(axis=0)
+        mean = np.where(counts > 0, np.nansum(X, axis=0) / np.maximum(counts, 1), 0.0)
+        scale = np.sqrt(np.where(counts > 0, np.nansum((X - mean) ** 2, axis=0) / np.maximum(counts, 1), 0.0))
+    scale = np.where(scale > 0, scale, 1.0)
+    return mean, scale
+
+
+def _impute(X: np.ndarray, mean: np.ndarray) -> np.ndarray:
+    # Missing features take the training mean (i.e. contribute nothing).
+    return np.where(np.isfinite(X), X, mean)
+
+
+@dataclass
+class RidgeRegression:
+
+    #L2-regularised least squares on standardized features.
+
+    #The fitted weights are folded back into original units, so predict() is
+    #one matrix-vector product plus an imputation of missing values.
+
+
+    alpha: float = 1.0
+    coef: Optional[np.ndarray] = None
+    intercept: float = 0.0
+    mean: Optional[np.ndarray] = None
+
+    classifier = False
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> "RidgeRegression":
+        X = np.asarray(X, dtype="float64")
+        y = np.asarray(y, dtype="float64")
+        keep = np.isfinite(y)
+        X, y = X[keep], y[keep]
+        mean, scale = _standardize(X)
+        Z = (_impute(X, mean) - mean) / scale
+        y_mean = float(y.mean()) if len(y) else 0.0
+        gram = Z.T @ Z + self.alpha * np.eye(Z.shape[1])
+        weights = np.linalg.solve(gram, Z.T @ (y - y_mean)) if len(y) else np.zeros(Z.shape[1])
+        self.coef = weights / scale
+        self.mean = mean
+        self.intercept = y_mean - float(mean @ self.coef)
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.coef is None:
+            raise RuntimeError("Model is not fitted")
+        return _impute(np.asarray(X, dtype="float64"), self.mean) @ self.coef + self.intercept
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+
+@dataclass
+class LogisticRegression:
+
+    #L2-regularised logistic regression on the direction of the target.
+
+    #Fitted by Newton's method on standardized features; like RidgeRegression
+    #the weights are stored in original units. With a single class in the
+    #training labels the likelihood has no finite optimum, so the fit is a
+    #constant model at the smoothed class rate (n_up + 0.5) / (n + 1).
+
+
+    alpha: float = 1.0
+    max_iter: int = 50
+    tol: float = 1e-8
+    coef: Optional[np.ndarray] = None
+    intercept: float = 0.0
+    mean: Optional[np.ndarray] = None
+
+    classifier = True
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> "LogisticRegression":
+        X = np.asarray(X, dtype="float64")
+        y = np.asarray(y, dtype="float64")
+        keep = np.isfinite(y)
+        X, labels = X[keep], (y[keep] > 0).astype("float64")
+        mean, scale = _standardize(X)
+        if labels.all() or not labels.any():
+            rate = (labels.sum() + 0.5) / (len(labels) + 1.0)
+            self.coef = np.zeros(X.shape[1])
+            self.mean = mean
+            self.intercept = float(np.log(rate / (1.0 - rate)))
+            return self
+        Z = np.column_stack([np.ones(len(X)), (_impute(X, mean) - mean) / scale])
+        penalty = np.full(Z.shape[1], self.alpha)
+        penalty[0] = 0.0
+        weights = np.zeros(Z.shape[1])
+        for _ in range(self.max_iter):
+            p = _sigmoid(Z @ weights)
+            gradient = Z.T @ (p - labels) + penalty * weights
+            hessian = (Z * (p * (1.0 - p))[:, None]).T @ Z + np.diag(penalty) + 1e-12 * np.eye(Z.shape[1])
+            delta = np.linalg.solve(hessian, gradient)
+            weights -= delta
+            if np.max(np.abs(delta)) < self.tol:
+                break
+        self.coef = weights[1:] / scale
+        self.mean = mean
+        self.intercept = float(weights[0] - mean @ self.coef)
+        return self
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        if self.coef is None:
+            raise RuntimeError("Model is not fitted")
+        return _sigmoid(_impute(np.asarray(X, dtype="float64"), self.mean) @ self.coef + self.intercept)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return 2.0 * self.predict_proba(X) - 1.0
+
+
+@dataclass
+class HistGradientBoosting:
+
+    #Histogram gradient-boosted trees in NumPy.
+
+    #Features are bucketed into at most `max_bins` quantile bins (NaN gets a
+    #bin of its own), and every tree is a complete binary tree of `max_depth`
+    #levels grown one level at a time from per-(node, feature, bin) gradient
+    #histograms. A node that cannot split sends all rows left. Trees are stored
+    #as (trees x nodes) arrays, so predict() walks every tree for every row in
+    #max_depth vectorized steps.
+
+    #loss="squared" regresses the return; loss="logistic" classifies its sign.
+
+
+    loss: str = "squared"
+    n_estimators: int = 100
+    learning_rate: float = 0.1
+    max_depth: int = 3
+    max_bins: int = 32
+    min_samples_leaf: int = 20
+    l2: float = 1.0
+    edges: Optional[list] = None
+    features: Optional[np.ndarray] = None
+    thresholds: Optional[np.ndarray] = None
+    leaves: Optional[np.ndarray] = None
+    base: float = 0.0
+
+    def __post_init__(self) -> None:
+        if self.loss not in ("squared", "logistic"):
+            raise ValueError(f"Unknown loss {self.loss!r}")
+
+    @property
+    def classifier(self) -> bool:
+        return self.loss == "logistic"
+
+    def _bin(self, X: np.ndarray) -> np.ndarray:
+        # Bin b of feature j holds values in (edges[j][b-1], edges[j][b]]; NaN -> max_bins.
+        binned = np.empty(X.shape, dtype=np.int32)
+        for j, edges in enumerate(self.edges):
+            column = X[:, j]
+            binned[:, j] = np.where(np.isfinite(column), np.searchsorted(edges, column, side="left"), self.max_bins)
+        return binned
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> "HistGradientBoosting":
+        X = np.asarray(X, dtype="float64")
+        y = np.asarray(y, dtype="float64")
+        keep = np.isfinite(y)
+        X, y = X[keep], y[keep]
+        if self.classifier:
+            y = (y > 0).astype("float64")
+        n, p = X.shape
+        quantiles = np.linspace(0, 1, self.max_bins + 1)[1:-1]
+        self.edges = []
+        for j in range(p):
+            finite = X[np.isfinite(X[:, j]), j]
+            self.edges.append(np.unique(np.quantile(finite, quantiles)) if len(finite) else np.empty(0))
+        binned = self._bin(X)
+
+        bins = self.max_bins + 1
+        n_nodes = 2 ** (self.max_depth + 1) - 1
+        n_inner = 2**self.max_depth - 1
+        self.features = np.zeros((self.n_estimators, n_inner), dtype=np.int32)
+        self.thresholds = np.full((self.n_estimators, n_inner), bins, dtype=np.int32)
+        self.leaves = np.zeros((self.n_estimators, n_nodes - n_inner))
+        if self.classifier:
+            rate = np.clip(y.mean() if n else 0.5, 1e-6, 1 - 1e-6)
+            self.base = float(np.log(rate / (1 - rate)))
+        else:
+            self.base = float(y.mean()) if n else 0.0
+        raw = np.full(n, self.base)
+        column_offsets = np.arange(p) * bins
+
+        for t in range(self.n_estimators):
+            if self.classifier:
+                prob = _sigmoid(raw)
+                grad, hess = prob - y, prob * (1.0 - prob)
+            else:
+                grad, hess = raw - y, np.ones(n)
+            node = np.zeros(n, dtype=np.int64)
+            for depth in range(self.max_depth):
+                first = 2**depth - 1
+                width = 2**depth
+                local = node - first
+                flat = ((local * p)[:, None] * bins + column_offsets + binned).ravel()
+                size = width * p * bins
+                G = np.bincount(flat, np.repeat(grad, p), size).reshape(width, p, bins)
+                H = np.bincount(flat, np.repeat(hess, p), size).reshape(width, p, bins)
+                C = np.bincount(flat, None, size).reshape(width, p, bins)
+                GL, HL, CL = G.cumsum(axis=2), H.cumsum(axis=2), C.cumsum(axis=2)
+                Gt, Ht, Ct = GL[:, :, -1:], HL[:, :, -1:], CL[:, :, -1:]
+                gain = GL**2 / (HL + self.l2) + (Gt - GL) ** 2 / (Ht - HL + self.l2) - Gt**2 / (Ht + self.l2)
+                gain[(CL < self.min_samples_leaf) | (Ct - CL < self.min_samples_leaf)] = -np.inf
+                best = gain.reshape(width, -1).argmax(axis=1)
+                best_gain = gain.reshape(width, -1)[np.arange(width), best]
+                split = np.isfinite(best_gain) & (best_gain > 0)
+                self.features[t, first : first + width] = np.where(split, best // bins, 0)
+                self.thresholds[t, first : first + width] = np.where(split, best % bins, bins)
+                go_right = binned[np.arange(n), self.features[t, node]] > self.thresholds[t, node]
+                node = 2 * node + 1 + go_right
+            leaf = node - n_inner
+            G = np.bincount(leaf, grad, n_nodes - n_inner)
+            H = np.bincount(leaf, hess, n_nodes - n_inner)
+            self.leaves[t] = -self.learning_rate * G / (H + self.l2)
+            raw += self.leaves[t, leaf]
+        return self
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        if self.leaves is None:
+            raise RuntimeError("Model is not fitted")
+        binned = self._bin(np.asarray(X, dtype="float64"))
+        rows = np.arange(len(binned))[:, None]
+        trees = np.arange(self.n_estimators)[None, :]
+        node = np.zeros((len(binned), self.n_estimators), dtype=np.int64)
+        for _ in range(self.max_depth):
+            go_right = binned[rows, self.features[trees, node]] > self.thresholds[trees, node]
+            node = 2 * node + 1 + go_right
+        n_inner = self.features.shape[1]
+        return self.base + self.leaves[trees, node - n_inner].sum(axis=1)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        if not self.classifier:
+            raise AttributeError("predict_proba requires loss='logistic'")
+        return _sigmoid(self.decision_function(X))
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.classifier:
+            return 2.0 * self.predict_proba(X) - 1.0
+        return self.decision_function(X)
+
+
+MODELS: Dict[str, Type[Any]] = {
+    "ridge": RidgeRegression,
+    "logistic": LogisticRegression,
+    "gbm": HistGradientBoosting,
+}
+
+
+def make_model(config: Mapping[str, Any]) -> Any:
+    #Instantiate the model named by config["model"] (default ridge) with the other keys.
+    kind = config.get("model", "ridge")
+    if kind not in MODELS:
+        raise KeyError(f"Unknown model {kind!r}; available: {sorted(MODELS)}")
+    return MODELS[kind](**{key: value for key, value in config.items() if key != "model"})
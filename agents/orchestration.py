@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+#Concurrent feature orchestration.
+
+#ConcurrentOrchestrationAgent asks every registered feature agent (historical,
+#technical, psycho-social, macro, ...) for features at the same time through
+#their acompute_features coroutines and merges what comes back, so a request
+#takes as long as the slowest agent rather than the sum of all of them. Each
+#agent call has its own timeout; an agent that times out or raises is left
+#out of the result and reported in get_symbol_state(). Panel requests keep
+#vectorized agents vectorized: an agent with compute_panel_features answers
+#the whole watchlist in one call instead of one call per symbol.
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Dict, List, Optional, Sequence, Tuple
+
+from .interfaces import Agent, Event, FeatureVector, OrchestrationAgent
+
+
+async def _agent_features(agent: Agent, symbol: str, as_of: datetime) -> List[FeatureVector]:
+    # Feature ABCs provide acompute_features; plain objects with only a sync
+    # compute_features are run in the loop's thread pool the same way.
+    compute = getattr(agent, "acompute_features", None)
+    if compute is not None:
+        result = await compute(symbol, as_of)
+    else:
+        result = await asyncio.to_thread(agent.compute_features, symbol, as_of)  # type: ignore[attr-defined]
+    if result is None:
+        return []
+    return list(result) if isinstance(result, (list, tuple)) else [result]
+
+
+def merge_feature_vectors(symbol: str, as_of: datetime, vectors: Sequence[FeatureVector]) -> FeatureVector:
+    #Collapse per-agent vectors into one; later vectors win on duplicate names.
+    features: Dict[str, float] = {}
+    agents: List[str] = []
+    for vector in vectors:
+        features.update(vector.features)
+        agent = (vector.meta or {}).get("agent")
+        if agent is not None and agent not in agents:
+            agents.append(agent)
+    return FeatureVector(symbol=symbol, ts=as_of, features=features, meta={"agents": agents})
+
+
+@dataclass
+class ConcurrentOrchestrationAgent(OrchestrationAgent):
+
+    #Fans feature requests out to all feature agents concurrently.
+
+    #feature_agents: name -> agent; results come back in this order with
+    #    meta["agent"] set to the name
+    #timeout: default per-agent timeout in seconds; `timeouts` overrides it
+    #    per agent name (None = no timeout)
+
+    #A timed-out agent running in a worker thread cannot be interrupted; its
+    #result is discarded when it eventually finishes.
+
+
+    feature_agents: Dict[str, Agent] = field(default_factory=dict)
+    timeout: Optional[float] = 30.0
+    timeouts: Dict[str, Optional[float]] = field(default_factory=dict)
+    _state: Dict[str, Dict[str, Any]] = field(default_factory=dict, init=False, repr=False)
+
+    def register_agent(self, name: str, agent: Agent, timeout: Optional[float] = None) -> None:
+        self.feature_agents[name] = agent
+        if timeout is not None:
+            self.timeouts[name] = timeout
+
+    # -- OrchestrationAgent interface ------------------------------------------
+
+    def handle_event(self, event: Event) -> None:
+        for agent in self.feature_agents.values():
+            agent.handle_event(event)
+
+    def tick(self, as_of: datetime) -> None:
+        for agent in self.feature_agents.values():
+            agent.tick(as_of)
+
+    def get_symbol_state(self, symbol: str) -> Dict[str, Any]:
+        #Last request for `symbol`: as_of, total latency and per-agent status.
+        state = self._state.get(symbol)
+        if state is None:
+            return {"symbol": symbol, "as_of": None, "agents": {}}
+        return {**state, "agents": {name: dict(status) for name, status in state["agents"].items()}}
+
+    def request_features(self, symbol: str, as_of: datetime) -> List[FeatureVector]:
+        #Blocking entry point; inside a running event loop await arequest_features.
+        return _run(self.arequest_features(symbol, as_of))
+
+    # -- Async API --------------------------------------------------------------
+
+    async def arequest_features(self, symbol: str, as_of: datetime) -> List[FeatureVector]:
+        started = time.perf_counter()
+        names = list(self.feature_agents)
+        outcomes = await asyncio.gather(*(self._call(name, symbol, as_of) for name in names))
+        return self._collect(symbol, as_of, started, dict(zip(names, outcomes)))
+
+    async def arequest_panel(self, symbols: Sequence[str], as_of: datetime) -> Dict[str, List[FeatureVector]]:
+
+        #Features for many symbols at once.
+
+        #Agents with a vectorized compute_panel_features (e.g. the historical
+        #agent) get one panel call for all symbols; the others get one
+        #acompute_features call per symbol. All calls are in flight together.
+
+        started = time.perf_counter()
+        names = list(self.feature_agents)
+        panel_names = [name for name in names if hasattr(self.feature_agents[name], "compute_panel_features")]
+        symbol_names = [name for name in names if name not in panel_names]
+        calls = [self._call_panel(name, symbols, as_of) for name in panel_names]
+        calls += [self._call(name, symbol, as_of) for symbol in symbols for name in symbol_names]
+        outcomes = await asyncio.gather(*calls)
+
+        panels = dict(zip(panel_names, outcomes[: len(panel_names)]))
+        per_symbol = iter(outcomes[len(panel_names) :])
+        results: Dict[str, List[FeatureVector]] = {}
+        for symbol in symbols:
+            by_name = {name: next(per_symbol) for name in symbol_names}
+            for name, (panel, status) in panels.items():
+                vectors = panel.get(symbol, [])
+                by_name[name] = (vectors, {**status, "vectors": len(vectors), "panel": True})
+            results[symbol] = self._collect(symbol, as_of, started, {name: by_name[name] for name in names})
+        return results
+
+    def request_panel(self, symbols: Sequence[str], as_of: datetime) -> Dict[str, List[FeatureVector]]:
+        return _run(self.arequest_panel(symbols, as_of))
+
+    def _collect(
+        self,
+        symbol: str,
+        as_of: datetime,
+        started: float,
+        outcomes: Dict[str, Tuple[List[FeatureVector], Dict[str, Any]]],
+    ) -> List[FeatureVector]:
+        # Tag vectors with their agent name and record the request in _state.
+        vectors: List[FeatureVector] = []
+        statuses: Dict[str, Dict[str, Any]] = {}
+        for name, (result, status) in outcomes.items():
+            statuses[name] = status
+            for vector in result:
+                vector.meta = {**(vector.meta or {}), "agent": name}
+                vectors.append(vector)
+        self._state[symbol] = {
+            "symbol": symbol,
+            "as_of": as_of,
+            "latency": time.perf_counter() - started,
+            "agents": statuses,
+        }
+        return vectors
+
+    async def _call(self, name: str, symbol: str, as_of: datetime) -> Tuple[List[FeatureVector], Dict[str, Any]]:
+        result, status = await self._timed(name, _agent_features(self.feature_agents[name], symbol, as_of))
+        return result or [], {**status, "vectors": len(result or [])}
+
+    async def _call_panel(
+        self, name: str, symbols: Sequence[str], as_of: datetime
+    ) -> Tuple[Dict[str, List[FeatureVector]], Dict[str, Any]]:
+        agent = self.feature_agents[name]
+        result, status = await self._timed(name, asyncio.to_thread(agent.compute_panel_features, list(symbols), as_of))  # type: ignore[attr-defined]
+        return result or {}, status
+
+    async def _timed(self, name: str, call: Awaitable[Any]) -> Tuple[Any, Dict[str, Any]]:
+        # (result, status); the result is None when the call timed out or raised.
+        timeout = self.timeouts.get(name, self.timeout)
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            return None, {"status": "timeout", "latency": time.perf_counter() - started}
+        except Exception as exc:
+            return None, {"status": "error", "latency": time.perf_counter() - started, "error": repr(exc)}
+        return result, {"status": "ok", "latency": time.perf_counter() - started}
+
+
+def _run(coro: Any) -> Any:
+    # Like asyncio.run, but closing the loop does not wait for worker threads of
+    # timed-out agents: their results are unused, so the request returns now.
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        coro.close()
+        raise RuntimeError("Called from a running event loop; await the async variant instead")
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
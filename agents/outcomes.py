@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+#Vectorized outcome labeling.
+
+#A prediction made at ts for horizon h is labelled from two as-of lookups into
+#the symbol's closes: the entry is the last close at or before ts, the exit
+#the last close at or before ts + h. Horizons use the same lengths as the
+#historical agent ("1d", "1w", "1m" = 30 days, ...). Both lookups are one
+#np.searchsorted over every (prediction, horizon) pair of a symbol, so a
+#year of hourly predictions across three horizons labels in milliseconds.
+
+#A horizon is still open while no bar at or after ts + h has been stored (the
+#exit close could still change). OutcomeLabeler keeps such predictions
+#pending and labels them on a later resolve() call. A closed horizon with no
+#entry bar (no stored close in the week up to ts) cannot be labelled; those
+#predictions are returned separately and collected in `unlabeled`.
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .frames import to_datetime64
+from .historical import _horizon_offset
+from .interfaces import Outcome, Prediction
+from .price_service import PriceService, default_price_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HORIZONS: Tuple[str, ...] = ("1d", "1w", "1m")
+
+
+def horizon_ns(horizon: str) -> int:
+    offset = _horizon_offset(horizon)
+    if offset is None:
+        raise ValueError(f"Unknown horizon {horizon!r}")
+    return int(pd.Timedelta(offset).value)
+
+
+def label_returns(
+    bar_ts: np.ndarray,
+    closes: np.ndarray,
+    pred_ts: np.ndarray,
+    horizons: np.ndarray,
+    threshold: float = 0.0,
+) -> Dict[str, np.ndarray]:
+
+    #Realized returns and labels for predictions against one price series.
+
+    #bar_ts: sorted int64 ns bar timestamps; closes: matching close prices
+    #pred_ts / horizons: int64 ns, broadcastable (e.g. (n, 1) and (1, k))
+    #Returns arrays of the broadcast shape:
+    #    realized: close[exit] / close[entry] - 1 (NaN if open or no entry bar)
+    #    label: 1 above +threshold, -1 below -threshold, else 0 (0 when NaN)
+    #    open: True while the horizon end is after the last stored bar
+    #    ts_outcome: horizon end (int64 ns)
+
+    pred_ts, horizons = np.broadcast_arrays(np.asarray(pred_ts, dtype=np.int64), np.asarray(horizons, dtype=np.int64))
+    exit_ts = pred_ts + horizons
+    entry = np.searchsorted(bar_ts, pred_ts, side="right") - 1
+    exit = np.searchsorted(bar_ts, exit_ts, side="right") - 1
+    last = bar_ts[-1] if len(bar_ts) else np.iinfo(np.int64).min
+    still_open = exit_ts > last
+    valid = (entry >= 0) & ~still_open
+    realized = np.full(pred_ts.shape, np.nan)
+    if len(closes):
+        realized[valid] = closes[exit[valid]] / closes[entry[valid]] - 1.0
+    label = np.zeros(pred_ts.shape, dtype=np.int8)
+    label[realized > threshold] = 1
+    label[realized < -threshold] = -1
+    return {"realized": realized, "label": label, "open": still_open, "ts_outcome": exit_ts}
+
+
+@dataclass
+class OutcomeLabeler:
+
+    #Labels predictions from the shared price service, deferring open horizons.
+
+    #threshold: |return| at or below it is labelled 0 (flat)
+    #tolerance: how stale cached prices may be (see PriceService.get_history)
+    #pending: predictions whose horizon was still open at the last resolve()
+    #unlabeled: predictions resolve() found no entry bar for
+
+
+    price_service: Optional[PriceService] = None
+    threshold: float = 0.0
+    tolerance: timedelta = timedelta(hours=1)
+    pending: List[Prediction] = field(default_factory=list)
+    unlabeled: List[Prediction] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if self.price_service is None:
+            self.price_service = default_price_service()
+
+    def label(
+        self,
+        symbols: Union[str, Sequence[str]],
+        ts: Union[Sequence[datetime], np.ndarray, pd.DatetimeIndex],
+        horizons: Sequence[str] = DEFAULT_HORIZONS,
+        as_of: Optional[datetime] = None,
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+
+        #Label every prediction time for every horizon in one pass per symbol.
+
+        #`symbols` is one symbol or one per timestamp. Returns, per horizon,
+        #the arrays of label_returns() aligned with `ts`. Prices are read up
+        #to `as_of` (default: now), so later bars cannot leak into a label.
+
+        pred_ts = to_datetime64(ts).astype(np.int64)
+        names = np.full(len(pred_ts), symbols, dtype=object) if isinstance(symbols, str) else np.asarray(symbols, dtype=object)
+        if len(names) != len(pred_ts):
+            raise ValueError("symbols and ts must have the same length")
+        steps = np.array([horizon_ns(h) for h in horizons], dtype=np.int64)
+        as_of_ns = int(to_datetime64([as_of or datetime.utcnow()])[0].astype(np.int64))
+
+        out = {
+            "realized": np.full((len(pred_ts), len(steps)), np.nan),
+            "label": np.zeros((len(pred_ts), len(steps)), dtype=np.int8),
+            "open": np.ones((len(pred_ts), len(steps)), dtype=bool),
+            "ts_outcome": pred_ts[:, None] + steps[None, :],
+        }
+        for symbol in dict.fromkeys(names):
+            rows = np.flatnonzero(names == symbol)
+            bar_ts, closes = self._closes(symbol, int(pred_ts[rows].min()), as_of_ns)
+            result = label_returns(bar_ts, closes, pred_ts[rows, None], steps[None, :], self.threshold)
+            for key in ("realized", "label", "open"):
+                out[key][rows] = result[key]
+        return {
+            horizon: {key: values[:, j] for key, values in out.items()}
+            for j, horizon in enumerate(horizons)
+        }
+
+    def label_predictions(
+        self, predictions: Sequence[Prediction], as_of: Optional[datetime] = None
+    ) -> Tuple[List[Outcome], List[Prediction], List[Prediction]]:
+        #(outcomes, still-open predictions, predictions with no entry bar).
+        outcomes: List[Outcome] = []
+        still_open: List[Prediction] = []
+        unlabeled: List[Prediction] = []
+        by_horizon: Dict[str, List[int]] = {}
+        for i, prediction in enumerate(predictions):
+            by_horizon.setdefault(prediction.horizon, []).append(i)
+        for horizon, positions in by_horizon.items():
+            group = [predictions[i] for i in positions]
+            labels = self.label(
+                [p.symbol for p in group], [p.ts for p in group], horizons=(horizon,), as_of=as_of
+            )[horizon]
+            ts_outcome = pd.DatetimeIndex(labels["ts_outcome"].view("datetime64[ns]")).to_pydatetime()
+            for k, prediction in enumerate(group):
+                if labels["open"][k]:
+                    still_open.append(prediction)
+                elif np.isfinite(labels["realized"][k]):
+                    outcomes.append(
+                        Outcome(
+                            symbol=prediction.symbol,
+                            ts_pred=prediction.ts,
+                            ts_outcome=ts_outcome[k],
+                            realized_return=float(labels["realized"][k]),
+                            label=int(labels["label"][k]),
+                            prediction=prediction,
+                        )
+                    )
+                else:
+                    unlabeled.append(prediction)
+        return outcomes, still_open, unlabeled
+
+    def submit(self, predictions: Sequence[Prediction]) -> None:
+        #Queue predictions to be labelled by resolve() once their horizons close.
+        self.pending.extend(predictions)
+
+    def resolve(self, as_of: Optional[datetime] = None) -> List[Outcome]:
+        #Label every pending prediction whose horizon has closed; keep the rest pending.
+        if not self.pending:
+            return []
+        outcomes, self.pending, unlabeled = self.label_predictions(self.pending, as_of)
+        if unlabeled:
+            logger.warning("%d predictions have no entry bar and cannot be labelled", len(unlabeled))
+            self.unlabeled.extend(unlabeled)
+        return outcomes
+
+    def _closes(self, symbol: str, start_ns: int, end_ns: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Entry bars may precede the first prediction (weekends, holidays).
+        start = pd.Timestamp(start_ns).to_pydatetime() - timedelta(days=7)
+        end = pd.Timestamp(end_ns).to_pydatetime()
+        bars = self.price_service.get_history(symbol, start, end, tolerance=self.tolerance)
+        closes = bars["Close"].dropna()
+        return closes.index.as_unit("ns").asi8, closes.to_numpy(dtype="float64")
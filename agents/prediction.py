@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+#Reference ML Prediction Agent (z).
+
+#ModelPredictionAgent trains the array models of agents/models.py (ridge,
+#logistic, histogram gradient boosting) on (FeatureVector, Outcome) pairs and
+#scores FeatureFrames. All scoring goes through one path (score_frame): the frame is
+#aligned to the model's feature schema (a no-op when the interned schemas are
+#identical) and the whole matrix is scored in one call. predict() and
+#batch_predict() build a frame and take the same path.
+
+#Model outputs are mapped onto Prediction fields as follows:
+#    regression: expected_return = prediction, prob_up from the prediction
+#        scaled by the training residual spread
+#    classifier: prob_up = P(up), expected_return = (2 * prob_up - 1) times the
+#        mean absolute training return
+#    confidence = |2 * prob_up - 1|
+
+#With a ModelRegistry (agents/model_registry.py) trained models are saved to
+#disk, set_active_model can activate any stored model, and tick() follows
+#new promotions (ModelRegistry.promote) made by any process. The candidate
+#is fully loaded before the active reference is replaced, so requests never
+#wait on a load and always see either the old or the new model.
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .frames import FeatureFrame
+from .interfaces import Event, FeatureVector, Outcome, Prediction, PredictionAgent
+from .models import _sigmoid, make_model
+from .records import FeatureSchema
+
+if TYPE_CHECKING:
+    from .model_registry import ModelRegistry
+
+DEFAULT_MODEL_CONFIG: Dict[str, Any] = {"model": "ridge", "alpha": 1.0}
+
+# Logistic approximation of the normal CDF: P(z > 0) ~ sigmoid(1.702 z).
+_PROBIT_SCALE = 1.702
+
+
+@dataclass
+class TrainedModel:
+
+    #A fitted model plus what is needed to turn its scores into Predictions.
+
+
+    model_id: str
+    model: Any
+    schema: FeatureSchema
+    config: Dict[str, Any]
+    horizon: str
+    return_scale: float
+    trained_at: datetime
+    symbol: Optional[str] = None
+
+    @property
+    def classifier(self) -> bool:
+        return bool(self.model.classifier)
+
+
+@dataclass
+class ModelPredictionAgent(PredictionAgent):
+
+    #Prediction agent over the NumPy models in agents/models.py.
+
+    #horizon: horizon label stamped on every Prediction (e.g. "1d")
+    #models: model_id -> TrainedModel; the first trained model becomes active
+    #registry: optional on-disk registry; with one, `models` only holds the
+    #    active model and the registry's warm models
+
+
+    horizon: str = "1d"
+    models: Dict[str, TrainedModel] = field(default_factory=dict)
+    active_model_id: Optional[str] = None
+    registry: Optional["ModelRegistry"] = None
+    _current: Optional[TrainedModel] = field(default=None, init=False, repr=False)
+    _seen_promotion: Optional[str] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.registry is not None:
+            self.registry.preload_latest()
+            self._seen_promotion = self.registry.active_model_id()
+            if self.active_model_id is None:
+                self.active_model_id = self._seen_promotion
+        if self.active_model_id is not None:
+            self.set_active_model(self.active_model_id)
+
+    # -- PredictionAgent interface ----------------------------------------------
+
+    def handle_event(self, event: Event) -> None:  # pragma: no cover - no RT events yet
+        return
+
+    def tick(self, as_of: datetime) -> None:
+        # Follow new promotions in the registry; a model activated locally stays
+        # active until the registry's ACTIVE id changes again.
+        if self.registry is None:
+            return
+        promoted = self.registry.active_model_id()
+        if promoted == self._seen_promotion:
+            return
+        self._seen_promotion = promoted
+        if promoted is not None and promoted != self.active_model_id:
+            self.set_active_model(promoted)
+
+    def predict(self, features: FeatureVector) -> Prediction:
+        return self.batch_predict([features])[0]
+
+    def batch_predict(self, features_list: List[FeatureVector]) -> List[Prediction]:
+        model = self._active()
+        return self.batch_predict_frame(FeatureFrame.from_feature_vectors(features_list, columns=model.schema.names))
+
+    def batch_predict_frame(self, frame: FeatureFrame) -> List[Prediction]:
+        trained = self._active()
+        scores = _score(trained, frame)
+        model_id = trained.model_id
+        ts = pd.DatetimeIndex(frame.ts).to_pydatetime()
+        return [
+            Prediction(
+                symbol=frame.symbols[i],
+                ts=ts[i],
+                horizon=self.horizon,
+                expected_return=float(scores["expected_return"][i]),
+                prob_up=float(scores["prob_up"][i]),
+                prob_down=float(1.0 - scores["prob_up"][i]),
+                confidence=float(scores["confidence"][i]),
+                model_id=model_id,
+            )
+            for i in range(len(frame))
+        ]
+
+    def train(
+        self,
+        symbol: str,
+        training_data: Iterable[Tuple[FeatureVector, Outcome]],
+        config: Dict[str, Any],
+    ) -> str:
+        pairs = list(training_data)
+        frame = FeatureFrame.from_feature_vectors([vector for vector, _ in pairs])
+        targets = np.array([outcome.realized_return for _, outcome in pairs], dtype="float64")
+        return self.train_frame(symbol, frame, targets, config)
+
+    def set_active_model(self, model_id: str) -> None:
+        # Load (and fault in) the candidate first; the swap is one reference assignment.
+        trained = self.models.get(model_id)
+        if trained is None:
+            if self.registry is None:
+                raise KeyError(f"Unknown model_id {model_id!r}")
+            trained = self.models[model_id] = self.registry.load(model_id)
+        self._current = trained
+        self.active_model_id = model_id
+        if self.registry is not None:
+            keep = {model_id, *self.registry.warm_ids()}
+            for stale in [other for other in self.models if other not in keep]:
+                del self.models[stale]
+
+    def get_active_model(self) -> str:
+        return self._active().model_id
+
+    # -- Array API --------------------------------------------------------------
+
+    def train_frame(
+        self,
+        symbol: Optional[str],
+        frame: FeatureFrame,
+        targets: np.ndarray,
+        config: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        #Fit a model on frame.values against realized returns; returns its model_id.
+        config = dict(config or DEFAULT_MODEL_CONFIG)
+        targets = np.asarray(targets, dtype="float64")
+        model = make_model(config).fit(frame.values, targets)
+        finite = targets[np.isfinite(targets)]
+        if model.classifier:
+            scale = float(np.abs(finite).mean()) if len(finite) else 0.0
+        else:
+            residuals = finite - model.predict(frame.values[np.isfinite(targets)])
+            scale = float(residuals.std()) if len(residuals) > 1 else 0.0
+        model_id = f"{config.get('model', 'ridge')}-{symbol or 'all'}-{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.models[model_id] = TrainedModel(
+            model_id=model_id,
+            model=model,
+            schema=frame.schema,
+            config=config,
+            horizon=self.horizon,
+            return_scale=scale,
+            trained_at=datetime.utcnow(),
+            symbol=symbol,
+        )
+        if self.registry is not None:
+            self.registry.save(self.models[model_id])
+        if self.active_model_id is None:
+            self.set_active_model(model_id)
+        return model_id
+
+    def score_frame(self, frame: FeatureFrame, model_id: Optional[str] = None) -> Dict[str, np.ndarray]:
+        #expected_return / prob_up / confidence arrays for every row, in one pass.
+        return _score(self.models[model_id] if model_id is not None else self._active(), frame)
+
+    def _active(self) -> TrainedModel:
+        if self._current is None:
+            raise RuntimeError("No model has been trained or activated")
+        return self._current
+
+
+def _score(trained: TrainedModel, frame: FeatureFrame) -> Dict[str, np.ndarray]:
+    if frame.schema is not trained.schema:
+        frame = frame.select(trained.schema.names)
+    model = trained.model
+    if trained.classifier:
+        prob_up = model.predict_proba(frame.values)
+        expected = (2.0 * prob_up - 1.0) * trained.return_scale
+    else:
+        expected = model.predict(frame.values)
+        if trained.return_scale > 0:
+            prob_up = _sigmoid(_PROBIT_SCALE * expected / trained.return_scale)
+        else:
+            prob_up = np.where(expected > 0, 1.0, np.where(expected < 0, 0.0, 0.5))
+    return {"expected_return": expected, "prob_up": prob_up, "confidence": np.abs(2.0 * prob_up - 1.0)}
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+#In-process, range-aware price cache used by the yfinance-backed agents.
+
+#The cache remembers which [start, end] intervals have been fetched for each
+#symbol and serves any request inside that coverage without touching the
+#price store or the network, regardless of the `as_of` that triggered the
+#original fetch. Fetches never reach past the requested end: a backtest
+#walking `as_of` backwards has each fetch widened back by `backfill`, while
+#one walking forwards fetches only the new tail per step, so warm the whole
+#range first (PriceService.prefetch / the agents' prefetch) to serve every
+#step from memory.
+
+#Memory is bounded: symbols are evicted least-recently-used first once the
+#cached frames exceed `max_bytes`, and values can be held as float32.
+
+#Every method takes the cache's lock, so one cache can be shared by agents
+#running on several threads.
+
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .price_store import CoverageIndex
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    symbols: int = 0
+    nbytes: int = 0
+    max_bytes: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Optional[int]]:
+        return asdict(self)
+
+
+class RangePriceCache:
+
+    #Per-symbol price frames plus the merged intervals they cover.
+
+    #max_bytes: memory budget for cached frames (None = unbounded). The most
+    #    recently inserted symbol is never evicted, even if it alone exceeds it.
+    #dtype: storage dtype for price columns; "float32" halves memory at the
+    #    cost of ~7 significant digits.
+
+
+    def __init__(self, max_bytes: Optional[int] = None, dtype: str = "float64") -> None:
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        self._frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._coverage: Dict[str, CoverageIndex] = {}
+        self._sizes: Dict[str, int] = {}
+        self._stats = CacheStats(max_bytes=max_bytes)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def nbytes(self) -> int:
+        return self._stats.nbytes
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**{**asdict(self._stats), "symbols": len(self._frames)})
+
+    def evict(self, symbol: str) -> None:
+        #Drop a symbol and its coverage (the next request refetches from the store).
+        with self._lock:
+            key = symbol.upper()
+            if key in self._frames:
+                del self._frames[key]
+                self._stats.nbytes -= self._sizes.pop(key)
+                self._coverage.pop(key, None)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._frames
+
+    def coverage(self, symbol: str) -> CoverageIndex:
+        return self._coverage.get(symbol.upper(), CoverageIndex())
+
+    def get(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        #Return cached bars in [start, end] (empty if nothing is cached).
+        with self._lock:
+            key = symbol.upper()
+            df = self._frames.get(key)
+            if df is None:
+                return pd.DataFrame()
+            self._frames.move_to_end(key)
+            # Positional slicing returns a view of the cached frame, not a copy.
+            lo = df.index.searchsorted(start, side="left")
+            hi = df.index.searchsorted(end, side="right")
+            return df.iloc[lo:hi]
+
+    def put(
+        self,
+        symbol: str,
+        df: pd.DataFrame,
+        start: datetime,
+        end: datetime,
+        covered: Optional[Sequence[Tuple[datetime, datetime]]] = None,
+    ) -> None:
+
+        #Merge bars fetched for [start, end] into the cache.
+
+        #`covered` lists the parts of [start, end] the bars are complete for
+        #(e.g. PriceStore.covered); by default all of it unless `df` is empty,
+        #since an empty fetch may just have failed. Uncovered parts are
+        #fetched again on the next request that needs them.
+
+        key = symbol.upper()
+        if covered is None:
+            covered = [] if df.empty else [(start, end)]
+        df = df.astype({column: self.dtype for column in df.columns if df[column].dtype.kind == "f"}, copy=False)
+        with self._lock:
+            existing = self._frames.get(key)
+            if existing is not None and not existing.empty:
+                df = pd.concat([existing[~existing.index.isin(df.index)], df]).sort_index()
+                self._stats.nbytes -= self._sizes[key]
+            self._frames[key] = df
+            self._frames.move_to_end(key)
+            self._sizes[key] = int(df.memory_usage(index=True, deep=False).sum())
+            self._stats.nbytes += self._sizes[key]
+            coverage = self._coverage.setdefault(key, CoverageIndex())
+            for lo, hi in covered:
+                coverage.add(lo, hi)
+            self._enforce_budget()
+
+    def put_and_get(
+        self,
+        symbol: str,
+        df: pd.DataFrame,
+        fetched: Tuple[datetime, datetime],
+        start: datetime,
+        end: datetime,
+        covered: Optional[Sequence[Tuple[datetime, datetime]]] = None,
+    ) -> pd.DataFrame:
+        #put() the bars fetched for `fetched` and return get(start, end) under one
+        #lock hold, so another thread's put cannot evict them in between.
+        with self._lock:
+            self.put(symbol, df, *fetched, covered=covered)
+            return self.get(symbol, start, end)
+
+    def _enforce_budget(self) -> None:
+        if self.max_bytes is None:
+            return
+        while self._stats.nbytes > self.max_bytes and len(self._frames) > 1:
+            oldest = next(iter(self._frames))
+            self.evict(oldest)
+            self._stats.evictions += 1
+
+    def missing_span(
+        self,
+        symbol: str,
+        start: datetime,
+        end: datetime,
+        tolerance: timedelta = timedelta(0),
+        backfill: timedelta = timedelta(0),
+        count: bool = True,
+    ) -> Optional[Tuple[datetime, datetime]]:
+
+        #Return the span to fetch so that [start, end] is covered, or None.
+
+        #`tolerance` lets a request end slightly past the covered range (data at
+        #most that stale is acceptable). When the cache already holds data the
+        #fetch is widened backwards by `backfill` so backward sweeps do not
+        #fetch one bar at a time; it never extends past `end`. With
+        #count=False the lookup is not recorded in the hit/miss stats (the
+        #caller records the outcome with count()).
+
+        with self._lock:
+            span = self._missing_span(symbol, start, end, tolerance, backfill)
+            if count:
+                self.count(hits=int(span is None), misses=int(span is not None))
+            return span
+
+    def lookup(
+        self,
+        symbol: str,
+        start: datetime,
+        end: datetime,
+        tolerance: timedelta = timedelta(0),
+        backfill: timedelta = timedelta(0),
+    ) -> Tuple[Optional[Tuple[datetime, datetime]], pd.DataFrame]:
+        #Uncounted missing_span() plus, when nothing is missing, the bars in
+        #[start, end] read under the same lock hold (an empty frame otherwise).
+        with self._lock:
+            span = self._missing_span(symbol, start, end, tolerance, backfill)
+            return span, (self.get(symbol, start, end) if span is None else pd.DataFrame())
+
+    def count(self, hits: int = 0, misses: int = 0, coalesced: int = 0) -> None:
+        #Record lookups; `coalesced` ones were served by another caller's fetch.
+        with self._lock:
+            self._stats.hits += hits
+            self._stats.misses += misses
+            self._stats.coalesced += coalesced
+
+    def _missing_span(
+        self, symbol: str, start: datetime, end: datetime, tolerance: timedelta, backfill: timedelta
+    ) -> Optional[Tuple[datetime, datetime]]:
+        coverage = self.coverage(symbol)
+        gaps = coverage.gaps(start, end)
+        if not gaps:
+            return None
+        if not coverage:
+            return start, end
+
+        if gaps[-1][0] >= coverage.end and end - coverage.end <= tolerance:
+            gaps = gaps[:-1]
+            if not gaps:
+                return None
+
+        fetch_start, fetch_end = gaps[0][0], gaps[-1][1]
+        if fetch_start < coverage.start:
+            fetch_start -= backfill
+        return fetch_start, fetch_end
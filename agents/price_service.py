@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+#Shared price service injected into the price-consuming agents.
+
+#One PriceService owns the on-disk PriceStore and a single in-process
+#RangePriceCache. Agents with different lookbacks ask it for [start, end]
+#windows and receive slices of the same cached frame, so a symbol is
+#downloaded and held in memory once no matter how many agents read it.
+
+#Fetches are single-flight per symbol: while one thread fetches a symbol,
+#other threads asking for it wait for that fetch and then read the cache, so
+#a burst of N concurrent identical requests triggers one download. The cache
+#stats count the fetch as one miss and the waiters as `coalesced`.
+
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .price_cache import RangePriceCache
+from .price_store import PriceStore
+
+
+class _Flight:
+
+    #One in-progress fetch; waiters block on `done` and re-raise `error`.
+
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> None:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+
+
+@dataclass
+class PriceService:
+
+    #Store + range cache behind one get_history/prefetch API.
+
+    #`tolerance` and `backfill` are per call because they depend on the
+    #consumer: how stale its data may be and how far back it reaches.
+
+
+    store: PriceStore = field(default_factory=PriceStore)
+    cache: RangePriceCache = field(default_factory=RangePriceCache)
+    _inflight: Dict[str, _Flight] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def get_history(
+        self,
+        symbol: str,
+        start: datetime,
+        end: datetime,
+        tolerance: timedelta = timedelta(0),
+        backfill: timedelta = timedelta(0),
+    ) -> pd.DataFrame:
+        #Return bars in [start, end], fetching through the store only on a cache miss.
+        key = symbol.upper()
+        waited = False
+        while True:
+            with self._lock:
+                span, cached = self.cache.lookup(symbol, start, end, tolerance=tolerance, backfill=backfill)
+                if span is None:
+                    self.cache.count(hits=int(not waited), coalesced=int(waited))
+                    return cached
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[key] = _Flight()
+            if leader:
+                self.cache.count(misses=1)
+                break
+            # Another thread is fetching this symbol; its result may already cover us.
+            waited = True
+            flight.wait()
+
+        try:
+            bars = self.store.get_history(symbol, *span)
+            return self.cache.put_and_get(symbol, bars, span, start, end, covered=self.store.covered(symbol, *span))
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            self._land(flight, [key])
+
+    def prefetch(
+        self,
+        symbols: Sequence[str],
+        start: datetime,
+        end: datetime,
+        tolerance: timedelta = timedelta(0),
+        backfill: timedelta = timedelta(0),
+    ) -> None:
+        #Load [start, end] for every symbol, downloading all cache misses in one batch.
+        spans: Dict[str, Tuple[datetime, datetime]] = {}
+        waits: List[_Flight] = []
+        flight = _Flight()
+        with self._lock:
+            for symbol in symbols:
+                span = self.cache.missing_span(symbol, start, end, tolerance=tolerance, backfill=backfill, count=False)
+                other = self._inflight.get(symbol.upper())
+                if span is None:
+                    self.cache.count(hits=1)
+                elif other is None:
+                    spans[symbol] = span
+                    self._inflight[symbol.upper()] = flight
+                    self.cache.count(misses=1)
+                elif other is not flight:
+                    waits.append(other)
+                    self.cache.count(coalesced=1)
+
+        if spans:
+            try:
+                self.store.prefetch(list(spans), min(lo for lo, _ in spans.values()), max(hi for _, hi in spans.values()))
+                for symbol, span in spans.items():
+                    bars = self.store.get_history(symbol, *span)
+                    self.cache.put(symbol, bars, *span, covered=self.store.covered(symbol, *span))
+            except BaseException as exc:
+                flight.error = exc
+                raise
+            finally:
+                self._land(flight, [symbol.upper() for symbol in spans])
+        for other in dict.fromkeys(waits):
+            other.wait()
+
+    def _land(self, flight: _Flight, keys: Sequence[str]) -> None:
+        # Clear the in-flight entries before waking waiters so they re-check the cache.
+        with self._lock:
+            for key in keys:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+        flight.done.set()
+
+
+_DEFAULT_SERVICE: Optional[PriceService] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_price_service() -> PriceService:
+
+    #Process-wide PriceService used by agents that are not given one explicitly.
+
+    #HERMES_PRICE_CACHE_MB bounds its in-memory cache (unbounded if unset) and
+    #HERMES_PRICE_CACHE_DTYPE selects the storage dtype (default float64).
+
+    global _DEFAULT_SERVICE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_SERVICE is None:
+            budget_mb = os.getenv("HERMES_PRICE_CACHE_MB")
+            cache = RangePriceCache(
+                max_bytes=int(float(budget_mb) * 1024 * 1024) if budget_mb else None,
+                dtype=os.getenv("HERMES_PRICE_CACHE_DTYPE", "float64"),
+            )
+            _DEFAULT_SERVICE = PriceService(cache=cache)
+        return _DEFAULT_SERVICE
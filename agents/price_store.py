@@ -0,0 +1,392 @@
+from __future__ import annotations
+
+#On-disk columnar price store shared by the yfinance-backed agents.
+
+#Each symbol lives in its own directory with one raw binary file per column
+#(int64 nanosecond timestamps plus float64 OHLCV) and a small JSON manifest.
+#Columns are read back as read-only memory maps, so a warm store costs no
+#parsing and no network I/O. Refreshing a symbol only downloads the bars
+#after the last stored timestamp and appends them in place.
+
+#Fetches and writes hold a per-symbol lock, so threads sharing a store never
+#download the same gap twice or interleave appends to the same files.
+
+import json
+import os
+import threading
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from .timeframes import PRICE_COLUMNS
+
+
+_INDEX_FILE = "index.i8"
+_MANIFEST_FILE = "manifest.json"
+_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _default_store_dir() -> Path:
+    return Path(os.getenv("HERMES_PRICE_STORE", _ROOT / "outputs" / "price_store"))
+
+
+def _to_naive_utc(index: pd.Index) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(pd.to_datetime(index))
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.as_unit("ns")
+
+
+def _empty_frame() -> pd.DataFrame:
+    return pd.DataFrame(columns=list(PRICE_COLUMNS), index=pd.DatetimeIndex([], dtype="datetime64[ns]"), dtype="float64")
+
+
+def _normalize_download(data: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    #Flatten a yf.download result into a sorted OHLCV frame for one symbol.
+    if data is None or data.empty:
+        return _empty_frame()
+
+    if isinstance(data.columns, pd.MultiIndex):
+        # Recent yfinance versions return (field, ticker) columns even for a single ticker.
+        tickers = {str(ticker).upper(): ticker for ticker in data.columns.get_level_values(1)}
+        if symbol.upper() not in tickers:
+            return _empty_frame()
+        data = data.xs(tickers[symbol.upper()], axis=1, level=1)
+
+    df = pd.DataFrame(index=_to_naive_utc(data.index))
+    for column in PRICE_COLUMNS:
+        values = data[column].to_numpy(dtype="float64") if column in data.columns else np.nan
+        df[column] = values
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    return df.dropna(subset=["Close"])
+
+
+def download_ohlcv(symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+    #Download daily OHLCV bars for `symbol` covering [start, end] (inclusive dates).
+    data = yf.download(
+        symbol,
+        start=start.strftime("%Y-%m-%d"),
+        end=(end + timedelta(days=1)).strftime("%Y-%m-%d"),
+        progress=False,
+        auto_adjust=True,
+    )
+    return _normalize_download(data, symbol)
+
+
+def download_ohlcv_batch(symbols: Sequence[str], start: datetime, end: datetime) -> Dict[str, pd.DataFrame]:
+    #Download daily OHLCV bars for several symbols with a single request.
+    data = yf.download(
+        list(symbols),
+        start=start.strftime("%Y-%m-%d"),
+        end=(end + timedelta(days=1)).strftime("%Y-%m-%d"),
+        progress=False,
+        auto_adjust=True,
+        group_by="column",
+    )
+    return {symbol: _normalize_download(data, symbol) for symbol in symbols}
+
+
+def _fetched_span(start: datetime, end: datetime, bars: pd.DataFrame) -> Optional[Tuple[datetime, datetime]]:
+    # The span a download may be marked as covering. An empty result is
+    # indistinguishable from a failed request, so it covers nothing. Days
+    # before today are final once the request returned data; anything later
+    # is only known up to the last returned bar.
+    if bars.empty:
+        return None
+    return start, min(end, max(bars.index[-1].to_pydatetime(), _today()))
+
+
+def _today() -> datetime:
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class CoverageIndex:
+
+    #Sorted, disjoint [start, end] intervals of time already fetched for a symbol.
+
+    #Overlapping or touching intervals are merged on insert, so the index stays
+    #small no matter how many overlapping requests have been served.
+
+
+    def __init__(self, intervals: Iterable[Tuple[datetime, datetime]] = ()) -> None:
+        self._intervals: List[Tuple[datetime, datetime]] = []
+        for start, end in intervals:
+            self.add(start, end)
+
+    def __bool__(self) -> bool:
+        return bool(self._intervals)
+
+    def __iter__(self):
+        return iter(self._intervals)
+
+    @property
+    def start(self) -> Optional[datetime]:
+        return self._intervals[0][0] if self._intervals else None
+
+    @property
+    def end(self) -> Optional[datetime]:
+        return self._intervals[-1][1] if self._intervals else None
+
+    def add(self, start: datetime, end: datetime) -> None:
+        merged: List[Tuple[datetime, datetime]] = []
+        for lo, hi in self._intervals:
+            if hi < start or lo > end:
+                merged.append((lo, hi))
+            else:
+                start, end = min(lo, start), max(hi, end)
+        merged.append((start, end))
+        self._intervals = sorted(merged)
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return not self.gaps(start, end)
+
+    def gaps(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        #Return the sub-intervals of [start, end] not yet covered.
+        missing: List[Tuple[datetime, datetime]] = []
+        cursor = start
+        for lo, hi in self._intervals:
+            if hi < cursor:
+                continue
+            if lo > end:
+                break
+            if lo > cursor:
+                missing.append((cursor, lo))
+            cursor = max(cursor, hi)
+            if cursor >= end:
+                return missing
+        if cursor < end:
+            missing.append((cursor, end))
+        return missing
+
+    def to_json(self) -> List[List[str]]:
+        return [[lo.isoformat(), hi.isoformat()] for lo, hi in self._intervals]
+
+    @classmethod
+    def from_json(cls, data: Iterable[Iterable[str]]) -> "CoverageIndex":
+        return cls((datetime.fromisoformat(lo), datetime.fromisoformat(hi)) for lo, hi in data)
+
+
+@dataclass
+class PriceStore:
+
+    #Per-symbol columnar price store with incremental delta fetch.
+
+    #Layout:
+    #    <root>/<SYMBOL>/index.i8      int64 bar timestamps (ns, naive UTC)
+    #    <root>/<SYMBOL>/<Column>.f8   float64 values for each OHLCV column
+    #    <root>/<SYMBOL>/manifest.json row count, requested coverage intervals
+    #                                  and a version counter bumped on every write
+
+    #The manifest is rewritten last, so readers never see rows beyond the
+    #last complete append.
+
+
+    root: Path = field(default_factory=_default_store_dir)
+    _locks: Dict[str, threading.Lock] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _locks_guard: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.root = Path(self.root)
+
+    # --- Public API ------------------------------------------------------------
+
+    def get_history(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+
+        #Return stored bars in [start, end], downloading only what is missing.
+
+        #Only the gaps between already-covered intervals are downloaded. A gap
+        #past the last stored bar is fetched from that bar onwards (it is
+        #refetched because an intraday bar may still have been in progress).
+
+        key = symbol.upper()
+        with self._symbol_lock(key):
+            coverage = self.coverage(key)
+            for gap_start, gap_end in coverage.gaps(start, end):
+                last_ts = self.last_timestamp(key)
+                if last_ts is not None and gap_start >= last_ts:
+                    gap_start = last_ts.to_pydatetime()
+                bars = download_ohlcv(symbol, gap_start, gap_end)
+                span = _fetched_span(gap_start, gap_end, bars)
+                if span is None:
+                    continue
+                coverage.add(*span)
+                self._merge(key, bars, coverage)
+
+        df = self.load(key)
+        return df[(df.index >= start) & (df.index <= end)]
+
+    def prefetch(self, symbols: Sequence[str], start: datetime, end: datetime) -> None:
+
+        #Fill [start, end] for many symbols with one batched multi-ticker download.
+
+        #Symbols already covered are skipped; the rest share a single request
+        #spanning the union of their gaps, which is then split per symbol.
+
+        with ExitStack() as stack:
+            # Locks are taken in sorted order so concurrent batches cannot deadlock.
+            for key in sorted({symbol.upper() for symbol in symbols}):
+                stack.enter_context(self._symbol_lock(key))
+            pending: Dict[str, Tuple[datetime, datetime]] = {}
+            for symbol in symbols:
+                gaps = self.coverage(symbol).gaps(start, end)
+                if not gaps:
+                    continue
+                gap_start = gaps[0][0]
+                last_ts = self.last_timestamp(symbol)
+                if last_ts is not None and gap_start >= last_ts:
+                    gap_start = last_ts.to_pydatetime()
+                pending[symbol] = (gap_start, gaps[-1][1])
+            if not pending:
+                return
+
+            fetch_start = min(lo for lo, _ in pending.values())
+            fetch_end = max(hi for _, hi in pending.values())
+            batch = download_ohlcv_batch(list(pending), fetch_start, fetch_end)
+            for symbol, bars in batch.items():
+                # Tickers missing from the batch (or all-NaN) stay uncovered and are retried.
+                span = _fetched_span(fetch_start, fetch_end, bars)
+                if span is None:
+                    continue
+                key = symbol.upper()
+                coverage = self.coverage(key)
+                coverage.add(*span)
+                self._merge(key, bars, coverage)
+
+    def load(self, symbol: str) -> pd.DataFrame:
+        #Return all stored bars for `symbol` backed by read-only memory maps.
+        key = symbol.upper()
+        manifest = self._read_manifest(key)
+        rows = manifest["rows"] if manifest else 0
+        if rows == 0:
+            return _empty_frame()
+
+        symbol_dir = self._symbol_dir(key)
+        index = np.memmap(symbol_dir / _INDEX_FILE, dtype="int64", mode="r", shape=(rows,))
+        columns: Dict[str, np.ndarray] = {
+            column: np.memmap(symbol_dir / f"{column}.f8", dtype="float64", mode="r", shape=(rows,))
+            for column in PRICE_COLUMNS
+        }
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(index.view("datetime64[ns]")), copy=False)
+
+    def coverage(self, symbol: str) -> CoverageIndex:
+        #Return the intervals already requested for `symbol`.
+        manifest = self._read_manifest(symbol.upper())
+        if not manifest:
+            return CoverageIndex()
+        return CoverageIndex.from_json(manifest["coverage"])
+
+    def covered(self, symbol: str, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+
+        #The parts of [start, end] the store has fetched, for callers caching its reads.
+
+        #Stored coverage stops at today's midnight while today's bar is still
+        #forming; once it reaches that point, the rest of [start, end] was read
+        #by the same request and is included (how long that read stays fresh
+        #is the caller's choice). Gaps left by failed downloads are not.
+
+        spans = [(max(lo, start), min(hi, end)) for lo, hi in self.coverage(symbol) if hi >= start and lo <= end]
+        if spans and spans[-1][1] >= min(end, _today()):
+            spans[-1] = (spans[-1][0], end)
+        return spans
+
+    def version(self, symbol: str) -> int:
+        #Counter bumped by every manifest write for `symbol` (0 if nothing is stored).
+        manifest = self._read_manifest(symbol.upper())
+        return manifest.get("version", 0) if manifest else 0
+
+    def last_timestamp(self, symbol: str) -> Optional[pd.Timestamp]:
+        manifest = self._read_manifest(symbol.upper())
+        if not manifest or manifest["rows"] == 0:
+            return None
+        return pd.Timestamp(manifest["last_ts"])
+
+    # --- Internal helpers ------------------------------------------------------
+
+    def _symbol_lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _symbol_dir(self, key: str) -> Path:
+        return self.root / key
+
+    def _read_manifest(self, key: str) -> Optional[dict]:
+        path = self._symbol_dir(key) / _MANIFEST_FILE
+        if not path.exists():
+            return None
+        manifest = json.loads(path.read_text())
+        # Guard against a crash between writing columns and rewriting the manifest.
+        expected = manifest["rows"] * 8
+        for name in (_INDEX_FILE, *(f"{column}.f8" for column in PRICE_COLUMNS)):
+            file_path = self._symbol_dir(key) / name
+            if manifest["rows"] and (not file_path.exists() or file_path.stat().st_size < expected):
+                return None
+        return manifest
+
+    def _write_manifest(self, key: str, rows: int, last_ts: Optional[pd.Timestamp], coverage: CoverageIndex) -> None:
+        manifest = {
+            "rows": rows,
+            "last_ts": last_ts.isoformat() if last_ts is not None else None,
+            "coverage": coverage.to_json(),
+            "version": self.version(key) + 1,
+        }
+        path = self._symbol_dir(key) / _MANIFEST_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, path)
+
+    def _write(self, key: str, df: pd.DataFrame, coverage: CoverageIndex) -> None:
+        #Rewrite every column file for `key` from `df`.
+
+        # Files are replaced rather than truncated so memory maps handed out
+        # by earlier load() calls keep pointing at the previous, intact data.
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        symbol_dir = self._symbol_dir(key)
+        symbol_dir.mkdir(parents=True, exist_ok=True)
+        for name, values in self._column_bytes(df):
+            tmp = symbol_dir / f"{name}.tmp"
+            tmp.write_bytes(values)
+            os.replace(tmp, symbol_dir / name)
+        last_ts = df.index[-1] if len(df) else None
+        self._write_manifest(key, len(df), last_ts, coverage)
+
+    def _merge(self, key: str, delta: pd.DataFrame, coverage: CoverageIndex) -> None:
+        #Merge `delta` into the stored bars, appending in place when possible.
+        rows = (self._read_manifest(key) or {"rows": 0})["rows"]
+        last_ts = self.last_timestamp(key)
+        if last_ts is not None and not delta.empty and delta.index[0] <= last_ts:
+            stored = self.load(key)
+            overlap = delta[delta.index <= last_ts]
+            previous = stored.reindex(overlap.index)
+            if not np.array_equal(previous.to_numpy(), overlap.to_numpy(), equal_nan=True):
+                # Older bars were backfilled, or a stored bar was revised (e.g. an
+                # intraday bar that has since closed): fall back to a full rewrite.
+                merged = pd.concat([stored[~stored.index.isin(delta.index)], delta])
+                self._write(key, merged, coverage)
+                return
+            delta = delta[delta.index > last_ts]
+
+        if delta.empty:
+            self._write_manifest(key, rows, last_ts, coverage)
+            return
+
+        symbol_dir = self._symbol_dir(key)
+        symbol_dir.mkdir(parents=True, exist_ok=True)
+        for name, values in self._column_bytes(delta):
+            with open(symbol_dir / name, "r+b" if rows else "wb") as fh:
+                fh.truncate(rows * 8)
+                fh.seek(0, os.SEEK_END)
+                fh.write(values)
+        self._write_manifest(key, rows + len(delta), delta.index[-1], coverage)
+
+    @staticmethod
+    def _column_bytes(df: pd.DataFrame):
+        yield _INDEX_FILE, df.index.as_unit("ns").asi8.astype("int64").tobytes()
+        for column in PRICE_COLUMNS:
+            yield f"{column}.f8", df[column].to_numpy(dtype="float64").tobytes()
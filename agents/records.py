@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+#Compact record types for retaining large numbers of events and features.
+
+#The interface dataclasses (Event, FeatureVector, Prediction, Outcome) carry a
+#per-instance __dict__ and per-instance payload/feature dicts that repeat the
+#same keys. The records here are slotted, frozen counterparts:
+#    - FeatureSchema: an interned, ordered tuple of key names. Every record or
+#      frame with the same keys shares one schema object (and its name ->
+#      position map) instead of storing the keys again.
+#    - FeatureRecord / EventRecord keep their values in a compact array or
+#      tuple laid out by the schema and expose dict-like read-only views.
+#    - PredictionRecord / OutcomeRecord are slotted versions of the rest.
+#Each record converts to and from its interface type.
+
+import sys
+import threading
+import weakref
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .interfaces import Event, FeatureVector, Outcome, Prediction
+
+
+class FeatureSchema:
+
+    #Interned, immutable ordered set of feature (or payload) names.
+
+    #Use FeatureSchema.of(names): equal name tuples always return the same
+    #object, so identity comparison (`a is b`) is a valid equality check and
+    #records of one shape share a single key layout.
+
+
+    __slots__ = ("names", "_positions", "__weakref__")
+
+    _interned: "weakref.WeakValueDictionary[Tuple[str, ...], FeatureSchema]" = weakref.WeakValueDictionary()
+    _lock = threading.Lock()
+
+    def __init__(self, names: Tuple[str, ...]) -> None:
+        self.names = names
+        self._positions = {name: i for i, name in enumerate(names)}
+
+    @classmethod
+    def of(cls, names: Iterable[str]) -> "FeatureSchema":
+        if isinstance(names, FeatureSchema):
+            return names
+        key = tuple(str(name) for name in names)
+        if len(set(key)) != len(key):
+            raise ValueError(f"Duplicate names in schema: {key}")
+        with cls._lock:
+            schema = cls._interned.get(key)
+            if schema is None:
+                schema = cls._interned[key] = cls(key)
+            return schema
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._positions
+
+    def __repr__(self) -> str:
+        return f"FeatureSchema({self.names!r})"
+
+    def __reduce__(self):
+        # Unpickling re-interns instead of creating a duplicate schema.
+        return FeatureSchema.of, (self.names,)
+
+    def index_of(self, name: str) -> int:
+        try:
+            return self._positions[name]
+        except KeyError:
+            raise KeyError(f"{name!r} is not in schema {self.names}") from None
+
+    def get_index(self, name: str) -> Optional[int]:
+        return self._positions.get(name)
+
+
+class SchemaMapping(Mapping):
+
+    #Read-only dict view over values laid out by a FeatureSchema.
+
+
+    __slots__ = ("schema", "_values")
+
+    def __init__(self, schema: FeatureSchema, values: Sequence[Any]) -> None:
+        self.schema = schema
+        self._values = values
+
+    def __getitem__(self, name: str) -> Any:
+        value = self._values[self.schema.index_of(name)]
+        return float(value) if isinstance(value, np.floating) else value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.schema.names)
+
+    def __len__(self) -> int:
+        return len(self.schema)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.schema
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+def _slotted(cls: type) -> type:
+    # dataclass(frozen=True, slots=True) for Python 3.9 (slots= is 3.10+):
+    # rebuild the class with __slots__ and without the field defaults as class
+    # attributes (they would clash with the slots; __init__ keeps them).
+    # Unpickling sets the slots through object.__setattr__, since the frozen
+    # __setattr__ refuses it.
+    names = tuple(f.name for f in fields(cls))
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in names)
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        for name, value in zip(names, state):
+            object.__setattr__(self, name, value)
+
+    namespace = {key: value for key, value in cls.__dict__.items() if key not in names + ("__dict__", "__weakref__")}
+    namespace.update(__slots__=names, __getstate__=__getstate__, __setstate__=__setstate__)
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+def _frozen_array(values: Iterable[float]) -> np.ndarray:
+    array = np.fromiter(values, dtype="float64")
+    array.flags.writeable = False
+    return array
+
+
+@_slotted
+@dataclass(frozen=True)
+class FeatureRecord:
+
+    #Compact FeatureVector: features are a float64 array laid out by `schema`.
+
+
+    symbol: str
+    ts: datetime
+    schema: FeatureSchema
+    values: np.ndarray
+    meta: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self) -> None:
+        if len(self.values) != len(self.schema):
+            raise ValueError("values must have one entry per schema name")
+
+    @classmethod
+    def create(
+        cls,
+        symbol: str,
+        ts: datetime,
+        features: Mapping[str, float],
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> "FeatureRecord":
+        schema = FeatureSchema.of(features)
+        return cls(symbol, ts, schema, _frozen_array(features.values()), meta)
+
+    @property
+    def features(self) -> SchemaMapping:
+        return SchemaMapping(self.schema, self.values)
+
+    @classmethod
+    def from_vector(cls, vector: FeatureVector) -> "FeatureRecord":
+        return cls.create(vector.symbol, vector.ts, vector.features, vector.meta)
+
+    def to_vector(self) -> FeatureVector:
+        return FeatureVector(self.symbol, self.ts, dict(self.features), self.meta)
+
+
+@_slotted
+@dataclass(frozen=True)
+class EventRecord:
+
+    #Compact Event: payload values in a tuple laid out by an interned schema.
+
+
+    symbol: str
+    ts: datetime
+    source: str
+    schema: FeatureSchema
+    values: Tuple[Any, ...]
+
+    @classmethod
+    def create(cls, symbol: str, ts: datetime, source: str, payload: Mapping[str, Any]) -> "EventRecord":
+        return cls(symbol, ts, _intern(source), FeatureSchema.of(payload), tuple(payload.values()))
+
+    @property
+    def payload(self) -> SchemaMapping:
+        return SchemaMapping(self.schema, self.values)
+
+    @classmethod
+    def from_event(cls, event: Event) -> "EventRecord":
+        return cls.create(event.symbol, event.ts, event.source, event.payload)
+
+    def to_event(self) -> Event:
+        return Event(self.symbol, self.ts, self.source, dict(self.payload))
+
+
+@_slotted
+@dataclass(frozen=True)
+class PredictionRecord:
+
+    #Slotted, immutable Prediction.
+
+
+    symbol: str
+    ts: datetime
+    horizon: str
+    expected_return: float
+    prob_up: float
+    prob_down: float
+    confidence: float
+    model_id: str
+    extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_prediction(cls, prediction: Prediction) -> "PredictionRecord":
+        return cls(
+            prediction.symbol,
+            prediction.ts,
+            _intern(prediction.horizon),
+            float(prediction.expected_return),
+            float(prediction.prob_up),
+            float(prediction.prob_down),
+            float(prediction.confidence),
+            _intern(prediction.model_id),
+            prediction.extra,
+        )
+
+    def to_prediction(self) -> Prediction:
+        return Prediction(
+            self.symbol,
+            self.ts,
+            self.horizon,
+            self.expected_return,
+            self.prob_up,
+            self.prob_down,
+            self.confidence,
+            self.model_id,
+            self.extra,
+        )
+
+
+@_slotted
+@dataclass(frozen=True)
+class OutcomeRecord:
+
+    #Slotted, immutable Outcome.
+
+
+    symbol: str
+    ts_pred: datetime
+    ts_outcome: datetime
+    realized_return: float
+    label: int
+    prediction: PredictionRecord
+
+    @classmethod
+    def from_outcome(cls, outcome: Outcome) -> "OutcomeRecord":
+        prediction = outcome.prediction
+        if not isinstance(prediction, PredictionRecord):
+            prediction = PredictionRecord.from_prediction(prediction)
+        return cls(
+            outcome.symbol,
+            outcome.ts_pred,
+            outcome.ts_outcome,
+            float(outcome.realized_return),
+            int(outcome.label),
+            prediction,
+        )
+
+    def to_outcome(self) -> Outcome:
+        return Outcome(
+            self.symbol,
+            self.ts_pred,
+            self.ts_outcome,
+            self.realized_return,
+            self.label,
+            self.prediction.to_prediction(),
+        )
+
+
+def _intern(value: str) -> str:
+    # Sources, horizons and model ids repeat across records; share one string.
+    return sys.intern(value) if type(value) is str else value
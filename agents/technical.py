@@ -4,15 +4,45 @@ from __future__ import annotations
 # Computes Bollinger Bands, RSI, MACD, support/resistance, and trend metrics
 # using yfinance data.
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
 
+from .indicators import DEFAULT_INDICATORS, IncrementalIndicators, feature_names, window_indicators
 from .interfaces import Event, FeatureVector, TechnicalIndicatorAgent
+from .price_service import PriceService, default_price_service
+from .timeframes import MultiTimeframeBars
+
+
+def _bar_time(ts: datetime) -> datetime:
+    # Price frames are indexed by naive UTC timestamps.
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.to_pydatetime()
+
+
+def _payload_value(event: Event, *keys: str) -> Optional[float]:
+    for key in keys:
+        value = event.payload.get(key)
+        if value is not None:
+            return float(value)
+    return None
+
+
+def _bar_arrays(price_df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    # OHLCV columns as float arrays; missing High/Low fall back to Close.
+    close = price_df["Close"].to_numpy(dtype="float64")
+    bars = {"Close": close}
+    for column in ("High", "Low"):
+        values = price_df[column].to_numpy(dtype="float64") if column in price_df else close
+        bars[column] = np.where(np.isnan(values), close, values)
+    volume = price_df["Volume"].to_numpy(dtype="float64") if "Volume" in price_df else np.zeros(len(close))
+    bars["Volume"] = np.nan_to_num(volume)
+    return bars
 
 
 @dataclass
@@ -24,95 +54,164 @@ class YFinanceTechnicalIndicatorAgent(TechnicalIndicatorAgent):
     #   - MACD (12/26/9)
     #   - Support/Resistance (recent highs/lows)
     #   - Trend strength (slope of 20-day MA)
+    # `indicators` selects registered indicators (agents/indicators.py); their
+    # shared intermediates are computed once per request. ATR (14), Stochastic
+    # (14/3), OBV and VWAP (20) are opt-in, e.g. indicators=ALL_INDICATORS.
+    # Price bars delivered through handle_event update per-symbol streaming
+    # state (see agents/indicators.py); compute_features then reads that state
+    # instead of recomputing the rolling windows. The same bars are also
+    # aggregated into `timeframes` (agents/timeframes.py) for
+    # compute_timeframe_features.
 
     lookback_days: int = 90
     cache_minutes: int = 30
+    price_service: Optional[PriceService] = None
+    indicators: Tuple[str, ...] = DEFAULT_INDICATORS
+    timeframes: Tuple[str, ...] = ("1m", "5m", "1h", "1d")
+    timeframe_bars: int = 500
+    _streams: Dict[str, IncrementalIndicators] = field(default_factory=dict, init=False, repr=False)
+    _bars: Dict[str, MultiTimeframeBars] = field(default_factory=dict, init=False, repr=False)
 
     def __post_init__(self) -> None:
-        self._price_cache: Dict[str, pd.DataFrame] = {}
-        self._cache_ts: Dict[str, datetime] = {}
-
-    def handle_event(self, event: Event) -> None:  # pragma: no cover
-        return
+        if self.price_service is None:
+            self.price_service = default_price_service()
+
+    def handle_event(self, event: Event) -> None:
+        # Only price bars carry a close; replays of an already applied bar are ignored.
+        close = _payload_value(event, "close", "Close", "price")
+        if close is None or not event.symbol:
+            return
+        ts = _bar_time(event.ts)
+        key = event.symbol.upper()
+        state = self._streams.get(key)
+        if state is None:
+            state = self._streams[key] = self._seed_stream(event.symbol, ts)
+        high = _payload_value(event, "high", "High")
+        low = _payload_value(event, "low", "Low")
+        volume = _payload_value(event, "volume", "Volume") or 0.0
+        state.update(ts, close, high=high, low=low, volume=volume)
+
+        bars = self._bars.get(key)
+        if bars is None:
+            bars = self._bars[key] = MultiTimeframeBars(self.timeframes, max_bars=self.timeframe_bars)
+        opened = _payload_value(event, "open", "Open")
+        bars.update(
+            ts,
+            close if opened is None else opened,
+            close if high is None else high,
+            close if low is None else low,
+            close,
+            volume,
+        )
 
     def tick(self, as_of: datetime) -> None:  # pragma: no cover
         return
 
     def compute_features(self, symbol: str, as_of: datetime) -> FeatureVector:
+        # The streamed state answers only for the bar at `as_of`: at or after the
+        # last streamed bar and before the next one is due. Any other as_of
+        # (a later date the stream has not reached, or a past one) uses the batch path.
+        state = self._streams.get(symbol.upper())
+        bar_time = _bar_time(as_of)
+        if (
+            state is not None
+            and state.last_ts is not None
+            and state.interval is not None
+            and state.last_ts <= bar_time < state.last_ts + state.interval
+        ):
+            snapshot = state.snapshot()
+            features = {name: snapshot[name] for name in feature_names(self.indicators) if name in snapshot}
+            return FeatureVector(symbol=symbol, ts=as_of, features=features, meta={"rows": state.bars, "streaming": True})
+
         price_df = self._get_price_history(symbol, as_of)
         if price_df.empty:
             return FeatureVector(symbol, as_of, features={}, meta={"rows": 0})
 
-        closes = price_df["Close"]
+        ends = np.array([len(price_df) - 1])
+        values = window_indicators(_bar_arrays(price_df), price_df.index.to_numpy(), np.array([0]), ends, self.indicators)
+        features: Dict[str, float] = {name: float(column[0]) for name, column in values.items()}
+        return FeatureVector(symbol=symbol, ts=as_of, features=features, meta={"rows": len(price_df)})
+
+    def compute_timeframe_features(
+        self, symbol: str, as_of: datetime, timeframes: Optional[Sequence[str]] = None
+    ) -> FeatureVector:
+        # Indicators on each timeframe aggregated from the streamed base bars,
+        # keyed "<timeframe>_<feature>". Each timeframe uses its bars inside the
+        # lookback window, capped at the newest `timeframe_bars`.
+        timeframes = tuple(timeframes or self.timeframes)
+        bars = self._bars.get(symbol.upper())
         features: Dict[str, float] = {}
+        rows: Dict[str, int] = {}
+        for timeframe in timeframes:
+            if bars is None:
+                rows[timeframe] = 0
+                continue
+            start = _bar_time(as_of) - timedelta(days=self.lookback_days)
+            # These are the live views: buckets are labelled by their open time
+            # and may hold bars streamed after an `as_of` in the past.
+            frame = bars.frame(timeframe, start, _bar_time(as_of), limit=self.timeframe_bars)
+            rows[timeframe] = len(frame)
+            if frame.empty:
+                continue
+            values = window_indicators(
+                _bar_arrays(frame), frame.index.to_numpy(), np.array([0]), np.array([len(frame) - 1]), self.indicators
+            )
+            features.update({f"{timeframe}_{name}": float(column[0]) for name, column in values.items()})
+        return FeatureVector(symbol=symbol, ts=as_of, features=features, meta={"rows": rows})
+
+    def backfill_features(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        # Indicator history: one row per bar in [start, end], row t equal to
+        # compute_features(symbol, t) on the batch path (each row sees only its
+        # own lookback window), evaluated in one vectorized pass.
+        lookback = timedelta(days=self.lookback_days)
+        price_df = self._get_price_range(symbol, start - lookback, end)
+        if price_df.empty:
+            return pd.DataFrame(columns=list(feature_names(self.indicators)), dtype="float64")
+
+        index = price_df.index.to_numpy()
+        ends = np.flatnonzero((index >= np.datetime64(start)) & (index <= np.datetime64(end)))
+        dates = price_df.index[ends]
+        starts = np.searchsorted(index, (dates - lookback).to_numpy(), side="left")
+        values = window_indicators(_bar_arrays(price_df), index, starts, ends, self.indicators)
+        return pd.DataFrame(values, index=dates, columns=list(feature_names(self.indicators)))
+
+    def prefetch(self, symbols: Sequence[str], as_of: datetime) -> None:
+        #Warm the shared price service for `symbols` with one batched download.
+        self.price_service.prefetch(
+            symbols,
+            as_of - timedelta(days=self.lookback_days),
+            as_of,
+            tolerance=timedelta(minutes=self.cache_minutes),
+            backfill=timedelta(days=self.lookback_days),
+        )
 
-        # Bollinger Bands
-        bb_mean = closes.rolling(window=20).mean()
-        bb_std = closes.rolling(window=20).std()
-        if len(bb_mean.dropna()) == 0:
-            features["bb_upper"] = features["bb_lower"] = features["bb_pct"] = np.nan
-        else:
-            upper = bb_mean.iloc[-1] + 2 * bb_std.iloc[-1]
-            lower = bb_mean.iloc[-1] - 2 * bb_std.iloc[-1]
-            features["bb_upper"] = float(upper)
-            features["bb_lower"] = float(lower)
-            features["bb_pct"] = float((closes.iloc[-1] - lower) / (upper - lower)) if upper != lower else np.nan
-
-        # RSI (14)
-        delta = closes.diff()
-        up = delta.clip(lower=0).rolling(window=14).mean()
-        down = -delta.clip(upper=0).rolling(window=14).mean()
-        rs = up / down
-        features["rsi_14"] = float(100 - (100 / (1 + rs.iloc[-1]))) if rs.iloc[-1] > 0 else 0.0
-
-        # MACD
-        ema12 = closes.ewm(span=12, adjust=False).mean()
-        ema26 = closes.ewm(span=26, adjust=False).mean()
-        macd = ema12 - ema26
-        signal = macd.ewm(span=9, adjust=False).mean()
-        features["macd"] = float(macd.iloc[-1])
-        features["macd_signal"] = float(signal.iloc[-1])
-        features["macd_hist"] = float(macd.iloc[-1] - signal.iloc[-1])
-
-        # Support / Resistance
-        window_lookback = closes.last(f"{min(30, len(closes))}D")
-        features["recent_support"] = float(window_lookback.min()) if not window_lookback.empty else np.nan
-        features["recent_resistance"] = float(window_lookback.max()) if not window_lookback.empty else np.nan
-
-        # Trend strength (slope of 20-day MA)
-        ma20 = closes.rolling(window=20).mean().dropna()
-        if len(ma20) >= 2:
-            x = np.arange(len(ma20))
-            slope = np.polyfit(x, ma20.values, 1)[0]
-            features["trend_strength"] = float(slope)
-        else:
-            features["trend_strength"] = 0.0
-
-        return FeatureVector(symbol=symbol, ts=as_of, features=features, meta={"rows": len(closes)})
+    def _seed_stream(self, symbol: str, ts: datetime) -> IncrementalIndicators:
+        # Warm the state from stored history so the first streamed bar already
+        # sees full indicator windows.
+        state = IncrementalIndicators(lookback_days=self.lookback_days)
+        history = self._get_price_history(symbol, ts)
+        history = history[history.index < ts]
+        if history.empty:
+            return state
+        bars = _bar_arrays(history)
+        for i, bar_ts in enumerate(history.index):
+            state.update(
+                bar_ts.to_pydatetime(),
+                float(bars["Close"][i]),
+                high=float(bars["High"][i]),
+                low=float(bars["Low"][i]),
+                volume=float(bars["Volume"][i]),
+            )
+        return state
 
     def _get_price_history(self, symbol: str, as_of: datetime) -> pd.DataFrame:
-        key = symbol.upper()
-        cached_df = self._price_cache.get(key)
-        cache_ts = self._cache_ts.get(key)
-        if cached_df is not None and cache_ts is not None:
-            if (as_of - cache_ts).total_seconds() < self.cache_minutes * 60:
-                return cached_df[cached_df.index <= as_of]
-
-        start = as_of - timedelta(days=self.lookback_days)
-        data = yf.download(
+        return self._get_price_range(symbol, as_of - timedelta(days=self.lookback_days), as_of)
+
+    def _get_price_range(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        return self.price_service.get_history(
             symbol,
-            start=start.strftime("%Y-%m-%d"),
-            end=(as_of + timedelta(days=1)).strftime("%Y-%m-%d"),
-            progress=False,
-            auto_adjust=True,
+            start,
+            end,
+            tolerance=timedelta(minutes=self.cache_minutes),
+            backfill=timedelta(days=self.lookback_days),
         )
-        if data.empty:
-            return pd.DataFrame()
-
-        df = data[["Close"]].copy()
-        df.index = pd.to_datetime(df.index)
-        df = df.sort_index()
-        self._price_cache[key] = df
-        self._cache_ts[key] = as_of
-        return df[df.index <= as_of]
-
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+#Multi-timeframe bars built from one base bar series.
+
+#MultiTimeframeBars receives base bars (e.g. 1m) one at a time and keeps every
+#coarser timeframe (5m, 1h, 1d, ...) aggregated alongside it. A new base bar
+#either extends the current bucket of each timeframe in place or opens a new
+#one, so keeping all views current costs O(timeframes) per base bar rather
+#than a resample (or a separate fetch) per interval.
+
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Column order of OHLCV frames across the price layer (agents/price_store.py
+# re-exports it). Defined here so this module needs neither the store nor
+# yfinance (btc_engine imports it on its own).
+PRICE_COLUMNS: Tuple[str, ...] = ("Open", "High", "Low", "Close", "Volume")
+
+TIMEFRAMES: Dict[str, np.timedelta64] = {
+    "1m": np.timedelta64(1, "m"),
+    "5m": np.timedelta64(5, "m"),
+    "15m": np.timedelta64(15, "m"),
+    "30m": np.timedelta64(30, "m"),
+    "1h": np.timedelta64(1, "h"),
+    "4h": np.timedelta64(4, "h"),
+    "1d": np.timedelta64(1, "D"),
+}
+
+_OPEN, _HIGH, _LOW, _CLOSE, _VOLUME = range(5)
+
+
+def _to_ns(ts) -> int:
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return int(ts.value)
+
+
+class _BarBuffer:
+    #Growable (timestamp, OHLCV) arrays; the last row may be updated in place.
+
+    def __init__(self, capacity: int = 256) -> None:
+        self.ts = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty((capacity, len(PRICE_COLUMNS)), dtype="float64")
+        self.size = 0
+
+    def append(self, ts: int, row: Sequence[float]) -> None:
+        if self.size == len(self.ts):
+            self.ts = np.resize(self.ts, 2 * self.size)
+            self.values = np.resize(self.values, (2 * self.size, len(PRICE_COLUMNS)))
+        self.ts[self.size] = ts
+        self.values[self.size] = row
+        self.size += 1
+
+    def merge_last(self, row: Sequence[float]) -> None:
+        last = self.values[self.size - 1]
+        last[_HIGH] = max(last[_HIGH], row[_HIGH])
+        last[_LOW] = min(last[_LOW], row[_LOW])
+        last[_CLOSE] = row[_CLOSE]
+        last[_VOLUME] += row[_VOLUME]
+
+    def last_ts(self) -> Optional[int]:
+        return int(self.ts[self.size - 1]) if self.size else None
+
+    def trim(self, keep: int) -> None:
+        # Drop all but the newest `keep` rows.
+        if self.size > keep:
+            drop = self.size - keep
+            self.ts[:keep] = self.ts[drop : self.size]
+            self.values[:keep] = self.values[drop : self.size]
+            self.size = keep
+
+    def frame(self, start: Optional[int] = None, end: Optional[int] = None, limit: Optional[int] = None) -> pd.DataFrame:
+        ts = self.ts[: self.size]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = self.size if end is None else int(np.searchsorted(ts, end, side="right"))
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        index = pd.DatetimeIndex(ts[lo:hi].view("datetime64[ns]"))
+        return pd.DataFrame(self.values[lo:hi].copy(), index=index, columns=list(PRICE_COLUMNS))
+
+
+class MultiTimeframeBars:
+
+    #Base bars plus incrementally maintained resampled views.
+
+    #Buckets are left-labelled and aligned to the UTC epoch, matching
+    #DataFrame.resample(...).agg(first/max/min/last/sum) on the base series.
+    #Bars must arrive in time order; a bar repeating the last base timestamp
+    #revises it (the current bucket of each timeframe is re-aggregated from
+    #the base bars), older bars are ignored. `max_bars` bounds each buffer (the
+    #base keeps at least the bars of every open bucket).
+
+
+    def __init__(
+        self,
+        timeframes: Sequence[str] = ("1m", "5m", "1h", "1d"),
+        base: Optional[str] = None,
+        max_bars: Optional[int] = None,
+    ) -> None:
+        unknown = [tf for tf in timeframes if tf not in TIMEFRAMES]
+        if unknown:
+            raise ValueError(f"Unknown timeframes: {unknown}")
+        self.base = base or min(timeframes, key=lambda tf: TIMEFRAMES[tf])
+        if self.base not in TIMEFRAMES:
+            raise ValueError(f"Unknown base timeframe: {self.base}")
+        self.timeframes: Tuple[str, ...] = tuple(tf for tf in timeframes if tf != self.base)
+        if any(TIMEFRAMES[tf] < TIMEFRAMES[self.base] for tf in self.timeframes):
+            raise ValueError("Timeframes must not be finer than the base timeframe")
+        self.max_bars = max_bars
+        self._steps = {tf: int(TIMEFRAMES[tf].astype("timedelta64[ns]").astype(np.int64)) for tf in self.timeframes}
+        self._buffers: Dict[str, _BarBuffer] = {tf: _BarBuffer() for tf in (self.base, *self.timeframes)}
+
+    def __len__(self) -> int:
+        return self._buffers[self.base].size
+
+    @property
+    def last_ts(self) -> Optional[datetime]:
+        ts = self._buffers[self.base].last_ts()
+        return None if ts is None else pd.Timestamp(ts).to_pydatetime()
+
+    def update(
+        self,
+        ts: datetime,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float = 0.0,
+    ) -> bool:
+        #Add one base bar; returns False if it was older than the last bar.
+        t = _to_ns(ts)
+        row = (open, high, low, close, volume)
+        base = self._buffers[self.base]
+        last = base.last_ts()
+        if last is not None and t < last:
+            return False
+        if last is not None and t == last:
+            base.values[base.size - 1] = row
+            for tf in self.timeframes:
+                self._rebuild_last(tf)
+            return True
+
+        base.append(t, row)
+        for tf, step in self._steps.items():
+            bucket = t - t % step
+            buffer = self._buffers[tf]
+            if buffer.size and buffer.ts[buffer.size - 1] == bucket:
+                buffer.merge_last(row)
+            else:
+                buffer.append(bucket, row)
+        if self.max_bars is not None and base.size > 2 * self.max_bars:
+            self._trim()
+        return True
+
+    def _trim(self) -> None:
+        # Base bars of every open bucket are kept so a revision can re-aggregate it.
+        base = self._buffers[self.base]
+        keep = self.max_bars
+        for tf in self.timeframes:
+            buffer = self._buffers[tf]
+            open_from = int(np.searchsorted(base.ts[: base.size], buffer.ts[buffer.size - 1], side="left"))
+            keep = max(keep, base.size - open_from)
+            buffer.trim(self.max_bars)
+        base.trim(keep)
+
+    def extend(self, bars: pd.DataFrame) -> int:
+        #Add base bars from an OHLCV frame (columns as in PRICE_COLUMNS, any case).
+        columns = {column.lower(): column for column in bars.columns}
+        values = np.column_stack(
+            [
+                bars[columns[name.lower()]].to_numpy(dtype="float64")
+                if name.lower() in columns
+                else np.zeros(len(bars))
+                for name in PRICE_COLUMNS
+            ]
+        )
+        added = 0
+        for ts, row in zip(bars.index, values):
+            added += self.update(ts, *row)
+        return added
+
+    def frame(
+        self,
+        timeframe: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        #OHLCV bars of `timeframe` labelled in [start, end], newest `limit` only.
+        if timeframe not in self._buffers:
+            raise KeyError(f"Timeframe {timeframe!r} is not maintained")
+        return self._buffers[timeframe].frame(
+            None if start is None else _to_ns(start),
+            None if end is None else _to_ns(end),
+            limit,
+        )
+
+    def _rebuild_last(self, timeframe: str) -> None:
+        buffer, base = self._buffers[timeframe], self._buffers[self.base]
+        bucket = int(buffer.ts[buffer.size - 1])
+        lo = int(np.searchsorted(base.ts[: base.size], bucket, side="left"))
+        rows = base.values[lo : base.size]
+        buffer.values[buffer.size - 1] = (
+            rows[0, _OPEN],
+            rows[:, _HIGH].max(),
+            rows[:, _LOW].min(),
+            rows[-1, _CLOSE],
+            rows[:, _VOLUME].sum(),
+        )
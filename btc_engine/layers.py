@@ -3,8 +3,11 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, Optional
 
+import numpy as np
 import pandas as pd
 
+from agents.kernels import ols_from_sums
+
 from .interfaces import BaseLayer, LayerOutput
 from .market_data import MarketDataClient
 
@@ -61,8 +64,8 @@ class HistoricalPerformanceLayer(BaseLayer):
                 extras={"layer": "A", "reason": "insufficient_history"},
             )
 
-        sma_fast = closes.rolling(20).mean().iloc[-1]
-        sma_slow = closes.rolling(50).mean().iloc[-1]
+        sma_fast = closes.iloc[-20:].mean()
+        sma_slow = closes.iloc[-50:].mean()
         direction = 0
         if sma_fast > sma_slow:
             direction = 1
@@ -77,6 +80,11 @@ class HistoricalPerformanceLayer(BaseLayer):
         returns = closes.pct_change().dropna()
         risk = float(returns.tail(50).std())
 
+        # Trend diagnostics: closed-form OLS of log price over the slow window.
+        y = np.log(closes.to_numpy(dtype="float64")[-50:])
+        x = np.arange(len(y), dtype="float64")
+        trend = ols_from_sums(len(y), x.sum(), y.sum(), x @ x, x @ y, y @ y)
+
         return LayerOutput(
             timestamp=now,
             horizon_minutes=self.horizon_minutes,
@@ -87,6 +95,8 @@ class HistoricalPerformanceLayer(BaseLayer):
                 "layer": "A",
                 "sma_fast": sma_fast,
                 "sma_slow": sma_slow,
+                "trend_slope": float(trend["slope"]),
+                "trend_r2": float(trend["r2"]),
             },
         )
 
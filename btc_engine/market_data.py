@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from agents.timeframes import TIMEFRAMES, MultiTimeframeBars
+
 
 class MarketDataClient(ABC):
     """
@@ -96,6 +98,67 @@ class SimulatedMarketDataClient(MarketDataClient):
         return float(series.iloc[-1])
 
 
+@dataclass
+class ResamplingMarketDataClient(MarketDataClient):
+    """
+    Serve every interval from one cached base-interval series.
+
+    The first request for a symbol fetches enough base bars for
+    `coarse_bars` bars of the coarsest maintained interval (or for the
+    request itself, if it needs more); a later request that needs more
+    history than is buffered refetches a deeper base series. Other requests
+    only fetch the base bars since the last one seen. Coarser intervals
+    (5m, 1h, ...) are aggregated incrementally by MultiTimeframeBars, so the
+    layers no longer trigger a fetch per interval.
+    """
+
+    client: MarketDataClient
+    base_interval: str = "1m"
+    intervals: Tuple[str, ...] = ("1m", "5m", "15m", "1h")
+    coarse_bars: int = 120
+    _bars: Dict[str, MultiTimeframeBars] = field(default_factory=dict, init=False, repr=False)
+    _depth: Dict[str, int] = field(default_factory=dict, init=False, repr=False)
+
+    def get_recent_ohlcv(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int,
+    ) -> pd.DataFrame:
+        if interval not in self.intervals or interval not in TIMEFRAMES:
+            # Not maintained from the base series: pass through.
+            return self.client.get_recent_ohlcv(symbol, interval, limit)
+
+        # Two extra buckets: the oldest one is usually only partly covered by
+        # the fetched base bars and the newest one is still forming.
+        needed = (limit + 2) * self._step(interval)
+        bars = self._bars.get(symbol)
+        if bars is None or needed > self._depth[symbol]:
+            coarsest = max(self.intervals, key=lambda tf: TIMEFRAMES[tf])
+            depth = max(needed, (self.coarse_bars + 2) * self._step(coarsest), self._depth.get(symbol, 0))
+            bars = MultiTimeframeBars(self.intervals, base=self.base_interval, max_bars=depth)
+            bars.extend(self.client.get_recent_ohlcv(symbol, self.base_interval, depth))
+            self._bars[symbol], self._depth[symbol] = bars, depth
+        else:
+            # Once a base interval has passed, refetch from the last base bar
+            # (it may have been revised) onwards.
+            elapsed = pd.Timestamp.utcnow().tz_localize(None) - pd.Timestamp(bars.last_ts)
+            missing = int(elapsed / pd.Timedelta(TIMEFRAMES[self.base_interval]))
+            if missing > 0:
+                bars.extend(self.client.get_recent_ohlcv(symbol, self.base_interval, min(missing + 1, self._depth[symbol])))
+
+        df = bars.frame(interval, limit=limit)
+        df.columns = [column.lower() for column in df.columns]
+        return df
+
+    def get_latest_price(self, symbol: str) -> float:
+        return self.client.get_latest_price(symbol)
+
+    def _step(self, interval: str) -> int:
+        # Base bars per bar of `interval`.
+        return int(TIMEFRAMES[interval] // TIMEFRAMES[self.base_interval])
+
+
 class BinanceMarketDataClient(MarketDataClient):
     """
     Placeholder for a future Binance-backed market data client.
@@ -11,7 +11,7 @@ from .execution import ExecutionConfig, NoOpExecutionAgent, IBKRExecutionAgent
 from .feedback import FeedbackConfig, SimpleFeedbackAgent
 from .interfaces import ExecutedTrade, Orchestrator as OrchestratorBase
 from .layers import LayerConfig, run_all_layers
-from .market_data import IBKRMarketDataClient, SimulatedMarketDataClient
+from .market_data import IBKRMarketDataClient, ResamplingMarketDataClient, SimulatedMarketDataClient
 
 
 @dataclass
@@ -25,6 +25,11 @@ class OrchestratorConfig:
     #   - "uat": QuantConnect / Lean-based environment (planned)
     #   - "prod": IBKR-backed live or paper trading
     env: str = "dev"
+    # Serve every layer interval from one cached 1m series
+    # (ResamplingMarketDataClient). Only meaningful for a client backed by a
+    # real bar history: the simulator draws an independent random walk per
+    # request, so resampling its 1m bars changes the volatility per interval.
+    resample_market_data: bool = False
 
 
 class BTCOrchestrator(OrchestratorBase):
@@ -60,6 +65,9 @@ class BTCOrchestrator(OrchestratorBase):
         else:
             raise ValueError(f"Unknown Hermes environment: {env}")
 
+        if config.resample_market_data:
+            md_client = ResamplingMarketDataClient(md_client)
+
         layer_config = LayerConfig(
             symbol=config.symbol,
             horizon_minutes=config.horizon_minutes,
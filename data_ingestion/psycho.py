@@ -29,13 +29,11 @@ def fetch_vix_and_sp500_data(period='1y', interval='1d'):
         pd.DataFrame: Combined DataFrame with VIX and SP500 data.
     """
 
-    vix = yf.download('^VIX', period=period, interval=interval)
-    sp500 = yf.download('^GSPC', period=period, interval=interval)
+    # One batched request for both tickers instead of two separate downloads
+    data = yf.download(['^VIX', '^GSPC'], period=period, interval=interval, group_by='column')
 
-    vix = vix[['Close']].rename(columns={'Close': 'VIX_Close'})
-    sp500 = sp500[['Close']].rename(columns={'Close': 'SP500_Close'})
-
-    combined = pd.concat([vix, sp500], axis=1)
+    closes = data['Close'].rename(columns={'^VIX': 'VIX_Close', '^GSPC': 'SP500_Close'})
+    combined = closes[['VIX_Close', 'SP500_Close']]
 
     logger.info(f"Fetched VIX and SP500 data for {period}")
 
@@ -11,7 +11,9 @@ ROOT = Path(__file__).resolve().parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from agents.feature_store import FeatureStore
 from agents.historical import YFinanceHistoricalPerformanceAgent
+from agents.orchestration import ConcurrentOrchestrationAgent
 from agents.technical import YFinanceTechnicalIndicatorAgent
 
 WATCHLIST = [
@@ -37,16 +39,22 @@ WATCHLIST = [
 def run_one(as_of: datetime) -> list[dict]:
     hist = YFinanceHistoricalPerformanceAgent()
     tech = YFinanceTechnicalIndicatorAgent()
+    # Warm the shared price cache with one batched download, then let the
+    # orchestrator compute every symbol x agent concurrently.
+    hist.prefetch(WATCHLIST, as_of)
+    tech.prefetch(WATCHLIST, as_of)
+    orchestrator = ConcurrentOrchestrationAgent({"historical": hist, "technical": tech})
+    panel = orchestrator.request_panel(WATCHLIST, as_of)
+    FeatureStore().write(fv for vectors in panel.values() for fv in vectors)
     results: list[dict] = []
     for symbol in WATCHLIST:
-        hv = hist.compute_features(symbol, as_of)
-        tv = tech.compute_features(symbol, as_of)
+        vectors = panel[symbol]
         results.append(
             {
                 "symbol": symbol,
                 "timestamp": as_of.isoformat(),
-                "historical": [fv.features for fv in hv],
-                "technical": tv.features,
+                "historical": [fv.features for fv in vectors if fv.meta["agent"] == "historical"],
+                "technical": next((fv.features for fv in vectors if fv.meta["agent"] == "technical"), {}),
             }
         )
     return results
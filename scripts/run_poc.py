@@ -15,7 +15,9 @@ if str(ROOT) not in sys.path:
 print("DEBUG ROOT", ROOT)
 print("DEBUG sys.path[0]", sys.path[0])
 
+from agents.feature_store import FeatureStore
 from agents.historical import YFinanceHistoricalPerformanceAgent
+from agents.orchestration import ConcurrentOrchestrationAgent
 from agents.technical import YFinanceTechnicalIndicatorAgent
 
 WATCHLIST = [
@@ -42,17 +44,23 @@ def run_poc(as_of: datetime) -> list[dict]:
     historical_agent = YFinanceHistoricalPerformanceAgent()
     technical_agent = YFinanceTechnicalIndicatorAgent()
 
+    historical_agent.prefetch(WATCHLIST, as_of)
+    technical_agent.prefetch(WATCHLIST, as_of)
+    orchestrator = ConcurrentOrchestrationAgent({"historical": historical_agent, "technical": technical_agent})
+    panel = orchestrator.request_panel(WATCHLIST, as_of)
+    FeatureStore().write(fv for vectors in panel.values() for fv in vectors)
     results: list[dict] = []
     for symbol in WATCHLIST:
-        hist_features = historical_agent.compute_features(symbol, as_of)
-        tech_feature = technical_agent.compute_features(symbol, as_of)
+        vectors = panel[symbol]
+        hist_features = [fv for fv in vectors if fv.meta["agent"] == "historical"]
+        tech_features = next((fv.features for fv in vectors if fv.meta["agent"] == "technical"), {})
 
         results.append(
             {
                 "symbol": symbol,
                 "timestamp": as_of.isoformat(),
                 "historical": [fv.features for fv in hist_features],
-                "technical": tech_feature.features,
+                "technical": tech_features,
             }
         )
     return results
@@ -0,0 +1,12 @@
+import pytest
+
+from agents import price_store
+
+
+def _no_network(*args, **kwargs):
+    raise AssertionError("tests must not call yfinance; patch price_store.download_ohlcv(_batch)")
+
+
+@pytest.fixture(autouse=True)
+def _offline(monkeypatch):
+    monkeypatch.setattr(price_store.yf, "download", _no_network)
@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime
+
+from agents.bus import EventBus
+from agents.interfaces import Event
+
+
+def _event(i, source="YF_PRICE", symbol="AAPL"):
+    return Event(symbol, datetime(2024, 1, 1), source, {"close": float(i)})
+
+
+def _closes(events):
+    return [event.payload["close"] for event in events]
+
+
+def test_fan_out_follows_topic_filters():
+    async def run():
+        bus = EventBus()
+        prices, aapl, news = [], [], []
+        bus.subscribe(prices.extend, sources="YF_PRICE", threaded=False)
+        bus.subscribe(aapl.extend, symbols="AAPL", threaded=False)
+        bus.subscribe(news.extend, sources="NEWS", threaded=False)
+        async with bus:
+            await bus.pump([_event(1), _event(2, symbol="MSFT"), _event(3, source="NEWS")])
+        return prices, aapl, news, bus.metrics()
+
+    prices, aapl, news, metrics = asyncio.run(run())
+    assert _closes(prices) == [1.0, 2.0] and _closes(aapl) == [1.0, 3.0] and _closes(news) == [3.0]
+    assert metrics["topics"]["YF_PRICE:AAPL"]["published"] == 1
+    assert metrics["topics"]["YF_PRICE:AAPL"]["delivered"] == 2
+
+
+def test_block_policy_applies_backpressure():
+    async def run():
+        bus = EventBus()
+        release = asyncio.Event()
+        seen = []
+
+        async def slow(events):
+            await release.wait()
+            seen.extend(events)
+
+        bus.subscribe(slow, maxsize=2)
+        async with bus:
+            for i in range(3):
+                await bus.publish(_event(i))
+            # The consumer holds one event and the queue two more: the next publish must wait.
+            blocked = asyncio.ensure_future(bus.publish(_event(3)))
+            await asyncio.sleep(0.05)
+            waited = not blocked.done()
+            release.set()
+            await blocked
+        return waited, seen
+
+    waited, seen = asyncio.run(run())
+    assert waited and _closes(seen) == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_drop_policies_count_what_they_drop():
+    async def run(policy):
+        bus = EventBus()
+        seen = []
+        subscription = bus.subscribe(seen.extend, maxsize=2, policy=policy, threaded=False)
+        for i in range(5):  # not started: nothing is consumed yet
+            bus.publish_nowait(_event(i))
+        async with bus:
+            pass
+        return _closes(seen), subscription, bus.metrics()
+
+    newest, subscription, metrics = asyncio.run(run("drop_newest"))
+    assert newest == [0.0, 1.0] and subscription.dropped == 3
+    assert metrics["topics"]["YF_PRICE:AAPL"]["dropped"] == 3
+    oldest, _, _ = asyncio.run(run("drop_oldest"))
+    assert oldest == [3.0, 4.0]
+
+
+def test_metrics_keep_same_named_subscribers_apart():
+    async def run():
+        bus = EventBus()
+
+        def fail(events):
+            raise RuntimeError("boom")
+
+        ok = bus.subscribe(lambda events: None, name="agent", threaded=False)
+        bad = bus.subscribe(fail, name="agent", threaded=False)
+        async with bus:
+            await bus.pump([_event(1), _event(2)])
+        return ok, bad, bus.metrics()["subscribers"]
+
+    ok, bad, subscribers = asyncio.run(run())
+    assert ok.id != bad.id and len(subscribers) == 2
+    assert (subscribers[ok.id]["delivered"], subscribers[ok.id]["errors"]) == (2, 0)
+    assert (subscribers[bad.id]["delivered"], subscribers[bad.id]["errors"]) == (0, 2)
+    assert subscribers[bad.id]["name"] == "agent"
+
+
+def test_batches_fill_up_to_batch_size():
+    async def run():
+        bus = EventBus()
+        batches = []
+        bus.subscribe(batches.append, batch_size=3, threaded=False)
+        for i in range(7):
+            bus.publish_nowait(_event(i))
+        async with bus:
+            pass
+        return [len(batch) for batch in batches]
+
+    assert asyncio.run(run()) == [3, 3, 1]
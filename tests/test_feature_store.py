@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.feature_store import FeatureStore
+from agents.interfaces import FeatureVector
+
+T0 = datetime(2024, 1, 1)
+
+
+def _vector(day, **features):
+    return FeatureVector("AAPL", T0 + timedelta(days=day), features)
+
+
+def test_round_trip_merges_vectors_of_one_timestamp(tmp_path):
+    store = FeatureStore(tmp_path)
+    store.write([_vector(0, rsi=50.0), _vector(0, bb=0.1), _vector(1, rsi=55.0, bb=0.2)], agent="tech")
+    frame = store.load("tech", "aapl")
+    assert frame.columns == ("rsi", "bb")
+    np.testing.assert_array_equal(frame.values, [[50.0, 0.1], [55.0, 0.2]])
+    assert list(frame.ts) == [np.datetime64(T0), np.datetime64(T0 + timedelta(days=1))]
+
+    # Appends past the last row extend the files; reopening sees every row.
+    store.write([_vector(2, rsi=60.0)], agent="tech")
+    reopened = FeatureStore(tmp_path).scan("tech", "AAPL", start=T0 + timedelta(days=1))
+    np.testing.assert_array_equal(reopened.column("rsi"), [55.0, 60.0])
+    assert np.isnan(reopened.column("bb")[-1])
+
+
+def test_rewrite_replaces_the_whole_row(tmp_path):
+    store = FeatureStore(tmp_path)
+    store.write([_vector(0, rsi=50.0, bb=0.1), _vector(1, rsi=55.0, bb=0.2)], agent="tech")
+    store.write([_vector(0, rsi=np.nan, bb=0.3)], agent="tech")
+    frame = store.load("tech", "AAPL")
+    assert np.isnan(frame.values[0, 0]) and frame.values[0, 1] == 0.3
+    np.testing.assert_array_equal(frame.values[1], [55.0, 0.2])
+
+
+def test_as_of_join_never_looks_ahead(tmp_path):
+    store = FeatureStore(tmp_path)
+    store.write([_vector(0, rsi=50.0), _vector(5, rsi=60.0)], agent="tech")
+    store.write([_vector(3, ret_7d=0.01)], agent="hist")
+    queries = [T0 - timedelta(days=1), T0 + timedelta(days=4), T0 + timedelta(days=5)]
+    frame = store.as_of("AAPL", queries, agents=["tech", "hist"])
+    assert frame.columns == ("rsi", "ret_7d")
+    np.testing.assert_array_equal(frame.values, [[np.nan, np.nan], [50.0, 0.01], [60.0, 0.01]])
+    stale = store.as_of("AAPL", queries, agents=["tech"], tolerance=pd.Timedelta(days=2))
+    assert np.isnan(stale.values[1, 0]) and stale.values[2, 0] == 60.0
+
+
+def test_training_set_and_conflicting_columns(tmp_path):
+    store = FeatureStore(tmp_path)
+    store.write([_vector(day, rsi=float(day)) for day in range(4)], agent="tech")
+    store.write([_vector(0, ret=0.5)], agent="hist")
+    frame = store.training_set(["AAPL"], start=T0 + timedelta(days=1), agents=["tech", "hist"])
+    np.testing.assert_array_equal(frame.values, [[1.0, 0.5], [2.0, 0.5], [3.0, 0.5]])
+    store.write([_vector(0, rsi=1.0)], agent="other")
+    with pytest.raises(ValueError):
+        store.as_of("AAPL", T0, agents=["tech", "other"])
+
+
+def test_concurrent_writers_keep_every_row(tmp_path):
+    store = FeatureStore(tmp_path)
+    days = list(range(40))
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda day: store.write([_vector(day, rsi=float(day))], agent="tech"), reversed(days)))
+    np.testing.assert_array_equal(store.load("tech", "AAPL").column("rsi"), days)
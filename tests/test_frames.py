@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.frames import FeatureFrame, FeatureRow, to_datetime64
+from agents.interfaces import FeatureVector
+from agents.records import FeatureRecord
+
+T0 = datetime(2024, 1, 2)
+
+
+def _vectors():
+    return [
+        FeatureVector("AAPL", T0, {"rsi": 50.0, "bb": 0.1}),
+        FeatureVector("MSFT", T0, {"bb": 0.2, "macd": 1.0}, {"rows": 90}),
+        FeatureVector("AAPL", T0 + timedelta(days=1), {"rsi": 55.0}),
+    ]
+
+
+def test_from_feature_vectors_unions_columns_in_first_seen_order():
+    frame = FeatureFrame.from_feature_vectors(_vectors())
+    assert frame.columns == ("rsi", "bb", "macd") and frame.shape == (3, 3)
+    np.testing.assert_array_equal(frame.values, [[50.0, 0.1, np.nan], [np.nan, 0.2, 1.0], [55.0, np.nan, np.nan]])
+    assert list(frame.symbols) == ["AAPL", "MSFT", "AAPL"]
+    assert frame.meta == [None, {"rows": 90}, None]
+    restricted = FeatureFrame.from_feature_vectors(_vectors(), columns=["bb"])
+    np.testing.assert_array_equal(restricted.values, [[0.1], [0.2], [np.nan]])
+
+
+def test_frames_share_one_interned_schema():
+    a = FeatureFrame.from_feature_vectors(_vectors())
+    b = FeatureFrame(("rsi", "bb", "macd"), np.zeros((1, 3)), ["X"], [T0])
+    assert a.schema is b.schema
+    assert a.select(["bb", "rsi"]).schema is FeatureFrame(("bb", "rsi"), np.zeros((0, 2)), [], []).schema
+    with pytest.raises(ValueError):
+        FeatureFrame(("a",), np.zeros((2, 2)), ["X", "Y"], [T0, T0])
+
+
+def test_feature_vectors_are_views_and_round_trip_without_copying():
+    frame = FeatureFrame.from_feature_vectors(_vectors())
+    vectors = frame.to_feature_vectors()
+    assert isinstance(vectors[0].features, FeatureRow) and vectors[0].features["rsi"] == 50.0
+    vectors[0].features["rsi"] = 51.0
+    assert frame.values[0, 0] == 51.0
+    with pytest.raises(KeyError):
+        vectors[0].features["unknown"] = 1.0
+    again = FeatureFrame.from_feature_vectors(vectors[1:])
+    assert np.shares_memory(again.values, frame.values) and again.symbols[0] == "MSFT"
+
+
+def test_select_reorders_and_fills_unknown_columns():
+    frame = FeatureFrame.from_feature_vectors(_vectors())
+    selected = frame.select(["macd", "rsi", "missing"])
+    assert selected.columns == ("macd", "rsi", "missing")
+    np.testing.assert_array_equal(selected.values[:, :2], frame.values[:, [2, 0]])
+    assert np.isnan(selected.column("missing")).all()
+
+
+def test_records_pandas_and_concat():
+    frame = FeatureFrame.from_feature_vectors(_vectors())
+    records = frame.to_records()
+    assert all(record.schema is frame.schema for record in records)
+    restored = FeatureFrame.from_records(records)
+    np.testing.assert_array_equal(restored.values, frame.values)
+    mixed = FeatureFrame.from_records([records[0], FeatureRecord.create("X", T0, {"other": 1.0})])
+    assert mixed.columns == ("rsi", "bb", "macd", "other")
+
+    df = frame.to_pandas()
+    assert df.index.names == ["symbol", "ts"] and FeatureFrame.from_pandas(df).columns == frame.columns
+    stacked = FeatureFrame.concat([frame, mixed])
+    assert len(stacked) == 5 and stacked.columns == ("rsi", "bb", "macd", "other")
+
+
+def test_to_datetime64_converts_to_naive_utc():
+    ts = to_datetime64([pd.Timestamp("2024-01-02 10:00", tz="US/Eastern"), datetime(2024, 1, 2)])
+    assert list(ts) == [np.datetime64("2024-01-02T15:00"), np.datetime64("2024-01-02T00:00")]
@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents import price_store
+from agents.historical import YFinanceHistoricalPerformanceAgent
+from agents.price_service import PriceService
+from agents.price_store import PRICE_COLUMNS, PriceStore
+
+HORIZONS = ("all", "12m", "4w", "7d", "24h")
+
+
+def _bars(index: pd.DatetimeIndex, seed: int) -> pd.DataFrame:
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.02, len(index))))
+    return pd.DataFrame({column: close for column in PRICE_COLUMNS}, index=index)
+
+
+# Equities trade on business days, BTC-USD every day, NEWCO listed recently.
+BARS = {
+    "AAPL": _bars(pd.bdate_range("2021-01-01", "2023-12-29"), 1),
+    "BTC-USD": _bars(pd.date_range("2021-01-01", "2023-12-31"), 2),
+    "NEWCO": _bars(pd.bdate_range("2023-11-20", "2023-12-29"), 3),
+}
+
+
+def _download(symbol, start, end):
+    bars = BARS.get(symbol)
+    return pd.DataFrame(columns=list(PRICE_COLUMNS), dtype="float64") if bars is None else bars.loc[start:end]
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_store, "download_ohlcv", _download)
+    monkeypatch.setattr(
+        price_store, "download_ohlcv_batch", lambda symbols, start, end: {s: _download(s, start, end) for s in symbols}
+    )
+    service = PriceService(store=PriceStore(tmp_path))
+    return YFinanceHistoricalPerformanceAgent(min_history_days=365, price_service=service)
+
+
+def _by_horizon(vectors):
+    return {vector.meta["horizon"]: vector for vector in vectors}
+
+
+@pytest.mark.parametrize("as_of", [datetime(2023, 12, 29), datetime(2023, 12, 31), datetime(2023, 12, 4), datetime(2023, 11, 21)])
+def test_panel_matches_per_symbol_features(agent, as_of):
+    symbols = ["AAPL", "BTC-USD", "NEWCO", "DELISTED"]
+    panel = agent.compute_panel_features(symbols, as_of, HORIZONS)
+    assert list(panel) == symbols
+    assert panel["DELISTED"] == []
+    for symbol in symbols:
+        expected = _by_horizon(agent.compute_features(symbol, as_of, HORIZONS))
+        actual = _by_horizon(panel[symbol])
+        assert list(actual) == list(expected), symbol
+        for horizon, vector in expected.items():
+            assert actual[horizon].meta == vector.meta
+            assert actual[horizon].ts == as_of
+            for name, value in vector.features.items():
+                assert actual[horizon].features[name] == pytest.approx(value, rel=1e-8, abs=1e-12), (symbol, name)
+
+
+def test_backfill_rows_match_point_in_time_features(agent):
+    frame = agent.backfill_features("AAPL", datetime(2023, 6, 1), datetime(2023, 9, 1), HORIZONS)
+    assert list(frame.index) == list(BARS["AAPL"].loc["2023-06-01":"2023-09-01"].index)
+    # Like compute_features, unknown horizons ("24h") are skipped.
+    assert [name for name in frame.columns if name.endswith("_sharpe")] == ["all_sharpe", "12m_sharpe", "4w_sharpe", "7d_sharpe"]
+    for ts, row in frame.iloc[::7].iterrows():
+        expected = {}
+        for vector in agent.compute_features("AAPL", ts.to_pydatetime(), HORIZONS):
+            expected.update(vector.features)
+        np.testing.assert_allclose(row[list(expected)].to_numpy(), list(expected.values()), rtol=1e-8, atol=1e-12)
+        # Horizons compute_features skips (fewer than 3 bars) are NaN.
+        assert row.drop(list(expected)).isna().all()
+
+
+def test_backfill_has_no_look_ahead(agent):
+    full = agent.backfill_features("BTC-USD", datetime(2023, 3, 1), datetime(2023, 12, 31))
+    truncated = agent.backfill_features("BTC-USD", datetime(2023, 3, 1), datetime(2023, 6, 30))
+    pd.testing.assert_frame_equal(full.loc[: datetime(2023, 6, 30)], truncated)
+
+
+def test_backfill_without_prices_is_empty(agent):
+    frame = agent.backfill_features("DELISTED", datetime(2023, 1, 1), datetime(2023, 6, 30), ("12m", "bogus"))
+    assert frame.empty
+    assert list(frame.columns) == ["12m_cumulative_return", "12m_annualized_vol", "12m_max_drawdown", "12m_sharpe", "12m_trend_slope"]
+
+
+def test_intraday_as_of_keeps_the_first_daily_bar(agent):
+    as_of = datetime(2023, 12, 29, 15, 30)
+    (vector,) = agent.compute_features("BTC-USD", as_of, ("all",))
+    # 2022-12-29 00:00 is 365 days before as_of's date and must be in the window.
+    assert vector.meta["rows"] == len(BARS["BTC-USD"].loc["2022-12-29":"2023-12-29"])
+    (midnight,) = agent.compute_features("BTC-USD", datetime(2023, 12, 29), ("all",))
+    assert vector.features == midnight.features
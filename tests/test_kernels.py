@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.kernels import (
+    TRADING_DAYS,
+    WINDOW_STAT_NAMES,
+    PanelPrefixSumKernel,
+    PrefixSumKernel,
+    expanding_ols,
+    rolling_ols,
+    suffix_max_drawdown,
+    window_max_drawdown,
+    window_ols,
+)
+
+
+@pytest.fixture
+def closes():
+    rng = np.random.default_rng(7)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, 300))))
+
+
+def _drawdown(prices):
+    return float((prices / prices.cummax() - 1).min())
+
+
+def _slope(values):
+    return np.polyfit(np.arange(len(values)), values, 1)[0]
+
+
+def test_window_stats_match_pandas_rolling(closes):
+    window = 20
+    ends = np.arange(window - 1, len(closes))
+    stats = PrefixSumKernel(closes.to_numpy()).window_stats(ends - window + 1, ends)
+
+    returns = closes.pct_change().rolling(window - 1)
+    expected = {
+        "cumulative_return": closes.pct_change(window - 1),
+        "annualized_volatility": returns.std() * np.sqrt(TRADING_DAYS),
+        "sharpe_ratio": returns.mean() / returns.std() * np.sqrt(TRADING_DAYS),
+        # The drawdown path starts at the first return, one bar into the window.
+        "max_drawdown": closes.rolling(window - 1).apply(_drawdown, raw=False),
+        "trend_slope": np.log(closes).rolling(window).apply(_slope, raw=True),
+    }
+    for name in WINDOW_STAT_NAMES:
+        np.testing.assert_allclose(stats[name], expected[name].to_numpy()[ends], rtol=1e-8, atol=1e-12, err_msg=name)
+
+
+def test_window_stats_default_to_windows_ending_at_last_bar(closes):
+    kernel = PrefixSumKernel(closes.to_numpy())
+    starts = np.array([0, 100, 250, 298])
+    stats = kernel.window_stats(starts)
+    for i, start in enumerate(starts):
+        window = closes.iloc[start:]
+        returns = window.pct_change().dropna()
+        assert stats["cumulative_return"][i] == pytest.approx(window.iloc[-1] / window.iloc[0] - 1)
+        assert stats["annualized_volatility"][i] == pytest.approx(returns.std() * np.sqrt(TRADING_DAYS), nan_ok=True)
+        assert stats["max_drawdown"][i] == pytest.approx(_drawdown(window.iloc[1:]))
+        assert stats["trend_slope"][i] == pytest.approx(_slope(np.log(window.to_numpy())))
+
+
+def test_single_bar_windows_are_zero(closes):
+    stats = PrefixSumKernel(closes.to_numpy()).window_stats(np.array([5]), np.array([5]))
+    assert all(stats[name][0] == 0.0 for name in WINDOW_STAT_NAMES)
+
+
+def test_rolling_ols_matches_pandas(closes):
+    y = np.log(closes)
+    window = 15
+    stats = rolling_ols(y.to_numpy(), window)
+    x = pd.Series(np.arange(len(y)), dtype="float64")
+    slope = y.rolling(window).apply(_slope, raw=True)
+    intercept = y.rolling(window).apply(lambda v: np.polyfit(np.arange(len(v)), v, 1)[1], raw=True)
+    np.testing.assert_allclose(stats["slope"], slope, rtol=1e-7, atol=1e-12)
+    np.testing.assert_allclose(stats["intercept"], intercept, rtol=1e-9)
+    np.testing.assert_allclose(stats["r2"], y.rolling(window).corr(x) ** 2, rtol=1e-7)
+    assert np.isnan(stats["slope"][: window - 1]).all()
+
+
+def test_expanding_ols_matches_pandas(closes):
+    y = closes.to_numpy()
+    stats = expanding_ols(y)
+    x = pd.Series(np.arange(len(y)), dtype="float64")
+    np.testing.assert_allclose(stats["r2"][1:], (closes.expanding().corr(x) ** 2)[1:], rtol=1e-7)
+    np.testing.assert_allclose(stats["slope"][-1], _slope(y), rtol=1e-9)
+    assert np.isnan(stats["slope"][0])
+
+
+def test_window_ols_fits_each_column():
+    rng = np.random.default_rng(3)
+    y = np.cumsum(rng.normal(size=(50, 3)), axis=0)
+    starts, ends = np.array([0, 10, 30]), np.array([9, 40, 49])
+    stats = window_ols(y, starts, ends)
+    assert stats["slope"].shape == (3, 3)
+    for w, (lo, hi) in enumerate(zip(starts, ends)):
+        for c in range(3):
+            slope, intercept = np.polyfit(np.arange(hi - lo + 1), y[lo : hi + 1, c], 1)
+            assert stats["slope"][w, c] == pytest.approx(slope)
+            assert stats["intercept"][w, c] == pytest.approx(intercept)
+
+
+def test_drawdown_kernels_match_pandas(closes):
+    prices = closes.to_numpy()
+    suffix = suffix_max_drawdown(prices)
+    assert suffix[0] == pytest.approx(_drawdown(closes))
+    assert suffix[150] == pytest.approx(_drawdown(closes.iloc[150:]))
+
+    starts, ends = np.array([0, 40, 120, 200]), np.array([60, 41, 299, 200])
+    for chunk in (4_000_000, 50):
+        result = window_max_drawdown(prices, starts, ends, max_cells=chunk)
+        expected = [_drawdown(closes.iloc[lo : hi + 1]) for lo, hi in zip(starts, ends)]
+        np.testing.assert_allclose(result, expected)
+
+
+def test_panel_kernel_matches_per_symbol_kernel(closes):
+    rng = np.random.default_rng(11)
+    panel = pd.DataFrame({"BTC-USD": closes, "AAPL": closes.sample(frac=1.0, random_state=1).to_numpy()})
+    panel.loc[rng.random(len(panel)) < 0.3, "AAPL"] = np.nan
+    panel.loc[:9, "AAPL"] = np.nan
+    starts = np.array([0, 5, 100, 290, 299])
+    stats = PanelPrefixSumKernel(panel.to_numpy()).window_stats(starts)
+
+    for c, symbol in enumerate(panel.columns):
+        column = panel[symbol]
+        own = column.dropna().reset_index(drop=True)
+        kernel = PrefixSumKernel(own.to_numpy())
+        for i, start in enumerate(starts):
+            rows = int(column.iloc[start:].notna().sum())
+            assert stats["rows"][i, c] == rows
+            if rows == 0:
+                assert all(np.isnan(stats[name][i, c]) for name in WINDOW_STAT_NAMES)
+                continue
+            expected = kernel.window_stats(np.array([len(own) - rows]))
+            for name in WINDOW_STAT_NAMES:
+                assert stats[name][i, c] == pytest.approx(expected[name][0], rel=1e-8, abs=1e-12, nan_ok=True), (symbol, start, name)
+
+
+def test_panel_kernel_rejects_one_dimensional_input(closes):
+    with pytest.raises(ValueError):
+        PanelPrefixSumKernel(closes.to_numpy())
@@ -0,0 +1,15 @@
+import numpy as np
+
+from btc_engine.layers import HistoricalPerformanceLayer, LayerConfig
+from btc_engine.market_data import SimulatedMarketDataClient
+
+
+def test_layer_a_trend_is_ols_of_last_50_log_closes():
+    client = SimulatedMarketDataClient(seed=5)
+    output = HistoricalPerformanceLayer(LayerConfig(market_data_client=client)).run()
+    closes = client.get_recent_ohlcv("BTC-USD", "1h", 100)["close"].to_numpy()
+    slope, intercept = np.polyfit(np.arange(50), np.log(closes[-50:]), 1)
+    fitted = intercept + slope * np.arange(50)
+    r2 = 1 - np.sum((np.log(closes[-50:]) - fitted) ** 2) / np.sum((np.log(closes[-50:]) - np.log(closes[-50:]).mean()) ** 2)
+    np.testing.assert_allclose(output.extras["trend_slope"], slope, rtol=1e-6)
+    np.testing.assert_allclose(output.extras["trend_r2"], r2, rtol=1e-6)
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents import price_store
+from agents.historical import YFinanceHistoricalPerformanceAgent
+from agents.learning import WalkForwardLearningAgent, walk_forward_folds
+from agents.price_service import PriceService
+from agents.price_store import PRICE_COLUMNS, PriceStore
+
+
+def test_folds_leave_a_gap_between_train_and_test():
+    folds = walk_forward_folds(100, train_size=40, test_size=10, gap=3)
+    assert [(f.train_start, f.train_end, f.test_start, f.test_end) for f in folds[:2]] == [(0, 40, 43, 53), (10, 50, 53, 63)]
+    assert folds[-1].test_end == 100
+    assert all(f.test_start - f.train_end == 3 and f.train_end - f.train_start == 40 for f in folds)
+    expanding = walk_forward_folds(100, train_size=40, test_size=10, gap=3, expanding=True)
+    assert all(f.train_start == 0 for f in expanding)
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    index = pd.bdate_range("2019-01-01", "2023-12-29")
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, len(index))))
+    bars = pd.DataFrame({column: close for column in PRICE_COLUMNS}, index=index)
+    monkeypatch.setattr(price_store, "download_ohlcv", lambda symbol, start, end: bars.loc[start:end])
+    monkeypatch.setattr(
+        price_store, "download_ohlcv_batch", lambda symbols, start, end: {s: bars.loc[start:end] for s in symbols}
+    )
+    service = PriceService(store=PriceStore(tmp_path))
+    historical = YFinanceHistoricalPerformanceAgent(min_history_days=365, price_service=service)
+    return WalkForwardLearningAgent(historical=historical, train_days=120, test_days=40, max_workers=1)
+
+
+def test_backtest_data_is_cached_per_price_version(agent):
+    start, end = datetime(2021, 1, 1), datetime(2023, 6, 30)
+    datasets, folds = agent.backtest_data(["AAPL"], start, end)
+    assert agent.backtest_data(["AAPL"], start, end)[0] is datasets
+    assert folds[0] and all(f.test_start - f.train_end == agent.horizon_days for f in folds[0])
+
+    # Extending the stored history bumps the price version and rebuilds the data.
+    agent.historical.price_service.store.get_history("AAPL", datetime(2023, 7, 1), datetime(2023, 9, 29))
+    assert agent.backtest_data(["AAPL"], start, end)[0] is not datasets
+
+
+def test_search_registers_survivors(agent):
+    ranked = agent.search_model_configs(["AAPL"], datetime(2021, 1, 1), datetime(2023, 6, 30), n_configs=6, top_k=2, seed=0)
+    assert len(ranked) == 2 and all(entry["config_id"] in agent.configs for entry in ranked)
+    assert ranked[0]["score"] >= ranked[1]["score"]
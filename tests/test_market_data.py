@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from btc_engine.market_data import MarketDataClient, ResamplingMarketDataClient
+
+
+class _MinuteClient(MarketDataClient):
+    #1m bars ending at the current minute; records the requested limits.
+
+    def __init__(self) -> None:
+        self.limits = []
+
+    def get_recent_ohlcv(self, symbol, interval, limit):
+        assert interval == "1m"
+        self.limits.append(limit)
+        end = pd.Timestamp.utcnow().tz_localize(None).floor("min")
+        index = pd.date_range(end=end, periods=limit, freq="1min")
+        close = 50000 + np.arange(limit, dtype="float64")
+        return pd.DataFrame(
+            {"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 1.0}, index=index
+        )
+
+    def get_latest_price(self, symbol):
+        return 50000.0
+
+
+def _complete_bars(frame: pd.DataFrame, minutes: int) -> int:
+    # Bars whose bucket is fully covered by base bars (volume = 1 per minute).
+    return int((frame["volume"] == minutes).sum())
+
+
+def test_coarse_request_after_fine_request_gets_full_history():
+    client = _MinuteClient()
+    md = ResamplingMarketDataClient(client)
+    assert len(md.get_recent_ohlcv("BTC-USD", "5m", 50)) == 50
+    hourly = md.get_recent_ohlcv("BTC-USD", "1h", 100)
+    assert len(hourly) == 100
+    # Only the newest (still forming) hour may be partial.
+    assert _complete_bars(hourly.iloc[:-1], 60) == 99
+    assert len(client.limits) == 1
+
+
+def test_deeper_request_refetches_history():
+    client = _MinuteClient()
+    md = ResamplingMarketDataClient(client, coarse_bars=10)
+    md.get_recent_ohlcv("BTC-USD", "1h", 5)
+    hourly = md.get_recent_ohlcv("BTC-USD", "1h", 50)
+    assert len(hourly) == 50 and _complete_bars(hourly.iloc[:-1], 60) == 49
+    assert client.limits[-1] >= 52 * 60
+
+
+def test_orchestrator_resamples_only_when_asked():
+    from btc_engine.market_data import SimulatedMarketDataClient
+    from btc_engine.orchestrator import BTCOrchestrator, OrchestratorConfig
+
+    plain = BTCOrchestrator(OrchestratorConfig(env="dev"))._layer_config.market_data_client
+    wrapped = BTCOrchestrator(OrchestratorConfig(env="dev", resample_market_data=True))._layer_config.market_data_client
+    assert isinstance(plain, SimulatedMarketDataClient)
+    assert isinstance(wrapped, ResamplingMarketDataClient)
+
+
+def test_market_data_does_not_import_the_price_store():
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    code = "import sys, btc_engine.market_data; print('yfinance' in sys.modules, 'agents.price_store' in sys.modules)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parents[1]
+    ).stdout
+    assert out.split() == ["False", "False"]
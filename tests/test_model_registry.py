@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.frames import FeatureFrame
+from agents.model_registry import ModelRegistry
+from agents.prediction import ModelPredictionAgent
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=(400, 4))
+    df = pd.DataFrame(values, columns=["a", "b", "c", "d"], index=pd.bdate_range("2022-01-03", periods=400))
+    targets = values @ np.array([0.02, -0.01, 0.0, 0.005]) + rng.normal(0, 0.005, 400)
+    return FeatureFrame.from_pandas(df, symbol="AAPL"), targets
+
+
+def test_saved_model_scores_identically(tmp_path, frame):
+    features, targets = frame
+    trainer = ModelPredictionAgent(registry=ModelRegistry(tmp_path))
+    model_id = trainer.train_frame("AAPL", features, targets, {"model": "gbm", "n_estimators": 20})
+
+    loaded = ModelRegistry(tmp_path).load(model_id)
+    assert isinstance(loaded.model.leaves, np.memmap)
+    expected = trainer.score_frame(features)
+    reloaded = ModelPredictionAgent(models={model_id: loaded}, active_model_id=model_id).score_frame(features)
+    for key in expected:
+        np.testing.assert_array_equal(reloaded[key], expected[key])
+
+
+def test_tick_keeps_locally_trained_model(tmp_path, frame):
+    features, targets = frame
+    registry = ModelRegistry(tmp_path)
+    stored = ModelPredictionAgent(registry=registry).train_frame("AAPL", features, targets)
+    registry.promote(stored)
+
+    agent = ModelPredictionAgent(registry=ModelRegistry(tmp_path))
+    agent.set_active_model(agent.train_frame("AAPL", features, targets, {"model": "logistic"}))
+    trained = agent.get_active_model()
+    agent.tick(datetime(2024, 1, 1))
+    assert agent.get_active_model() == trained != stored
+
+
+def test_tick_follows_promotions_but_keeps_local_activation(tmp_path, frame):
+    features, targets = frame
+    registry = ModelRegistry(tmp_path)
+    trainer = ModelPredictionAgent(registry=registry)
+    first = trainer.train_frame("AAPL", features, targets, {"model": "ridge"})
+    second = trainer.train_frame("AAPL", features, targets, {"model": "logistic"})
+    registry.promote(second)
+
+    follower = ModelPredictionAgent(registry=ModelRegistry(tmp_path))
+    assert follower.get_active_model() == second
+
+    # A local activation survives ticks while the registry's ACTIVE id is unchanged.
+    follower.set_active_model(first)
+    follower.tick(datetime(2024, 1, 1))
+    assert follower.get_active_model() == first
+
+    # Re-promoting the same id is not a change; a different id is followed.
+    registry.promote(second)
+    follower.tick(datetime(2024, 1, 2))
+    assert follower.get_active_model() == first
+    registry.promote(first)
+    follower.tick(datetime(2024, 1, 3))
+    registry.promote(second)
+    follower.tick(datetime(2024, 1, 4))
+    assert follower.get_active_model() == second
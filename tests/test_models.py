@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from agents.models import LogisticRegression
+
+
+@pytest.mark.parametrize("sign", [1.0, -1.0])
+def test_single_class_fit_is_a_bounded_constant(sign):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 3))
+    model = LogisticRegression().fit(X, sign * np.abs(rng.normal(size=200)))
+    proba = model.predict_proba(rng.normal(size=(50, 3)) * 100)
+    assert np.isfinite(model.intercept) and not model.coef.any()
+    assert np.allclose(proba, proba[0]) and 0.0 < proba[0] < 1.0
+    assert (proba[0] > 0.5) == (sign > 0)
+
+
+def test_empty_fit_predicts_even_odds():
+    model = LogisticRegression().fit(np.empty((0, 2)), np.empty(0))
+    assert np.allclose(model.predict_proba(np.ones((3, 2))), 0.5)
+
+
+def test_two_class_fit_separates():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(500, 2))
+    y = X[:, 0] + 0.1 * rng.normal(size=500)
+    model = LogisticRegression().fit(X, y)
+    assert model.coef[0] > 1.0
+    assert np.mean((model.predict(X) > 0) == (y > 0)) > 0.9
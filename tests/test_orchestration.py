@@ -0,0 +1,46 @@
+import time
+from datetime import datetime
+
+from agents.interfaces import FeatureVector
+from agents.orchestration import ConcurrentOrchestrationAgent
+
+AS_OF = datetime(2024, 6, 3)
+
+
+class _SymbolAgent:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls = []
+
+    def compute_features(self, symbol, as_of):
+        self.calls.append(symbol)
+        time.sleep(self.delay)
+        return FeatureVector(symbol, as_of, {"x": float(len(symbol))})
+
+
+class _PanelAgent(_SymbolAgent):
+    def compute_panel_features(self, symbols, as_of):
+        self.calls.append(tuple(symbols))
+        return {symbol: [FeatureVector(symbol, as_of, {"y": 1.0})] for symbol in symbols if symbol != "NONE"}
+
+
+def test_panel_agents_get_one_call_per_request():
+    panel, single = _PanelAgent(), _SymbolAgent()
+    orchestrator = ConcurrentOrchestrationAgent({"panel": panel, "single": single})
+    results = orchestrator.request_panel(["AAPL", "MSFT", "NONE"], AS_OF)
+
+    assert panel.calls == [("AAPL", "MSFT", "NONE")]
+    assert sorted(single.calls) == ["AAPL", "MSFT", "NONE"]
+    assert [(fv.meta["agent"], fv.features) for fv in results["AAPL"]] == [("panel", {"y": 1.0}), ("single", {"x": 4.0})]
+    assert [fv.meta["agent"] for fv in results["NONE"]] == ["single"]
+    state = orchestrator.get_symbol_state("MSFT")["agents"]
+    assert state["panel"]["status"] == "ok" and state["panel"]["panel"] and state["panel"]["vectors"] == 1
+
+
+def test_timed_out_agent_is_left_out():
+    orchestrator = ConcurrentOrchestrationAgent({"fast": _SymbolAgent(), "slow": _SymbolAgent(delay=1.0)}, timeout=0.1)
+    started = time.perf_counter()
+    vectors = orchestrator.request_features("AAPL", AS_OF)
+    assert time.perf_counter() - started < 0.8
+    assert [fv.meta["agent"] for fv in vectors] == ["fast"]
+    assert orchestrator.get_symbol_state("AAPL")["agents"]["slow"]["status"] == "timeout"
@@ -0,0 +1,123 @@
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.interfaces import Prediction
+from agents.outcomes import OutcomeLabeler, horizon_ns, label_returns
+
+DAY = horizon_ns("1d")
+BARS = pd.date_range("2024-01-01", periods=10, freq="D")
+CLOSES = np.array([100.0, 101.0, 99.0, 105.0, 104.0, 110.0, 90.0, 95.0, 100.0, 102.0])
+
+
+class FakePrices:
+    def __init__(self):
+        self.calls = []
+
+    def get_history(self, symbol, start, end, tolerance=None):
+        self.calls.append((symbol, start, end))
+        frame = pd.DataFrame({"Close": CLOSES}, index=BARS)
+        return frame.loc[start:end]
+
+
+def _prediction(ts, horizon="1d", symbol="AAPL"):
+    return Prediction(symbol, ts, horizon, 0.0, 0.5, 0.5, 0.0, "test")
+
+
+def _ns(*values):
+    return pd.DatetimeIndex(values).as_unit("ns").asi8
+
+
+def test_label_returns_uses_as_of_entry_and_exit_bars():
+    # A prediction between bars enters at the previous close; the exit is the last close at or before ts + h.
+    pred = _ns("2024-01-02", "2024-01-02 12:00", "2024-01-05")
+    result = label_returns(BARS.asi8, CLOSES, pred, DAY)
+    np.testing.assert_allclose(result["realized"], [99 / 101 - 1, 99 / 101 - 1, 110 / 104 - 1])
+    assert result["label"].tolist() == [-1, -1, 1]
+    assert not result["open"].any()
+    assert (result["ts_outcome"] == pred + DAY).all()
+
+
+def test_label_returns_broadcasts_horizons():
+    result = label_returns(BARS.asi8, CLOSES, _ns("2024-01-01")[:, None], np.array([DAY, 7 * DAY])[None, :])
+    assert result["realized"].shape == (1, 2)
+    np.testing.assert_allclose(result["realized"][0], [101 / 100 - 1, 95 / 100 - 1])
+
+
+def test_label_returns_leaves_open_horizons_unlabelled():
+    result = label_returns(BARS.asi8, CLOSES, _ns("2024-01-09", "2024-01-10"), DAY)
+    assert result["open"].tolist() == [False, True]
+    assert np.isfinite(result["realized"][0]) and np.isnan(result["realized"][1])
+    assert result["label"][1] == 0
+
+
+def test_label_returns_is_nan_without_entry_bar():
+    result = label_returns(BARS.asi8, CLOSES, _ns("2023-12-30"), DAY)
+    assert not result["open"][0]
+    assert np.isnan(result["realized"][0]) and result["label"][0] == 0
+
+
+def test_label_returns_threshold_marks_small_moves_flat():
+    pred = _ns("2024-01-01", "2024-01-02", "2024-01-03")
+    result = label_returns(BARS.asi8, CLOSES, pred, DAY, threshold=0.02)
+    # +1%, -1.98%, +6.06%
+    assert result["label"].tolist() == [0, 0, 1]
+
+
+def test_label_returns_empty_series_is_open():
+    result = label_returns(np.empty(0, dtype=np.int64), np.empty(0), _ns("2024-01-01"), DAY)
+    assert result["open"].all() and np.isnan(result["realized"]).all()
+
+
+def test_label_reads_prices_up_to_as_of():
+    prices = FakePrices()
+    labeler = OutcomeLabeler(price_service=prices)
+    out = labeler.label("AAPL", [datetime(2024, 1, 3), datetime(2024, 1, 5)], horizons=("1d", "1w"), as_of=datetime(2024, 1, 6))
+    np.testing.assert_allclose(out["1d"]["realized"], [105 / 99 - 1, 110 / 104 - 1])
+    # The 1w exit is after as_of, so later bars must not be used.
+    assert out["1w"]["open"].all() and np.isnan(out["1w"]["realized"]).all()
+    (symbol, start, end), = prices.calls
+    assert (symbol, start, end) == ("AAPL", datetime(2023, 12, 27), datetime(2024, 1, 6))
+
+
+def test_resolve_labels_closed_horizons_and_keeps_open_ones_pending():
+    labeler = OutcomeLabeler(price_service=FakePrices())
+    closed, open_ = _prediction(datetime(2024, 1, 2)), _prediction(datetime(2024, 1, 3), horizon="1w")
+    labeler.submit([closed, open_])
+
+    outcomes = labeler.resolve(as_of=datetime(2024, 1, 5))
+    assert [outcome.prediction for outcome in outcomes] == [closed]
+    assert outcomes[0].ts_outcome == datetime(2024, 1, 3)
+    assert outcomes[0].realized_return == pytest.approx(99 / 101 - 1) and outcomes[0].label == -1
+    assert labeler.pending == [open_]
+
+    outcomes = labeler.resolve(as_of=datetime(2024, 1, 10))
+    assert [outcome.prediction for outcome in outcomes] == [open_]
+    assert outcomes[0].realized_return == pytest.approx(102 / 99 - 1)
+    assert labeler.pending == [] and labeler.resolve() == []
+
+
+def test_resolve_reports_predictions_without_entry_bar(caplog):
+    labeler = OutcomeLabeler(price_service=FakePrices())
+    early, ok = _prediction(datetime(2023, 12, 20)), _prediction(datetime(2024, 1, 2), symbol="MSFT")
+    labeler.submit([early, ok])
+    with caplog.at_level(logging.WARNING, logger="agents.outcomes"):
+        outcomes = labeler.resolve(as_of=datetime(2024, 1, 10))
+    assert [outcome.prediction for outcome in outcomes] == [ok]
+    assert labeler.pending == [] and labeler.unlabeled == [early]
+    assert "no entry bar" in caplog.text
+
+
+def test_label_predictions_returns_unlabelled_predictions():
+    labeler = OutcomeLabeler(price_service=FakePrices())
+    early, ok, later = (
+        _prediction(datetime(2023, 12, 20)),
+        _prediction(datetime(2024, 1, 2)),
+        _prediction(datetime(2024, 1, 9), horizon="1m"),
+    )
+    outcomes, still_open, unlabeled = labeler.label_predictions([early, ok, later], as_of=datetime(2024, 1, 10))
+    assert [outcome.prediction for outcome in outcomes] == [ok]
+    assert still_open == [later] and unlabeled == [early]
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from agents.frames import FeatureFrame
+from agents.interfaces import FeatureVector, Outcome, Prediction
+from agents.models import _sigmoid
+from agents.prediction import ModelPredictionAgent
+
+T0 = datetime(2024, 1, 2)
+
+
+def _data(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 3))
+    y = 0.01 * X[:, 0] - 0.005 * X[:, 1] + 0.002 * rng.normal(size=n)
+    frame = FeatureFrame(("a", "b", "c"), X, np.full(n, "AAPL"), [T0 + timedelta(days=i) for i in range(n)])
+    return frame, y
+
+
+def _vectors(frame, k=5):
+    # Same features, keys in another order and with an extra unknown one.
+    return [
+        FeatureVector(
+            "AAPL", T0 + timedelta(days=i), {"c": frame.values[i, 2], "extra": 9.0, "a": frame.values[i, 0], "b": frame.values[i, 1]}
+        )
+        for i in range(k)
+    ]
+
+
+def test_predict_and_batch_predict_agree():
+    frame, y = _data()
+    agent = ModelPredictionAgent()
+    agent.train_frame("AAPL", frame, y)
+    vectors = _vectors(frame)
+    batch = agent.batch_predict(vectors)
+    assert [agent.predict(vector) for vector in vectors] == batch
+    assert batch == agent.batch_predict_frame(frame[:5])
+
+
+def test_regression_outputs_map_to_prediction_fields():
+    frame, y = _data()
+    agent = ModelPredictionAgent()
+    model_id = agent.train_frame("AAPL", frame, y, {"model": "ridge", "alpha": 1.0})
+    trained = agent.models[model_id]
+    expected = trained.model.predict(frame.values[:5])
+    scale = np.std(y - trained.model.predict(frame.values))
+    assert trained.return_scale == pytest.approx(scale)
+    predictions = agent.batch_predict_frame(frame[:5])
+    prob_up = _sigmoid(1.702 * expected / scale)
+    np.testing.assert_allclose([p.expected_return for p in predictions], expected)
+    np.testing.assert_allclose([p.prob_up for p in predictions], prob_up)
+    np.testing.assert_allclose([p.prob_down for p in predictions], 1.0 - prob_up)
+    np.testing.assert_allclose([p.confidence for p in predictions], np.abs(2.0 * prob_up - 1.0))
+    assert all(p.model_id == model_id and p.horizon == "1d" for p in predictions)
+
+
+def test_classifier_outputs_map_to_prediction_fields():
+    frame, y = _data()
+    agent = ModelPredictionAgent(horizon="1w")
+    model_id = agent.train_frame("AAPL", frame, y, {"model": "logistic", "alpha": 1.0})
+    trained = agent.models[model_id]
+    prob_up = trained.model.predict_proba(frame.values[:5])
+    scores = agent.score_frame(frame[:5])
+    np.testing.assert_allclose(scores["prob_up"], prob_up)
+    np.testing.assert_allclose(scores["expected_return"], (2.0 * prob_up - 1.0) * np.abs(y).mean())
+    predictions = agent.batch_predict_frame(frame[:5])
+    assert all(p.horizon == "1w" for p in predictions)
+    # Up moves are driven by feature a, so P(up) must rise with it.
+    assert np.corrcoef(frame.values[:, 0], agent.score_frame(frame)["prob_up"])[0, 1] > 0.5
+
+
+def test_zero_residual_regression_gives_hard_probabilities():
+    frame, _ = _data()
+    agent = ModelPredictionAgent()
+    agent.train_frame("AAPL", frame, np.zeros(len(frame)), {"model": "ridge", "alpha": 1.0})
+    agent.models[agent.active_model_id].return_scale = 0.0
+    scores = agent.score_frame(frame)
+    assert set(np.unique(scores["prob_up"])) <= {0.0, 0.5, 1.0}
+
+
+def test_train_from_vector_outcome_pairs():
+    frame, y = _data(50)
+    vectors = frame.to_feature_vectors()
+    placeholder = Prediction("AAPL", T0, "1d", 0.0, 0.5, 0.5, 0.0, "none")
+    pairs = [
+        (vector, Outcome("AAPL", vector.ts, vector.ts, float(r), int(np.sign(r)), placeholder))
+        for vector, r in zip(vectors, y)
+    ]
+    agent = ModelPredictionAgent()
+    model_id = agent.train("AAPL", pairs, {"model": "ridge"})
+    assert agent.get_active_model() == model_id
+    assert agent.models[model_id].schema is frame.schema
@@ -0,0 +1,104 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents import price_store
+from agents.price_cache import RangePriceCache
+from agents.price_service import PriceService
+from agents.price_store import PRICE_COLUMNS, PriceStore
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def fake(symbol, start, end):
+        with lock:
+            calls.append((symbol, start, end))
+        time.sleep(0.2)
+        index = pd.bdate_range(start, end)
+        return pd.DataFrame({column: np.arange(len(index), dtype="float64") + 1 for column in PRICE_COLUMNS}, index=index)
+
+    monkeypatch.setattr(price_store, "download_ohlcv", fake)
+    return calls
+
+
+def test_concurrent_requests_share_one_download(tmp_path, downloads):
+    service = PriceService(store=PriceStore(tmp_path))
+    start, end = datetime(2024, 1, 1), datetime(2024, 3, 1)
+    with ThreadPoolExecutor(16) as pool:
+        frames = list(pool.map(lambda _: service.get_history("AAPL", start, end), range(16)))
+    assert len(downloads) == 1
+    assert all(frame.equals(frames[0]) and len(frame) for frame in frames)
+    stats = service.cache.stats()
+    assert (stats.misses, stats.hits + stats.coalesced) == (1, 15)
+
+
+def test_failed_fetch_is_raised_to_waiters(tmp_path, monkeypatch):
+    def broken(symbol, start, end):
+        time.sleep(0.2)
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(price_store, "download_ohlcv", broken)
+    service = PriceService(store=PriceStore(tmp_path))
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(service.get_history, "AAPL", datetime(2024, 1, 1), datetime(2024, 2, 1)) for _ in range(4)]
+    assert all(isinstance(future.exception(), RuntimeError) for future in futures)
+    assert not service._inflight
+
+
+def test_missing_span_stays_within_requested_end():
+    cache = RangePriceCache()
+    cache.put("AAPL", pd.DataFrame({"Close": [1.0]}, index=[datetime(2024, 1, 2)]), datetime(2024, 1, 1), datetime(2024, 2, 1))
+    span = cache.missing_span("AAPL", datetime(2023, 12, 1), datetime(2024, 3, 1), backfill=timedelta(days=30))
+    assert span == (datetime(2023, 11, 1), datetime(2024, 3, 1))
+    assert cache.missing_span("AAPL", datetime(2024, 1, 5), datetime(2024, 2, 3), tolerance=timedelta(days=3)) is None
+
+
+def test_failed_download_is_not_cached_as_covered(tmp_path, monkeypatch):
+    responses = [pd.DataFrame()]
+
+    def flaky(symbol, start, end):
+        if responses:
+            return responses.pop()
+        index = pd.bdate_range(start, end)
+        return pd.DataFrame({column: np.ones(len(index)) for column in PRICE_COLUMNS}, index=index)
+
+    monkeypatch.setattr(price_store, "download_ohlcv", flaky)
+    service = PriceService(store=PriceStore(tmp_path))
+    start, end = datetime(2024, 1, 1), datetime(2024, 3, 1)
+    assert service.get_history("AAPL", start, end).empty
+    assert not service.cache.coverage("AAPL")
+    assert len(service.get_history("AAPL", start, end)) == len(pd.bdate_range(start, end))
+
+
+def test_live_tail_is_cached_within_tolerance(tmp_path, downloads):
+    service = PriceService(store=PriceStore(tmp_path))
+    now = datetime.utcnow()
+    service.get_history("AAPL", now - timedelta(days=30), now, tolerance=timedelta(minutes=30))
+    service.get_history("AAPL", now - timedelta(days=30), now + timedelta(minutes=5), tolerance=timedelta(minutes=30))
+    assert len(downloads) == 1
+
+
+class _CrowdedCache(RangePriceCache):
+    #After caching AAPL, another thread caches a frame big enough to evict it.
+
+    def put(self, symbol, df, start, end, covered=None):
+        super().put(symbol, df, start, end, covered)
+        if symbol == "AAPL":
+            index = pd.bdate_range("2000-01-01", periods=5000)
+            big = pd.DataFrame({column: np.ones(len(index)) for column in PRICE_COLUMNS}, index=index)
+            other = threading.Thread(target=RangePriceCache.put, args=(self, "MSFT", big, index[0], index[-1]))
+            other.start()
+            other.join(0.2)
+
+
+def test_fetched_bars_survive_a_concurrent_eviction(tmp_path, downloads):
+    service = PriceService(store=PriceStore(tmp_path), cache=_CrowdedCache(max_bytes=100_000))
+    assert len(service.get_history("AAPL", datetime(2024, 1, 1), datetime(2024, 3, 1))) > 0
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents import price_store
+from agents.price_store import PRICE_COLUMNS, CoverageIndex, PriceStore
+
+
+def _bars(start: str, end: str) -> pd.DataFrame:
+    index = pd.bdate_range(start, end)
+    close = np.linspace(100.0, 100.0 + len(index), len(index))
+    return pd.DataFrame({column: close for column in PRICE_COLUMNS}, index=index)
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    #Records download_ohlcv calls; `fail` makes the next downloads come back empty.
+    calls = []
+    state = {"fail": False}
+
+    def fake(symbol, start, end):
+        calls.append((symbol, start, end))
+        if state["fail"]:
+            return price_store._empty_frame()
+        return _bars(start, end)
+
+    monkeypatch.setattr(price_store, "download_ohlcv", fake)
+    return calls, state
+
+
+def test_coverage_merges_and_reports_gaps():
+    coverage = CoverageIndex([(datetime(2024, 1, 1), datetime(2024, 1, 10))])
+    coverage.add(datetime(2024, 1, 10), datetime(2024, 1, 20))
+    coverage.add(datetime(2024, 2, 1), datetime(2024, 2, 5))
+    assert list(coverage) == [
+        (datetime(2024, 1, 1), datetime(2024, 1, 20)),
+        (datetime(2024, 2, 1), datetime(2024, 2, 5)),
+    ]
+    assert coverage.gaps(datetime(2024, 1, 5), datetime(2024, 2, 10)) == [
+        (datetime(2024, 1, 20), datetime(2024, 2, 1)),
+        (datetime(2024, 2, 5), datetime(2024, 2, 10)),
+    ]
+    assert CoverageIndex.from_json(coverage.to_json()).to_json() == coverage.to_json()
+
+
+def test_covered_range_is_served_from_disk(tmp_path, downloads):
+    calls, _ = downloads
+    store = PriceStore(tmp_path)
+    first = store.get_history("AAPL", datetime(2024, 1, 1), datetime(2024, 3, 1))
+    again = PriceStore(tmp_path).get_history("AAPL", datetime(2024, 1, 15), datetime(2024, 2, 15))
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(again, first.loc["2024-01-15":"2024-02-15"], check_freq=False)
+
+
+def test_empty_download_does_not_poison_coverage(tmp_path, downloads):
+    calls, state = downloads
+    state["fail"] = True
+    assert PriceStore(tmp_path).get_history("AAPL", datetime(2024, 1, 1), datetime(2024, 3, 1)).empty
+    assert not PriceStore(tmp_path).coverage("AAPL")
+
+    state["fail"] = False
+    bars = PriceStore(tmp_path).get_history("AAPL", datetime(2024, 1, 1), datetime(2024, 3, 1))
+    assert len(calls) == 2
+    assert len(bars) == len(pd.bdate_range("2024-01-01", "2024-03-01"))
+
+
+def test_append_extends_files_in_place(tmp_path, downloads):
+    store = PriceStore(tmp_path)
+    store.get_history("AAPL", datetime(2024, 1, 1), datetime(2024, 3, 1))
+    store.get_history("AAPL", datetime(2024, 1, 1), datetime(2024, 4, 1))
+    stored = PriceStore(tmp_path).load("AAPL")
+    assert stored.index.is_monotonic_increasing and stored.index.is_unique
+    assert stored.index[0] == pd.Timestamp("2024-01-01") and stored.index[-1] == pd.Timestamp("2024-04-01")
+
+
+def _multi_ticker(frames) -> pd.DataFrame:
+    data = pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+    data.index.name = "Date"
+    return data
+
+
+def test_normalize_download_requires_the_symbol():
+    data = _multi_ticker({"AAPL": _bars("2024-01-01", "2024-01-31"), "MSFT": _bars("2024-01-01", "2024-01-31") * 2})
+    assert price_store._normalize_download(data, "NVDA").empty
+    np.testing.assert_array_equal(
+        price_store._normalize_download(data, "msft")["Close"].to_numpy(), data[("Close", "MSFT")].to_numpy()
+    )
+
+
+def test_prefetch_leaves_missing_symbols_uncovered(tmp_path, monkeypatch):
+    calls = []
+
+    def fake(tickers, start=None, end=None, **kwargs):
+        calls.append(list(tickers))
+        nan = _bars(start, end) * np.nan
+        return _multi_ticker({"AAPL": _bars(start, end), "MSFT": nan})
+
+    monkeypatch.setattr(price_store.yf, "download", fake)
+    store = PriceStore(tmp_path)
+    store.prefetch(["AAPL", "MSFT", "NVDA"], datetime(2024, 1, 1), datetime(2024, 3, 1))
+    assert store.coverage("AAPL").covers(datetime(2024, 1, 1), datetime(2024, 3, 1))
+    assert not store.coverage("MSFT") and not store.coverage("NVDA")
+
+    store.prefetch(["AAPL", "MSFT", "NVDA"], datetime(2024, 1, 1), datetime(2024, 3, 1))
+    assert calls[-1] == ["MSFT", "NVDA"]
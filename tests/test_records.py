@@ -0,0 +1,50 @@
+import dataclasses
+import pickle
+from datetime import datetime
+
+import pytest
+
+from agents.interfaces import Event, FeatureVector, Outcome, Prediction
+from agents.records import EventRecord, FeatureRecord, FeatureSchema, OutcomeRecord, PredictionRecord
+
+TS = datetime(2024, 1, 2)
+
+
+def test_schemas_are_interned():
+    assert FeatureSchema.of(["a", "b"]) is FeatureSchema.of(("a", "b"))
+    assert FeatureSchema.of(["a", "b"]) is not FeatureSchema.of(["b", "a"])
+    assert pickle.loads(pickle.dumps(FeatureSchema.of(["a", "b"]))) is FeatureSchema.of(["a", "b"])
+    with pytest.raises(ValueError):
+        FeatureSchema.of(["a", "a"])
+
+
+def test_feature_record_round_trip():
+    vector = FeatureVector("AAPL", TS, {"rsi_14": 55.0, "bb_width": 0.1}, {"rows": 90})
+    record = FeatureRecord.from_vector(vector)
+    other = FeatureRecord.create("MSFT", TS, {"rsi_14": 40.0, "bb_width": 0.2})
+    assert record.schema is other.schema
+    assert record.to_vector() == vector
+    assert record.features["rsi_14"] == 55.0 and list(record.features) == ["rsi_14", "bb_width"]
+    with pytest.raises(ValueError):
+        record.values[0] = 1.0
+
+
+def test_records_are_slotted_and_frozen():
+    prediction = Prediction("AAPL", TS, "1d", 0.01, 0.6, 0.4, 0.2, "ridge")
+    record = PredictionRecord.from_prediction(prediction)
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        record.prob_up = 0.0
+    assert record.extra is None and record.to_prediction() == prediction
+    assert dataclasses.replace(record, symbol="MSFT").symbol == "MSFT"
+
+
+def test_records_pickle():
+    event = EventRecord.from_event(Event("AAPL", TS, "price", {"close": 1.5, "volume": 10}))
+    outcome = OutcomeRecord.from_outcome(
+        Outcome("AAPL", TS, TS, 0.02, 1, Prediction("AAPL", TS, "1d", 0.01, 0.6, 0.4, 0.2, "ridge"))
+    )
+    feature = FeatureRecord.create("AAPL", TS, {"x": 1.0})
+    assert pickle.loads(pickle.dumps(feature)).schema is feature.schema
+    assert pickle.loads(pickle.dumps(event)).to_event() == event.to_event()
+    assert pickle.loads(pickle.dumps(outcome)) == outcome
@@ -0,0 +1,177 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents import indicators, price_store
+from agents.indicators import (
+    ALL_INDICATORS,
+    FEATURE_NAMES,
+    INDICATORS,
+    feature_names,
+    register_indicator,
+    window_indicators,
+)
+from agents.price_service import PriceService
+from agents.price_store import PRICE_COLUMNS, PriceStore
+from agents.technical import YFinanceTechnicalIndicatorAgent
+
+BASELINE_FEATURES = (
+    "bb_upper",
+    "bb_lower",
+    "bb_pct",
+    "rsi_14",
+    "macd",
+    "macd_signal",
+    "macd_hist",
+    "recent_support",
+    "recent_resistance",
+    "trend_strength",
+)
+
+
+def _history(start: str, end: str) -> pd.DataFrame:
+    index = pd.bdate_range(start, end)
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(index))))
+    frame = pd.DataFrame(index=index)
+    frame["Open"] = close
+    frame["High"] = close * (1 + rng.uniform(0, 0.02, len(index)))
+    frame["Low"] = close * (1 - rng.uniform(0, 0.02, len(index)))
+    frame["Close"] = close
+    frame["Volume"] = rng.integers(1_000, 50_000, len(index)).astype("float64")
+    return frame[list(PRICE_COLUMNS)]
+
+
+@pytest.fixture
+def history(monkeypatch):
+    bars = _history("2023-01-02", "2024-06-28")
+    monkeypatch.setattr(price_store, "download_ohlcv", lambda symbol, start, end: bars.loc[start:end])
+    return bars
+
+
+def _agent(tmp_path, **kwargs) -> YFinanceTechnicalIndicatorAgent:
+    return YFinanceTechnicalIndicatorAgent(price_service=PriceService(store=PriceStore(tmp_path)), **kwargs)
+
+
+def _baseline(closes: pd.Series) -> dict:
+    # The agent's original pandas implementation of its default features.
+    mean, std = closes.rolling(20).mean(), closes.rolling(20).std()
+    upper, lower = mean.iloc[-1] + 2 * std.iloc[-1], mean.iloc[-1] - 2 * std.iloc[-1]
+    delta = closes.diff()
+    rs = delta.clip(lower=0).rolling(14).mean() / -delta.clip(upper=0).rolling(14).mean()
+    macd = closes.ewm(span=12, adjust=False).mean() - closes.ewm(span=26, adjust=False).mean()
+    signal = macd.ewm(span=9, adjust=False).mean()
+    recent = closes[closes.index > closes.index[-1] - pd.Timedelta(days=30)]
+    ma20 = mean.dropna()
+    return {
+        "bb_upper": upper,
+        "bb_lower": lower,
+        "bb_pct": (closes.iloc[-1] - lower) / (upper - lower),
+        "rsi_14": 100 - 100 / (1 + rs.iloc[-1]) if rs.iloc[-1] > 0 else 0.0,
+        "macd": macd.iloc[-1],
+        "macd_signal": signal.iloc[-1],
+        "macd_hist": macd.iloc[-1] - signal.iloc[-1],
+        "recent_support": recent.min(),
+        "recent_resistance": recent.max(),
+        "trend_strength": np.polyfit(np.arange(len(ma20)), ma20.to_numpy(), 1)[0],
+    }
+
+
+def test_default_features_match_baseline(tmp_path, history):
+    assert FEATURE_NAMES == BASELINE_FEATURES
+    agent = _agent(tmp_path)
+    as_of = datetime(2024, 3, 15)
+    vector = agent.compute_features("AAPL", as_of)
+    assert tuple(vector.features) == BASELINE_FEATURES
+    closes = history.loc[as_of - pd.Timedelta(days=agent.lookback_days) : as_of, "Close"]
+    for name, value in _baseline(closes).items():
+        assert vector.features[name] == pytest.approx(value, rel=1e-9), name
+
+
+def test_extra_indicators_are_opt_in(tmp_path, history):
+    as_of = datetime(2024, 3, 15)
+    default = _agent(tmp_path).compute_features("AAPL", as_of).features
+    extended = _agent(tmp_path, indicators=ALL_INDICATORS).compute_features("AAPL", as_of).features
+    assert set(extended) - set(default) == {"atr_14", "stoch_k", "stoch_d", "obv", "vwap_20"}
+    assert {name: extended[name] for name in default} == default
+
+
+def test_backfill_rows_match_point_in_time_features(tmp_path, history):
+    agent = _agent(tmp_path, indicators=ALL_INDICATORS)
+    frame = agent.backfill_features("AAPL", datetime(2024, 2, 1), datetime(2024, 3, 1))
+    assert list(frame.columns) == list(feature_names(ALL_INDICATORS))
+    assert list(frame.index) == list(history.loc["2024-02-01":"2024-03-01"].index)
+    for ts, row in frame.iloc[::5].iterrows():
+        expected = agent.compute_features("AAPL", ts.to_pydatetime()).features
+        assert list(expected) == list(frame.columns)
+        np.testing.assert_array_equal(row.to_numpy(), list(expected.values()))
+
+
+def test_backfill_without_prices_is_empty(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_store, "download_ohlcv", lambda symbol, start, end: pd.DataFrame(columns=list(PRICE_COLUMNS)))
+    frame = _agent(tmp_path).backfill_features("AAPL", datetime(2024, 2, 1), datetime(2024, 3, 1))
+    assert frame.empty and list(frame.columns) == list(FEATURE_NAMES)
+
+
+def test_indicator_subsets_agree_with_full_plan(history):
+    bars = {column: history[column].to_numpy() for column in PRICE_COLUMNS}
+    dates = history.index.to_numpy()
+    ends = np.arange(60, len(history), 17)
+    starts = np.maximum(ends - 60, 0)
+    full = window_indicators(bars, dates, starts, ends, ALL_INDICATORS)
+    for name in ALL_INDICATORS:
+        subset = window_indicators(bars, dates, starts, ends, (name,))
+        assert tuple(subset) == INDICATORS[name].outputs
+        for feature, values in subset.items():
+            np.testing.assert_array_equal(values, full[feature])
+
+
+@pytest.fixture
+def scratch_nodes():
+    added = []
+
+    def register(name, **kwargs):
+        added.append(name)
+        return register_indicator(name, **kwargs)
+
+    yield register
+    for name in added:
+        INDICATORS.pop(name, None)
+    indicators._plan.cache_clear()
+
+
+def test_plan_computes_shared_intermediates_once(history, scratch_nodes):
+    calls = []
+
+    @scratch_nodes("scratch_base")
+    def _base(ctx):
+        calls.append("base")
+        return ctx.close * 2
+
+    @scratch_nodes("scratch_a", inputs=("scratch_base",), outputs=("a",))
+    def _a(ctx, base):
+        return {"a": base[ctx.ends]}
+
+    @scratch_nodes("scratch_b", inputs=("scratch_base", "scratch_a"), outputs=("b",))
+    def _b(ctx, base, a):
+        return {"b": a["a"] + base[ctx.starts]}
+
+    plan = indicators._plan(("scratch_b", "scratch_a"))
+    assert plan == ("scratch_base", "scratch_a", "scratch_b")
+    close = history["Close"].to_numpy()
+    values = window_indicators({"Close": close}, history.index.to_numpy(), np.array([0, 3]), np.array([5, 9]), ("scratch_b", "scratch_a"))
+    assert calls == ["base"]
+    assert list(values) == ["b", "a"]
+    np.testing.assert_allclose(values["b"], 2 * close[[5, 9]] + 2 * close[[0, 3]])
+
+
+def test_plan_rejects_cycles_and_unknown_nodes(scratch_nodes):
+    scratch_nodes("scratch_x", inputs=("scratch_y",))(lambda ctx, y: y)
+    scratch_nodes("scratch_y", inputs=("scratch_x",))(lambda ctx, x: x)
+    with pytest.raises(ValueError, match="cycle"):
+        indicators._plan(("scratch_x",))
+    with pytest.raises(KeyError):
+        indicators._plan(("scratch_missing",))
+
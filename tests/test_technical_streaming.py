@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents import price_store
+from agents.indicators import ALL_INDICATORS, feature_names
+from agents.interfaces import Event
+from agents.price_service import PriceService
+from agents.price_store import PRICE_COLUMNS, PriceStore
+from agents.technical import YFinanceTechnicalIndicatorAgent
+
+# MACD's EMAs run from the first streamed bar; the batch path restarts them
+# at the start of its lookback window.
+_WARMUP_DEPENDENT = {"macd", "macd_signal", "macd_hist"}
+
+
+def _history(start: str, end: str) -> pd.DataFrame:
+    index = pd.bdate_range(start, end)
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+    frame = pd.DataFrame(index=index)
+    frame["Open"] = close * (1 + rng.normal(0, 0.002, len(index)))
+    frame["High"] = close * 1.01
+    frame["Low"] = close * 0.99
+    frame["Close"] = close
+    frame["Volume"] = rng.integers(1_000_000, 20_000_000, len(index)).astype("float64")
+    return frame[list(PRICE_COLUMNS)]
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    bars = _history("2023-01-02", "2024-06-28")
+    monkeypatch.setattr(price_store, "download_ohlcv", lambda symbol, start, end: bars.loc[start:end])
+    return bars
+
+
+def _agent(tmp_path) -> YFinanceTechnicalIndicatorAgent:
+    return YFinanceTechnicalIndicatorAgent(
+        price_service=PriceService(store=PriceStore(tmp_path)), indicators=ALL_INDICATORS
+    )
+
+
+def _event(ts: pd.Timestamp, bar: pd.Series) -> Event:
+    payload = {column.lower(): float(bar[column]) for column in PRICE_COLUMNS}
+    return Event(symbol="AAPL", ts=ts.to_pydatetime(), source="YF_PRICE", payload=payload)
+
+
+def test_streaming_matches_batch(tmp_path, history):
+    streaming, batch = _agent(tmp_path), _agent(tmp_path)
+    for ts, bar in history.loc["2024-01-02":].iterrows():
+        streaming.handle_event(_event(ts, bar))
+        streamed = streaming.compute_features("AAPL", ts.to_pydatetime())
+        expected = batch.compute_features("AAPL", ts.to_pydatetime())
+        assert streamed.meta.get("streaming") is True
+        for name in feature_names(ALL_INDICATORS):
+            if name not in _WARMUP_DEPENDENT:
+                np.testing.assert_allclose(streamed.features[name], expected.features[name], rtol=1e-9, err_msg=name)
+
+
+def test_stale_stream_falls_back_to_batch(tmp_path, history):
+    agent = _agent(tmp_path)
+    ts = pd.Timestamp("2024-01-03")
+    agent.handle_event(_event(ts, history.loc[ts]))
+    later = datetime(2024, 5, 1)
+    features = agent.compute_features("AAPL", later)
+    expected = _agent(tmp_path).compute_features("AAPL", later)
+    assert "streaming" not in features.meta
+    assert features.features == expected.features
+
+    # Within one bar of the streamed bar the snapshot still answers.
+    assert agent.compute_features("AAPL", ts.to_pydatetime() + timedelta(hours=12)).meta.get("streaming") is True